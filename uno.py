@@ -1,7 +1,13 @@
-from random import shuffle, choice
+from random import Random
 from itertools import product, repeat, chain
+from functools import partial, lru_cache
+from hashlib import blake2b
+from struct import Struct, pack, unpack_from
 
 
+# Bump when a change to the engine changes the outcome of seeded games
+ENGINE_VERSION = 1
+
 COLORS = ['red', 'yellow', 'green', 'blue']
 ALL_COLORS = COLORS + ['black']
 NUMBERS = list(range(10)) + list(range(1, 10))
@@ -9,6 +15,28 @@ SPECIAL_CARD_TYPES = ['skip', 'reverse', '+2']
 COLOR_CARD_TYPES = NUMBERS + SPECIAL_CARD_TYPES * 2
 BLACK_CARD_TYPES = ['wildcard', '+4']
 CARD_TYPES = NUMBERS + SPECIAL_CARD_TYPES + BLACK_CARD_TYPES
+# Each distinct (color, card_type) pair, and how many of it are in the deck
+FACES = (
+    list(product(COLORS, list(range(10)) + SPECIAL_CARD_TYPES)) +
+    list(product(['black'], BLACK_CARD_TYPES))
+)
+FACE_INDEX = {face: i for i, face in enumerate(FACES)}
+FACE_COUNTS = [
+    COLOR_CARD_TYPES.count(card_type) if color != 'black' else 4
+    for color, card_type in FACES
+]
+# Colors and card types as indexes, for code working on faces rather than
+# UnoCards. Colors are indexes into ALL_COLORS, so BLACK is also the color of
+# a black first card which hasn't had a color chosen, and card types are
+# indexes into TYPES, which has the colored card types first
+BLACK = ALL_COLORS.index('black')
+TYPES = list(range(10)) + SPECIAL_CARD_TYPES + BLACK_CARD_TYPES
+COLOR_INDEX = {color: i for i, color in enumerate(ALL_COLORS)}
+TYPE_INDEX = {card_type: i for i, card_type in enumerate(TYPES)}
+FACE_COLORS = [COLOR_INDEX[color] for color, card_type in FACES]
+FACE_TYPES = [TYPE_INDEX[card_type] for color, card_type in FACES]
+# The black faces come last
+FIRST_BLACK = FACE_INDEX[('black', 'wildcard')]
 
 
 class UnoCard:
@@ -20,6 +48,9 @@ class UnoCard:
 
     >>> card = UnoCard('red', 5)
     """
+    # The card's byte in UnoGame.to_bytes, set on the shared colored cards
+    _byte = None
+
     def __init__(self, color, card_type):
         self._validate(color, card_type)
         self.color = color
@@ -57,6 +88,13 @@ class UnoCard:
         else:
             return self.card_type
 
+    @property
+    def face(self):
+        """
+        Index of the card's color and type in FACES
+        """
+        return FACE_INDEX[(self.color, self.card_type)]
+
     @property
     def _color(self):
         return self.temp_color if self.temp_color else self.color
@@ -84,6 +122,72 @@ class UnoCard:
         )
 
 
+def _build_deck():
+    """
+    Return a list of the complete set of Uno Cards, unshuffled.
+    """
+    color_cards = product(COLORS, COLOR_CARD_TYPES)
+    black_cards = product(repeat('black', 4), BLACK_CARD_TYPES)
+    all_cards = chain(color_cards, black_cards)
+    deck = [UnoCard(color, card_type) for color, card_type in all_cards]
+    return list(reversed(deck))
+
+
+# The deck is built once and copied for each game. Colored cards never change
+# once created so they are shared between games, but black cards hold the
+# color chosen for them, so every game gets its own.
+UNSHUFFLED_DECK = _build_deck()
+_BLACK_CARD_POSITIONS = [
+    i for i, card in enumerate(UNSHUFFLED_DECK) if card.color == 'black'
+]
+# Players which can be dealt a hand from each deck
+PLAYERS_PER_DECK = 15
+# Most decks in a game, so every count written by to_bytes fits in two bytes
+MAX_DECKS = 600
+# Cards picked up by the next player for each card type, without stacking
+_PENALTIES = {'+2': 2, '+4': 4}
+# One shared card for each colored face
+_FACE_CARDS = {
+    card.face: card for card in UNSHUFFLED_DECK if card.color != 'black'
+}
+
+# Games are serialized as a header, the size of each hand as two bytes, then
+# a byte for each card in the deck and each hand: its face, or for black cards
+# with a color chosen, one of the bytes after the faces
+_SERIAL_VERSION = 2
+_HEADER = Struct('<BHHBHHH')
+_NO_WINNER = 0xFFFF
+for card in UNSHUFFLED_DECK:
+    if card.color != 'black':
+        card._byte = card.face
+_BYTE_CARDS = [_FACE_CARDS.get(face) for face in range(len(FACES))] + \
+    [None] * len(BLACK_CARD_TYPES) * len(COLORS)
+_BLACK_BYTES = bytes(int(b >= FIRST_BLACK) for b in range(256))
+_BLACK_BYTE_STATES = [
+    {'color': 'black', 'card_type': card_type, '_temp_color': color}
+    for card_type, color in chain(
+        product(BLACK_CARD_TYPES, [None]), product(BLACK_CARD_TYPES, COLORS)
+    )
+]
+
+
+def derive_seed(seed, *counters):
+    """
+    Return the seed for a stream of random numbers split from a master seed by
+    one or more counters, e.g. the seed for game n of a run is
+    derive_seed(seed, n). The result depends only on the arguments, so the
+    same games are played however they are split between threads and
+    processes.
+
+    seed: int/str
+    counters: ints
+
+    >>> game = UnoGame(5, seed=derive_seed(1234, 0))
+    """
+    data = repr((seed,) + counters).encode()
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), 'big')
+
+
 class UnoPlayer:
     """
     Represents a player in an Uno game. A player is created with a list of 7
@@ -127,20 +231,298 @@ class UnoPlayer:
         return any(current_card.playable(card) for card in self.hand)
 
 
+class RuleSet:
+    """
+    Represents the rules an Uno game is played with, including optional house
+    rules.
+
+    stacking: bool - a +2 or +4 can be answered with another +2 or +4, and
+        the player who finally picks up takes all the cards (default: False)
+    seven_o: bool - a 7 swaps hands with a target player, and a 0 passes
+        every hand on in the direction of play (default: False)
+    jump_in: bool - a player can play a card identical to the current card
+        out of turn, and play carries on from them (default: False)
+    draw_until_playable: bool - picking up carries on until a playable card
+        is drawn, and it is then still the player's turn (default: False)
+
+    The rules are compiled into tables of functions looked up by card type,
+    so the cost of a move doesn't depend on which rules are enabled. A RuleSet
+    can be shared by any number of games.
+
+    >>> rules = RuleSet(stacking=True, seven_o=True)
+    >>> game = UnoGame(5, rules=rules)
+    """
+    def __init__(
+        self, stacking=False, seven_o=False, jump_in=False,
+        draw_until_playable=False
+    ):
+        self.stacking = stacking
+        self.seven_o = seven_o
+        self.jump_in = jump_in
+        self.draw_until_playable = draw_until_playable
+        self._compile()
+
+    def __repr__(self):
+        enabled = [
+            name for name in RULE_NAMES if getattr(self, name)
+        ]
+        return '<RuleSet object: {}>'.format(' '.join(enabled) or 'standard')
+
+    def _compile(self):
+        """
+        Build the tables of functions used by UnoGame for these rules.
+        """
+        self.effects = dict.fromkeys(COLOR_CARD_TYPES, _no_effect)
+        self.effects.update({
+            'reverse': _reverse,
+            'skip': _skip,
+            '+2': _draw_two,
+            'wildcard': _wildcard,
+            '+4': _wild_draw_four,
+        })
+        self.checks = dict.fromkeys(COLOR_CARD_TYPES, _check_active)
+        self.checks.update(dict.fromkeys(BLACK_CARD_TYPES, _check_new_color))
+        self.targeted = set()
+        self.playable = _playable
+        self.draw = _draw_one
+        self.check_turn = _check_turn
+
+        if self.draw_until_playable:
+            self.draw = _draw_until_playable
+        if self.stacking:
+            self.effects['+2'] = _stack_draw_two
+            self.effects['+4'] = _stack_wild_draw_four
+            self.playable = _playable_stacked
+            self.draw = _pick_up_stacked(self.draw)
+        if self.seven_o:
+            self.effects[7] = _swap_hands
+            self.effects[0] = _pass_hands
+            self.checks[7] = _check_target
+            self.targeted.add(7)
+        if self.jump_in:
+            self.check_turn = _check_turn_jump_in
+        self._flags = sum(
+            1 << i for i, name in enumerate(RULE_NAMES) if getattr(self, name)
+        )
+
+
+RULE_NAMES = ['stacking', 'seven_o', 'jump_in', 'draw_until_playable']
+
+
+def _no_effect(game, player, card, new_color, target):
+    pass
+
+
+def _reverse(game, player, card, new_color, target):
+    game._player_cycle.reverse()
+
+
+def _skip(game, player, card, new_color, target):
+    next(game)
+
+
+def _draw_two(game, player, card, new_color, target):
+    next(game)
+    game._pick_up(game.current_player, 2)
+
+
+def _wildcard(game, player, card, new_color, target):
+    card.temp_color = new_color
+
+
+def _wild_draw_four(game, player, card, new_color, target):
+    card.temp_color = new_color
+    next(game)
+    game._pick_up(game.current_player, 4)
+
+
+def _stack_draw_two(game, player, card, new_color, target):
+    game._penalty += 2
+
+
+def _stack_wild_draw_four(game, player, card, new_color, target):
+    card.temp_color = new_color
+    game._penalty += 4
+
+
+def _swap_hands(game, player, card, new_color, target):
+    if player.hand:
+        other = game.players[target]
+        player.hand, other.hand = other.hand, player.hand
+
+
+def _pass_hands(game, player, card, new_color, target):
+    if player.hand:
+        hands = [p.hand for p in game.players]
+        delta = game._player_cycle._delta
+        for n, p in enumerate(game.players):
+            p.hand = hands[(n - delta) % len(hands)]
+
+
+def _check_active(game, player, card, new_color, target):
+    if not game.is_active:
+        raise ValueError('Game is over')
+
+
+def _check_new_color(game, player, card, new_color, target):
+    if new_color not in COLORS:
+        raise ValueError(
+            'Invalid new_color: must be red, yellow, green or blue'
+        )
+    _check_active(game, player, card, new_color, target)
+
+
+def _check_target(game, player, card, new_color, target):
+    if not isinstance(target, int) or not 0 <= target < len(game.players):
+        raise ValueError('Invalid target: should be the index number')
+    if game.players[target] is player:
+        raise ValueError('Invalid target: cannot swap with yourself')
+    _check_active(game, player, card, new_color, target)
+
+
+def _playable(game):
+    return game.current_card.playable
+
+
+def _playable_stacked(game):
+    if game._penalty:
+        return partial(_stackable, game.current_card)
+    return game.current_card.playable
+
+
+def _stackable(current_card, card):
+    return card.card_type in ('+2', '+4') and current_card.playable(card)
+
+
+def _check_turn(game, player, card):
+    if game.current_player != player:
+        raise ValueError('Invalid player: not their turn')
+
+
+def _check_turn_jump_in(game, player, card):
+    if game.current_player != player:
+        if card is None or player.hand[card] != game.current_card:
+            raise ValueError('Invalid player: not their turn')
+
+
+def _draw_one(game, player):
+    game._pick_up(player, 1)
+    next(game)
+
+
+def _draw_until_playable(game, player):
+    while game._can_draw():
+        game._pick_up(player, 1)
+        if game.rules.playable(game)(player.hand[-1]):
+            return
+    next(game)
+
+
+def _pick_up_stacked(draw):
+    """
+    Return a draw function which picks up the stacked penalty if there is one,
+    and otherwise draws as usual.
+    """
+    def _draw_stacked(game, player):
+        if game._penalty:
+            penalty, game._penalty = game._penalty, 0
+            game._pick_up(player, penalty)
+            next(game)
+        else:
+            draw(game, player)
+    return _draw_stacked
+
+
+STANDARD_RULES = RuleSet()
+
+
+@lru_cache(maxsize=None)
+def _black_card_positions(decks):
+    """
+    Return a list of the positions of the black cards in a deck made of the
+    given number of unshuffled decks.
+    """
+    return [
+        i + deck * len(UNSHUFFLED_DECK)
+        for deck in range(decks) for i in _BLACK_CARD_POSITIONS
+    ]
+
+
+@lru_cache(maxsize=None)
+def _rules_from_flags(flags):
+    """
+    Return a RuleSet with the rules in RULE_NAMES enabled by the bits of
+    flags.
+    """
+    if not flags:
+        return STANDARD_RULES
+    return RuleSet(**{
+        name: bool(flags & 1 << i) for i, name in enumerate(RULE_NAMES)
+    })
+
+
+def _card_byte(card):
+    """
+    Return the byte for a card which doesn't have one set in _byte.
+    """
+    b = card.face
+    if b >= FIRST_BLACK and card.temp_color is not None:
+        b = len(FACES) + (b - FIRST_BLACK) * len(COLORS) + \
+            COLOR_INDEX[card.temp_color]
+    return b
+
+
+def _byte_card(b):
+    """
+    Return a new black card for a byte from UnoGame.to_bytes, skipping the
+    checks in UnoCard.__init__ since the bytes have already been checked.
+    """
+    card = UnoCard.__new__(UnoCard)
+    card.__dict__.update(_BLACK_BYTE_STATES[b - FIRST_BLACK])
+    return card
+
+
 class UnoGame:
     """
     Represents an Uno game.
 
     players: int
     random: bool (default: True)
+    seed: int/str (default: None)
+    rules: RuleSet (default: STANDARD_RULES)
+    decks: int, number of standard decks shuffled together (default: 1)
+
+    Each game has its own random number generator, rng, seeded from seed if
+    given, which is used for everything random in the game. Each deck is
+    enough for up to 15 players, so larger tables need more decks.
 
     >>> game = UnoGame(5)
+    >>> party = UnoGame(40, decks=3)
     """
-    def __init__(self, players, random=True):
+    # The game's own black cards, in the order of their positions in the
+    # unshuffled deck, found the first time the game is reset
+    _black_cards = None
+
+    def __init__(self, players, random=True, seed=None, rules=None, decks=1):
         if not isinstance(players, int):
             raise ValueError('Invalid game: players must be integer')
-        if not 2 <= players <= 15:
-            raise ValueError('Invalid game: must be between 2 and 15 players')
+        if not isinstance(decks, int) or not 1 <= decks <= MAX_DECKS:
+            raise ValueError(
+                'Invalid game: decks must be between 1 and {}'.format(
+                    MAX_DECKS
+                )
+            )
+        if not 2 <= players <= PLAYERS_PER_DECK * decks:
+            raise ValueError(
+                'Invalid game: must be between 2 and {} players'.format(
+                    PLAYERS_PER_DECK * decks
+                )
+            )
+        self.rng = Random(seed)
+        self.rules = rules if rules is not None else STANDARD_RULES
+        self.decks = decks
+        self._penalty = 0
+        self._init_state()
         self.deck = self._create_deck(random)
         self.players = [
             UnoPlayer(self._deal_hand(), n) for n in range(players)
@@ -149,6 +531,14 @@ class UnoGame:
         self._current_player = next(self._player_cycle)
         self._winner = None
 
+    def _init_state(self):
+        """
+        Set up anything a subclass keeps beyond the cards, hands and turn
+        order. It is called once the rules are set, both when a game is
+        created and when one is restored by from_bytes, so subclasses set up
+        their own state here rather than in __init__.
+        """
+
     def __next__(self):
         """
         Iteration sets the current player to the next player in the cycle.
@@ -157,25 +547,97 @@ class UnoGame:
 
     def _create_deck(self, random):
         """
-        Return a list of the complete set of Uno Cards. If random is True, the
-        deck will be shuffled, otherwise will be unshuffled.
+        Return a list of the complete set of Uno Cards, once for each of the
+        game's decks. If random is True, the deck will be shuffled, otherwise
+        will be unshuffled.
         """
-        color_cards = product(COLORS, COLOR_CARD_TYPES)
-        black_cards = product(repeat('black', 4), BLACK_CARD_TYPES)
-        all_cards = chain(color_cards, black_cards)
-        deck = [UnoCard(color, card_type) for color, card_type in all_cards]
+        deck = UNSHUFFLED_DECK * self.decks
+        for i in _black_card_positions(self.decks):
+            deck[i] = UnoCard('black', deck[i].card_type)
         if random:
-            shuffle(deck)
-            return deck
-        else:
-            return list(reversed(deck))
+            self.rng.shuffle(deck)
+        return deck
 
     def _deal_hand(self):
         """
         Return a list of 7 cards from the top of the deck, and remove these
         from the deck.
         """
-        return [self.deck.pop() for i in range(7)]
+        hand = self.deck[:-8:-1]
+        del self.deck[-7:]
+        return hand
+
+    def reset(self, seed=None, random=True):
+        """
+        Start a new game with the same players and rules, as if the game had
+        been created again with this seed, but reusing its cards, hands and
+        turn order instead of making new ones. The rng is seeded again too.
+
+        seed: int/str (default: None)
+        random: bool (default: True)
+
+        >>> game.reset(seed=2)
+        """
+        if self._rng is None:
+            self._rng = Random(seed)
+        else:
+            self._rng.seed(seed)
+        self._penalty = 0
+        self._winner = None
+        self._redeal(random)
+        cycle = self._player_cycle
+        cycle._pos = None
+        cycle._reverse = False
+        self._current_player = next(cycle)
+
+    def _redeal(self, random):
+        """
+        Put every card back in the deck, shuffle it if random is True, and
+        deal new hands into the players' hand lists.
+        """
+        deck = self.deck
+        black_cards = self._black_cards
+        if black_cards is None:
+            black_cards = self._black_cards = self._find_black_cards()
+        deck[:] = UNSHUFFLED_DECK * self.decks
+        for i, card in zip(_black_card_positions(self.decks), black_cards):
+            card.temp_color = None
+            deck[i] = card
+        if random:
+            self._rng.shuffle(deck)
+        for player in self.players:
+            player.hand[:] = deck[:-8:-1]
+            del deck[-7:]
+
+    def _find_black_cards(self):
+        """
+        Return a list of the game's black cards, one for each position of a
+        black card in its unshuffled deck, making new ones for any which are
+        missing.
+        """
+        found = {card_type: [] for card_type in BLACK_CARD_TYPES}
+        hands = (player.hand for player in self.players)
+        for card in chain(self.deck, *hands):
+            if card.color == 'black':
+                found[card.card_type].append(card)
+        black_cards = []
+        for i in _black_card_positions(self.decks):
+            card_type = UNSHUFFLED_DECK[i % len(UNSHUFFLED_DECK)].card_type
+            if found[card_type]:
+                black_cards.append(found[card_type].pop())
+            else:
+                black_cards.append(UnoCard('black', card_type))
+        return black_cards
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            self._rng = Random(self._seed)
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng):
+        self._rng = rng
 
     @property
     def current_card(self):
@@ -183,7 +645,7 @@ class UnoGame:
 
     @property
     def is_active(self):
-        return all(len(player.hand) > 0 for player in self.players)
+        return self._winner is None
 
     @property
     def current_player(self):
@@ -193,68 +655,304 @@ class UnoGame:
     def winner(self):
         return self._winner
 
-    def play(self, player, card=None, new_color=None):
+    def play(self, player, card=None, new_color=None, target=None):
         """
         Process the player playing a card.
 
         player: int representing player index number
         card: int representing index number of card in player's hand
+        new_color: string, required for black cards
+        target: int representing the index number of the player to swap hands
+            with, required for a 7 with the seven_o rule
 
         It must be player's turn, and if card is given, it must be playable.
         If card is not given (None), the player picks up a card from the deck.
 
         If game is over, raise an exception.
         """
+        _player = self._check_player(player, card)
+        if card is None:
+            self._draw(_player)
+            return
+        _card = _player.hand[card]
+        self._check_playable(_card)
+        self._check_card(_player, _card, new_color, target)
+        self._play_card(_player, card, new_color, target)
+
+    def legal_actions(self):
+        """
+        Return a list of the moves the current player can make, as
+        (card, new_color) tuples to be passed to apply, or (card, new_color,
+        target) for cards which need a target. Picking up a card is given as
+        (None, None) and is always allowed while the game is active.
+        """
+        if not self.is_active:
+            return []
+        playable = self.rules.playable(self)
+        targeted = self.rules.targeted
+        actions = []
+        for i, card in enumerate(self.current_player.hand):
+            if playable(card):
+                if card.color == 'black':
+                    actions.extend((i, color) for color in COLORS)
+                elif card.card_type in targeted:
+                    actions.extend(
+                        (i, None, target)
+                        for target, player in enumerate(self.players)
+                        if player != self.current_player
+                    )
+                else:
+                    actions.append((i, None))
+        actions.append((None, None))
+        return actions
+
+    def enough_cards(self, card=None):
+        """
+        Return True if there are enough cards left to pick up for the current
+        player to play the card at index card in their hand (or to pick up,
+        if card is None): the penalty of a +2 or +4, a stacked penalty, or
+        the card drawn. Simulations check this before each move, and end the
+        game unfinished when it's False, rather than have the move fail half
+        way through.
+
+        >>> game.enough_cards(0)
+        True
+        """
+        if card is None:
+            if self._penalty:
+                needed = self._penalty
+            else:
+                needed = 0 if self.rules.draw_until_playable else 1
+        elif self.rules.stacking:
+            needed = 0
+        else:
+            needed = _PENALTIES.get(
+                self.current_player.hand[card].card_type, 0
+            )
+        return self._cards_left() >= needed
+
+    def apply(self, card=None, new_color=None, target=None):
+        """
+        Process the current player making a move taken from legal_actions.
+
+        card: int representing index number of card in player's hand
+        new_color: string, required for black cards
+        target: int, required for a 7 with the seven_o rule
+
+        Unlike play, the move is trusted: the checks are only asserted, so
+        they are skipped when Python is run with -O.
+        """
+        _player = self.current_player
+        if card is None:
+            self._draw(_player)
+            return
+        assert self.is_active, 'Game is over'
+        _card = _player.hand[card]
+        assert self.rules.playable(self)(_card), 'Invalid card'
+        assert _card.color != 'black' or new_color in COLORS, 'Invalid color'
+        self._play_card(_player, card, new_color, target)
+
+    def to_bytes(self):
+        """
+        Return the game's state as a compact bytes object, with one byte for
+        each card and two for each hand's size, to be restored with
+        UnoGame.from_bytes. The game's rng and any player ids other than the
+        default are not included.
+        """
+        players = self.players
+        cycle = self._player_cycle
+        winner = (
+            _NO_WINNER if self._winner is None
+            else players.index(self._winner)
+        )
+        header = _HEADER.pack(
+            _SERIAL_VERSION, len(players), cycle.pos,
+            cycle._reverse | self.rules._flags << 1, winner, self._penalty,
+            len(self.deck)
+        )
+        cards = list(chain(self.deck, *(player.hand for player in players)))
+        codes = [card._byte for card in cards]
+        # Black cards, and cards not from the shared deck, have no _byte
+        i = -1
+        try:
+            while True:
+                i = codes.index(None, i + 1)
+                codes[i] = _card_byte(cards[i])
+        except ValueError:
+            pass
+        return b''.join([
+            header,
+            pack('<{}H'.format(len(players)),
+                 *[len(player.hand) for player in players]),
+            bytes(codes),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data, seed=None):
+        """
+        Return a game restored from the bytes returned by to_bytes, with a new
+        rng seeded from seed. Called on a subclass, the game is of that class,
+        with its state set up by _init_state.
+
+        data: bytes-like object
+        seed: int/str (default: None)
+
+        >>> game = UnoGame.from_bytes(UnoGame(5).to_bytes())
+        """
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        try:
+            (version, n, pos, flags, winner, penalty,
+             deck_size) = _HEADER.unpack_from(data)
+        except Exception:
+            raise ValueError('Invalid data: too short')
+        if version != _SERIAL_VERSION:
+            raise ValueError('Invalid data: unknown version')
+        if n < 2:
+            raise ValueError('Invalid data: must be at least 2 players')
+        if pos >= n:
+            raise ValueError('Invalid data: current player out of range')
+        if winner != _NO_WINNER and winner >= n:
+            raise ValueError('Invalid data: winner out of range')
+        if flags >> 1 >= 1 << len(RULE_NAMES):
+            raise ValueError('Invalid data: unknown rules')
+        rules = _rules_from_flags(flags >> 1)
+        if penalty and not rules.stacking:
+            raise ValueError('Invalid data: penalty without stacking')
+        if not deck_size:
+            raise ValueError('Invalid data: no current card')
+        offset = _HEADER.size + 2 * n
+        if len(data) < offset:
+            raise ValueError('Invalid data: wrong length')
+        sizes = unpack_from('<{}H'.format(n), data, _HEADER.size)
+        if len(data) != offset + deck_size + sum(sizes):
+            raise ValueError('Invalid data: wrong length')
+        cards = data[offset:]
+        if cards and max(cards) >= len(_BYTE_CARDS):
+            raise ValueError('Invalid data: unknown card')
+
+        game = cls.__new__(cls)
+        # The rng is only seeded if it's used
+        game._rng = None
+        game._seed = seed
+        game.rules = rules
+        game.decks = max(-(-len(cards) // len(UNSHUFFLED_DECK)), 1)
+        game._penalty = penalty
+        game._init_state()
+        byte_cards = _BYTE_CARDS
+        cards = [byte_cards[b] for b in data[offset:]]
+        # Black cards are created for each game
+        marks = data[offset:].translate(_BLACK_BYTES)
+        i = marks.find(1)
+        while i != -1:
+            cards[i] = _byte_card(data[offset + i])
+            i = marks.find(1, i + 1)
+        game.deck = cards[:deck_size]
+        start = deck_size
+        game.players = []
+        for player_id, size in enumerate(sizes):
+            player = UnoPlayer.__new__(UnoPlayer)
+            player.hand = cards[start:start + size]
+            player.player_id = player_id
+            game.players.append(player)
+            start += size
+        game._player_cycle = ReversibleCycle(game.players)
+        game._player_cycle.pos = pos
+        game._player_cycle._reverse = bool(flags & 1)
+        game._current_player = game.players[pos]
+        game._winner = (
+            None if winner == _NO_WINNER else game.players[winner]
+        )
+        return game
+
+    def _check_player(self, player, card=None):
+        """
+        Return the UnoPlayer for the player index given, raising an exception
+        if it is not valid or not their turn.
+        """
         if not isinstance(player, int):
             raise ValueError('Invalid player: should be the index number')
         if not 0 <= player < len(self.players):
             raise ValueError('Invalid player: index out of range')
         _player = self.players[player]
-        if self.current_player != _player:
-            raise ValueError('Invalid player: not their turn')
-        if card is None:
-            self._pick_up(_player, 1)
-            next(self)
-            return
-        _card = _player.hand[card]
-        if not self.current_card.playable(_card):
+        self.rules.check_turn(self, _player, card)
+        return _player
+
+    def _check_playable(self, card):
+        """
+        Raise an exception if the card is not playable on the current card.
+        """
+        if not self.rules.playable(self)(card):
             raise ValueError(
                 'Invalid card: {} not playable on {}'.format(
-                    _card, self.current_card
+                    card, self.current_card
                 )
             )
-        if _card.color == 'black':
-            if new_color not in COLORS:
-                raise ValueError(
-                    'Invalid new_color: must be red, yellow, green or blue'
-                )
-        if not self.is_active:
-            raise ValueError('Game is over')
 
-        played_card = _player.hand.pop(card)
-        self.deck.append(played_card)
+    def _check_card(self, player, card, new_color, target=None):
+        """
+        Raise an exception if a black card is played without a valid new color,
+        a card which needs a target is played by player without a valid one
+        (another player), or if the game is over.
+        """
+        self.rules.checks[card.card_type](
+            self, player, card, new_color, target
+        )
 
-        card_color = played_card.color
-        card_type = played_card.card_type
-        if card_color == 'black':
-            self.current_card.temp_color = new_color
-            if card_type == '+4':
-                next(self)
-                self._pick_up(self.current_player, 4)
-        elif card_type == 'reverse':
-            self._player_cycle.reverse()
-        elif card_type == 'skip':
-            next(self)
-        elif card_type == '+2':
-            next(self)
-            self._pick_up(self.current_player, 2)
+    def _draw(self, player):
+        """
+        The player picks up instead of playing, and the turn passes to the next
+        player (depending on the rules).
+        """
+        self.rules.draw(self, player)
 
-        if self.is_active:
+    def _play_card(self, player, card, new_color, target=None):
+        """
+        Move the card at index card from the player's hand to the deck, apply
+        its effect and move on to the next player (or end the game).
+
+        player: UnoPlayer
+        card: int
+        new_color: string or None
+        target: int or None
+        """
+        if player is not self._current_player:
+            self._jump_in(player)
+        played_card = self._discard(player, card)
+        self._card_effect(player, played_card, new_color, target)
+
+        # Hands are only swapped or passed on by a player with cards left, so
+        # only the player's own hand can have run out
+        if player.hand:
             next(self)
         else:
-            self._winner = _player
+            self._winner = player
             self._print_winner()
 
+    def _jump_in(self, player):
+        """
+        Make the player the current player, with play carrying on from them.
+        """
+        self._player_cycle.pos = self.players.index(player)
+        self._current_player = player
+
+    def _discard(self, player, card):
+        """
+        Remove the card at index card from the player's hand and place it on
+        top of the deck. Return the card.
+        """
+        played_card = player.hand.pop(card)
+        self.deck.append(played_card)
+        return played_card
+
+    def _card_effect(self, player, played_card, new_color, target=None):
+        """
+        Apply the effect of the card just played, according to the rules.
+        """
+        self.rules.effects[played_card.card_type](
+            self, player, played_card, new_color, target
+        )
+
     def _print_winner(self):
         """
         Print the winner name if available, otherwise look up the index number.
@@ -265,16 +963,33 @@ class UnoGame:
             winner_name = self.players.index(self.winner)
         print("Player {} wins!".format(winner_name))
 
+    def _can_draw(self):
+        """
+        Return True if there are any cards to pick up, other than the current
+        card.
+        """
+        return len(self.deck) > 1
+
+    def _cards_left(self):
+        """
+        Return the number of cards which can be picked up.
+        """
+        return len(self.deck) - 1
+
     def _pick_up(self, player, n):
         """
         Take n cards from the bottom of the deck and add it to the player's
-        hand.
+        hand. The current card on top can't be picked up, so there must be
+        more than n cards in the deck.
 
         player: UnoPlayer
         n: int
         """
-        penalty_cards = [self.deck.pop(0) for i in range(n)]
-        player.hand.extend(penalty_cards)
+        deck = self.deck
+        if n >= len(deck):
+            raise IndexError('Not enough cards in the deck')
+        player.hand.extend(deck[:n])
+        del deck[:n]
 
 
 class ReversibleCycle:
@@ -330,9 +1045,9 @@ class ReversibleCycle:
 
 
 class AIUnoGame:
-    def __init__(self, players):
-        self.game = UnoGame(players)
-        self.player = choice(self.game.players)
+    def __init__(self, players, seed=None):
+        self.game = UnoGame(players, seed=seed)
+        self.player = self.game.rng.choice(self.game.players)
         self.player_index = self.game.players.index(self.player)
         print('The game begins. You are Player {}.'.format(self.player_index))
         self.print_hand()
@@ -372,7 +1087,7 @@ class AIUnoGame:
             for i, card in enumerate(player.hand):
                 if game.current_card.playable(card):
                     if card.color == 'black':
-                        new_color = choice(COLORS)
+                        new_color = game.rng.choice(COLORS)
                     else:
                         new_color = None
                     print("Player {} played {}".format(player, card))
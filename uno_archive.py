@@ -0,0 +1,337 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from struct import Struct
+
+from uno import UnoGame, FACES, FACE_INDEX
+
+
+# Events indexed for each game, by seat and face:
+# PLAY: the seat played a card of the face
+# PENALTY: the seat picked up cards because of a +2 or +4 of the face
+# DRAW: the seat picked up instead of playing (face is NONE)
+PLAY, PENALTY, DRAW = range(3)
+# Postings are kept for events anywhere in a game, and for events in each of
+# the last TAIL moves of a game
+TAIL = 8
+NONE = 0xFFFF
+
+_MAGIC = b'UNOX'
+_HEADER = Struct('<4sII')
+# event, seat, face, distance and number of game ids, or _DENSE for a bitmap
+_POSTING = Struct('<BHHHI')
+_DENSE = 0xFFFFFFFF
+
+
+class _RecordingGame(UnoGame):
+    """
+    An UnoGame which notes the events of each move in _move_events as it is
+    replayed.
+    """
+    def _init_state(self):
+        self._drawing = PENALTY
+
+    def _draw(self, player):
+        self._drawing = PENALTY if self._penalty else DRAW
+        super()._draw(player)
+        self._drawing = PENALTY
+
+    def _discard(self, player, card):
+        self._move_events.append(
+            (PLAY, self.players.index(player), player.hand[card].face)
+        )
+        return super()._discard(player, card)
+
+    def _pick_up(self, player, n):
+        super()._pick_up(player, n)
+        face = self.current_card.face if self._drawing == PENALTY else NONE
+        self._move_events.append(
+            (self._drawing, self.players.index(player), face)
+        )
+
+    def _print_winner(self):
+        pass
+
+
+def _bitmap(ids, games):
+    """
+    Return an int with the bits of the game ids given set.
+    """
+    bits = bytearray((games + 7) // 8)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _union(postings, games):
+    """
+    Return the bitmap of the games in any of the postings given, each either a
+    bitmap or an array of game ids.
+    """
+    bitmap = 0
+    bits = bytearray((games + 7) // 8)
+    for posting in postings:
+        if isinstance(posting, int):
+            bitmap |= posting
+        else:
+            for i in posting:
+                bits[i >> 3] |= 1 << (i & 7)
+    return bitmap | int.from_bytes(bits, 'little')
+
+
+class ArchiveBuilder:
+    """
+    Replays recorded games once to build a GameArchive which can be queried
+    without replaying them again.
+
+    >>> builder = ArchiveBuilder()
+    >>> builder.add(UnoGame(12, seed=1).to_bytes(), moves)
+    0
+    >>> archive = builder.build()
+    """
+    def __init__(self):
+        self.players = array('H')
+        self.winners = array('H')
+        self.rules = array('B')
+        self.moves = array('I')
+        self._postings = {}
+
+    def add(self, start, moves):
+        """
+        Add a game to the archive and return its id, which counts up from 0.
+
+        start: bytes from UnoGame.to_bytes for the game before the first move
+        moves: list of (player, card, new_color, target) tuples, the
+            arguments of each call to UnoGame.play, with None for any not
+            given
+        """
+        game_id = len(self.players)
+        game = _RecordingGame.from_bytes(start)
+        length = len(moves)
+        keys = set()
+        for n, move in enumerate(moves):
+            game._move_events = []
+            game.play(*move)
+            tail = length - 1 - n
+            for kind, seat, face in game._move_events:
+                keys.add((kind, seat, face, NONE))
+                if tail < TAIL:
+                    keys.add((kind, seat, face, tail))
+        postings = self._postings
+        for key in keys:
+            postings.setdefault(key, array('I')).append(game_id)
+        self.players.append(len(game.players))
+        self.winners.append(
+            NONE if game.winner is None else game.players.index(game.winner)
+        )
+        self.rules.append(game.rules._flags)
+        self.moves.append(length)
+        return game_id
+
+    def build(self):
+        """
+        Return the GameArchive of the games added. Events in more than one
+        game in 32 are kept as bitmaps, and rarer ones as arrays of game ids,
+        whichever is smaller.
+        """
+        games = len(self.players)
+        size = (games + 7) // 8
+        return GameArchive(
+            self.players, self.winners, self.rules, self.moves,
+            {key: _bitmap(ids, games) if ids.itemsize * len(ids) >= size
+             else ids for key, ids in self._postings.items()}
+        )
+
+
+class GameArchive:
+    """
+    Summary columns and event postings for a set of recorded games, made by
+    an ArchiveBuilder. Each query returns a bitmap, an int with bit n set for
+    game n, so queries are combined with & (and), | (or) and archive.all & ~
+    (not), and ids gives the games in a bitmap.
+
+    Cards are given as in FACES, e.g. ('black', '+4'), or as a card type alone
+    for any color, e.g. '+2'.
+
+    players, winners, rules, moves: arrays of each game's number of players,
+        winning seat (NONE if none), RuleSet flags and number of moves
+    postings: dict of (event, seat, face, moves from the end or NONE) to
+        bitmap, or to an array of sorted game ids for rare events
+
+    >>> hits = archive.events(PENALTY, ('black', '+4'), seat=3, last=2)
+    >>> long = archive.games(players=12, min_moves=501)
+    >>> archive.ids(hits & long)
+    """
+    def __init__(self, players, winners, rules, moves, postings):
+        self.players = players
+        self.winners = winners
+        self.rules = rules
+        self.moves = moves
+        self.postings = postings
+        self.all = (1 << len(players)) - 1
+        # Game ids sorted by number of moves, for range queries
+        self._by_moves = array(
+            'I', sorted(range(len(moves)), key=moves.__getitem__)
+        )
+        self._sorted_moves = array('I', sorted(moves))
+        self._column_postings = {}
+
+    def __len__(self):
+        return len(self.players)
+
+    def ids(self, bitmap):
+        """
+        Return a list of the game ids in a bitmap, in order.
+        """
+        ids = []
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+        for i, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                ids.append(i * 8 + low.bit_length() - 1)
+                byte ^= low
+        return ids
+
+    def _column(self, name, value):
+        """
+        Return the bitmap of games whose value in the named column is value.
+        """
+        key = (name, value)
+        bitmap = self._column_postings.get(key)
+        if bitmap is None:
+            column = getattr(self, name)
+            bitmap = self._column_postings[key] = _bitmap(
+                [i for i, v in enumerate(column) if v == value], len(self)
+            )
+        return bitmap
+
+    def games(self, players=None, winner=None, rules=None, min_moves=None,
+              max_moves=None):
+        """
+        Return the bitmap of games matching everything given.
+
+        players: int
+        winner: int, seat, or NONE for games with no winner
+        rules: RuleSet
+        min_moves: int
+        max_moves: int
+        """
+        bitmap = self.all
+        if players is not None:
+            bitmap &= self._column('players', players)
+        if winner is not None:
+            bitmap &= self._column('winners', winner)
+        if rules is not None:
+            bitmap &= self._column('rules', rules._flags)
+        if min_moves is not None or max_moves is not None:
+            start = 0 if min_moves is None else \
+                bisect_left(self._sorted_moves, min_moves)
+            end = len(self) if max_moves is None else \
+                bisect_right(self._sorted_moves, max_moves)
+            bitmap &= _bitmap(self._by_moves[start:end], len(self))
+        return bitmap
+
+    def events(self, event, card=None, seat=None, last=None):
+        """
+        Return the bitmap of games where the event happened, with the card
+        given (any card if None), to the seat given (any seat if None), in the
+        last last moves of the game (anywhere if None).
+
+        event: PLAY, PENALTY or DRAW
+        card: (color, card_type) tuple, or card type
+        seat: int
+        last: int, up to TAIL
+        """
+        if event not in (PLAY, PENALTY, DRAW):
+            raise ValueError('Invalid event: must be PLAY, PENALTY or DRAW')
+        if last is None:
+            distances = [NONE]
+        elif 1 <= last <= TAIL:
+            distances = range(last)
+        else:
+            raise ValueError('Invalid last: must be from 1 to {}'.format(TAIL))
+        faces = [NONE] if event == DRAW else _faces(card)
+        seats = range(max(self.players, default=0)) if seat is None else [seat]
+        postings = self.postings
+        return _union((
+            postings.get((event, s, face, distance), 0)
+            for s in seats for face in faces for distance in distances
+        ), len(self))
+
+    def to_bytes(self):
+        """
+        Return the archive as bytes, to be restored with
+        GameArchive.from_bytes.
+        """
+        games = len(self)
+        size = (games + 7) // 8
+        parts = [
+            _HEADER.pack(_MAGIC, games, len(self.postings)),
+            self.players.tobytes(), self.winners.tobytes(),
+            self.rules.tobytes(), self.moves.tobytes(),
+        ]
+        for key, posting in sorted(self.postings.items()):
+            if isinstance(posting, int):
+                parts.append(_POSTING.pack(*key, _DENSE))
+                parts.append(posting.to_bytes(size, 'little'))
+            else:
+                parts.append(_POSTING.pack(*key, len(posting)))
+                parts.append(posting.tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Return an archive restored from the bytes returned by to_bytes.
+        """
+        try:
+            magic, games, n = _HEADER.unpack_from(data)
+        except Exception:
+            raise ValueError('Invalid data: too short')
+        if magic != _MAGIC:
+            raise ValueError('Invalid data: not a GameArchive')
+        size = (games + 7) // 8
+        offset = _HEADER.size
+        columns = []
+        for typecode in 'HHBI':
+            column = array(typecode)
+            end = offset + games * column.itemsize
+            column.frombytes(data[offset:end])
+            columns.append(column)
+            offset = end
+        postings = {}
+        for i in range(n):
+            try:
+                *key, count = _POSTING.unpack_from(data, offset)
+            except Exception:
+                raise ValueError('Invalid data: too short')
+            offset += _POSTING.size
+            if count == _DENSE:
+                posting = int.from_bytes(data[offset:offset + size], 'little')
+                offset += size
+            else:
+                posting = array('I')
+                end = offset + count * posting.itemsize
+                posting.frombytes(data[offset:end])
+                offset = end
+            postings[tuple(key)] = posting
+        if offset != len(data):
+            raise ValueError('Invalid data: wrong length')
+        return cls(*columns, postings)
+
+
+def _faces(card):
+    """
+    Return a list of the faces of a card given as (color, card_type), or of
+    every color of a card type, or of every card if card is None.
+    """
+    if card is None:
+        return range(len(FACES))
+    if isinstance(card, tuple):
+        if card not in FACE_INDEX:
+            raise ValueError('Invalid card: {}'.format(card))
+        return [FACE_INDEX[card]]
+    faces = [i for i, (color, card_type) in enumerate(FACES)
+             if card_type == card]
+    if not faces:
+        raise ValueError('Invalid card: {}'.format(card))
+    return faces
@@ -0,0 +1,160 @@
+from multiprocessing import parent_process, resource_tracker, shared_memory
+from struct import Struct
+
+from uno import UnoGame
+
+
+# The arena starts with a header giving its layout, followed by the slots.
+# Each slot is a sequence number and the length of the game in it, then
+# room for slot_size bytes from UnoGame.to_bytes.
+_MAGIC = b'UNOA'
+_ARENA_HEADER = Struct('<4sII')
+_SLOT_HEADER = Struct('<QI')
+_ALIGN = 8
+
+
+class GameArena:
+    """
+    A fixed size array of slots in shared memory, each holding a game as
+    bytes from UnoGame.to_bytes, which any number of processes can read
+    without a copy being sent to each of them.
+
+    Each slot has a sequence number which is odd while its game is being
+    written. Readers note the sequence number, read the game, and check the
+    sequence number is the same as before, trying again if it isn't, so
+    readers never take a lock or block the writer. Only one process should
+    write to each slot.
+
+    slots: int
+    slot_size: int, largest game in bytes (default: 256)
+    name: string, shared memory name (default: chosen by the system)
+
+    >>> arena = GameArena(1000)
+    >>> arena.publish(0, UnoGame(5))
+    >>> GameArena.attach(arena.name).read(0)
+    """
+    def __init__(self, slots, slot_size=256, name=None, _shm=None):
+        if slots < 1 or slot_size < 1:
+            raise ValueError('Invalid arena: slots and slot_size must be > 0')
+        self.slots = slots
+        self.slot_size = slot_size
+        self._stride = -(-(_SLOT_HEADER.size + slot_size) // _ALIGN) * _ALIGN
+        self._start = -(-_ARENA_HEADER.size // _ALIGN) * _ALIGN
+        if _shm is None:
+            _shm = shared_memory.SharedMemory(
+                name, create=True, size=self._start + slots * self._stride
+            )
+            _ARENA_HEADER.pack_into(_shm.buf, 0, _MAGIC, slots, slot_size)
+            self.owner = True
+        else:
+            self.owner = False
+        self._shm = _shm
+        self._buf = _shm.buf
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Return the arena with the shared memory name given, created by another
+        GameArena.
+        """
+        try:
+            shm = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # Before Python 3.13, attaching also registers the memory to be
+            # removed when this process's resource tracker exits. Processes
+            # started by multiprocessing share their parent's tracker, so
+            # only a process with its own tracker unregisters it.
+            shm = shared_memory.SharedMemory(name)
+            if parent_process() is None:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        magic, slots, slot_size = _ARENA_HEADER.unpack_from(shm.buf)
+        if magic != _MAGIC:
+            shm.close()
+            raise ValueError('Invalid arena: not a GameArena')
+        return cls(slots, slot_size, _shm=shm)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def _offset(self, slot):
+        if not 0 <= slot < self.slots:
+            raise ValueError('Invalid slot: index out of range')
+        return self._start + slot * self._stride
+
+    def publish(self, slot, game):
+        """
+        Write the game to the slot, replacing the game in it, and return the
+        slot's new sequence number.
+        """
+        data = game.to_bytes()
+        if len(data) > self.slot_size:
+            raise ValueError('Invalid game: too big for slot_size')
+        offset = self._offset(slot)
+        buf = self._buf
+        seq = _SLOT_HEADER.unpack_from(buf, offset)[0]
+        if seq % 2:
+            seq += 1
+        _SLOT_HEADER.pack_into(buf, offset, seq + 1, len(data))
+        start = offset + _SLOT_HEADER.size
+        buf[start:start + len(data)] = data
+        _SLOT_HEADER.pack_into(buf, offset, seq + 2, len(data))
+        return seq + 2
+
+    def sequence(self, slot):
+        """
+        Return the slot's sequence number, which is 0 if nothing has been
+        published to it and odd while it is being written.
+        """
+        return _SLOT_HEADER.unpack_from(self._buf, self._offset(slot))[0]
+
+    def view(self, slot):
+        """
+        Return the slot's sequence number and a read-only view of the bytes
+        of its game, without copying them. The view is only valid if the
+        sequence number is even and unchanged after it is used.
+        """
+        offset = self._offset(slot)
+        seq, length = _SLOT_HEADER.unpack_from(self._buf, offset)
+        start = offset + _SLOT_HEADER.size
+        return seq, self._buf[start:start + length].toreadonly()
+
+    def read(self, slot):
+        """
+        Return the game in the slot, or None if nothing has been published to
+        it, waiting for a write in progress to finish.
+        """
+        while True:
+            seq, view = self.view(slot)
+            if not seq or seq % 2:
+                view.release()
+                if not seq:
+                    return None
+                continue
+            try:
+                game = UnoGame.from_bytes(view)
+            except ValueError:
+                # A torn read, unless the slot hasn't changed
+                if self.sequence(slot) == seq:
+                    raise
+                continue
+            finally:
+                view.release()
+            if self.sequence(slot) == seq:
+                return game
+
+    def close(self):
+        """
+        Stop using the arena in this process. The arena that created the
+        shared memory also removes it.
+        """
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
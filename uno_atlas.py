@@ -0,0 +1,213 @@
+import json
+import os
+
+
+# The atlas is one PNG holding every image used by the graphical game, with
+# an index giving the name and rectangle of each image in it
+ATLAS_IMAGE = 'atlas.png'
+ATLAS_INDEX = 'atlas.json'
+
+
+def pack(sizes, max_width=1024, padding=2):
+    """
+    Return a dict of name to (x, y, width, height) placing each image in an
+    atlas no wider than max_width, with padding pixels around each image so
+    scaling the atlas doesn't blend neighbouring images. Images are placed in
+    rows, tallest first.
+
+    sizes: dict of image name to (width, height)
+    max_width: int, pixels (default: 1024)
+    padding: int, pixels (default: 2)
+
+    >>> pack({'back': (72, 108), 'red': (73, 108)})
+    {'back': (2, 2, 72, 108), 'red': (76, 2, 73, 108)}
+    """
+    rects = {}
+    x = y = padding
+    row_height = 0
+    for name in sorted(sizes, key=lambda name: (-sizes[name][1], name)):
+        width, height = sizes[name]
+        if width + 2 * padding > max_width:
+            raise ValueError(
+                'Invalid image: {} is wider than max_width'.format(name)
+            )
+        if x + width + padding > max_width:
+            x = padding
+            y += row_height + padding
+            row_height = 0
+        rects[name] = (x, y, width, height)
+        x += width + padding
+        row_height = max(row_height, height)
+    return rects
+
+
+def atlas_size(rects, padding=2):
+    """
+    Return the (width, height) of the atlas needed for the rects from pack.
+    """
+    return (
+        max(x + width for x, y, width, height in rects.values()) + padding,
+        max(y + height for x, y, width, height in rects.values()) + padding,
+    )
+
+
+def build_atlas(image_dir='images', max_width=1024, padding=2):
+    """
+    Pack every PNG in image_dir into one atlas image, saved in image_dir with
+    an index of where each image is, to be loaded with CardAtlas.load. Needs
+    pygame. Return the index.
+
+    image_dir: string (default: 'images')
+    max_width: int, pixels (default: 1024)
+    padding: int, pixels (default: 2)
+
+    >>> build_atlas('images')
+    """
+    atlas, rects = _pack_images(image_dir, max_width, padding)
+    return _save_atlas(image_dir, atlas, rects)
+
+
+def _save_atlas(image_dir, atlas, rects):
+    """
+    Save an atlas Surface and its index in image_dir, and return the index.
+    """
+    import pygame
+
+    pygame.image.save(atlas, os.path.join(image_dir, ATLAS_IMAGE))
+    index = {'images': rects}
+    with open(os.path.join(image_dir, ATLAS_INDEX), 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    return index
+
+
+def _atlas_is_stale(image_dir):
+    """
+    Return True if the atlas in image_dir is missing, or older than any of
+    the separate images.
+    """
+    try:
+        built = min(
+            os.path.getmtime(os.path.join(image_dir, name))
+            for name in (ATLAS_IMAGE, ATLAS_INDEX)
+        )
+    except OSError:
+        return True
+    return any(
+        os.path.getmtime(os.path.join(image_dir, name)) > built
+        for name in os.listdir(image_dir)
+        if name.endswith('.png') and name != ATLAS_IMAGE
+    )
+
+
+def _pack_images(image_dir, max_width=1024, padding=2):
+    """
+    Return an atlas Surface with every PNG in image_dir drawn on it, and the
+    rects from pack.
+    """
+    import pygame
+
+    images = {
+        name[:-len('.png')]: pygame.image.load(os.path.join(image_dir, name))
+        for name in sorted(os.listdir(image_dir))
+        if name.endswith('.png') and name != ATLAS_IMAGE
+    }
+    rects = pack(
+        {name: image.get_size() for name, image in images.items()},
+        max_width, padding
+    )
+    atlas = pygame.Surface(atlas_size(rects, padding), pygame.SRCALPHA)
+    atlas.fill((0, 0, 0, 0))
+    for name, image in images.items():
+        atlas.blit(image, rects[name][:2])
+    return atlas, rects
+
+
+class CardAtlas:
+    """
+    The images for the graphical game, decoded once from the atlas made by
+    build_atlas. Each image is handed out as a subsurface of the atlas, which
+    shares its pixels, so it doesn't matter how many images or cards there
+    are. Scaled copies of the atlas for other window sizes are made up front
+    for each of scales.
+
+    atlas: pygame Surface
+    rects: dict of image name to (x, y, width, height)
+    scales: list of floats (default: [])
+
+    >>> atlas = CardAtlas.load('images', scales=[0.75])
+    >>> atlas.surface('red_+2', scale=0.75)
+    """
+    def __init__(self, atlas, rects, scales=()):
+        self.rects = {name: tuple(rect) for name, rect in rects.items()}
+        self._atlases = {1: atlas}
+        self._surfaces = {}
+        for scale in scales:
+            self._scale(scale)
+
+    @classmethod
+    def load(cls, image_dir='images', scales=()):
+        """
+        Return the atlas in image_dir. If it hasn't been built, or any image
+        has changed since, the separate images are packed and the atlas is
+        saved for next time, as build_atlas does; if image_dir can't be
+        written to, the packed atlas is still returned.
+        """
+        import pygame
+
+        if _atlas_is_stale(image_dir):
+            atlas, rects = _pack_images(image_dir)
+            try:
+                _save_atlas(image_dir, atlas, rects)
+            except (OSError, pygame.error):
+                pass
+            return cls(atlas, rects, scales)
+        with open(os.path.join(image_dir, ATLAS_INDEX)) as f:
+            rects = json.load(f)['images']
+        atlas = pygame.image.load(os.path.join(image_dir, ATLAS_IMAGE))
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        return cls(atlas, rects, scales)
+
+    @classmethod
+    def from_images(cls, image_dir='images', scales=()):
+        """
+        Return an atlas packed from the separate PNGs in image_dir.
+        """
+        return cls(*_pack_images(image_dir), scales)
+
+    def _scale(self, scale):
+        """
+        Return the atlas scaled by scale, making it if it hasn't been already.
+        """
+        atlas = self._atlases.get(scale)
+        if atlas is None:
+            import pygame
+
+            width, height = self._atlases[1].get_size()
+            atlas = self._atlases[scale] = pygame.transform.smoothscale(
+                self._atlases[1], (round(width * scale), round(height * scale))
+            )
+        return atlas
+
+    def surface(self, name, scale=1):
+        """
+        Return the image with the name given, e.g. 'red_+2' or 'back', as a
+        subsurface of the atlas scaled by scale.
+        """
+        key = (name, scale)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            try:
+                x, y, width, height = self.rects[name]
+            except KeyError:
+                raise ValueError('Invalid image: {} not in atlas'.format(name))
+            atlas = self._scale(scale)
+            surface = self._surfaces[key] = atlas.subsurface((
+                round(x * scale), round(y * scale),
+                round(width * scale), round(height * scale)
+            ))
+        return surface
+
+
+if __name__ == '__main__':
+    build_atlas()
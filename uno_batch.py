@@ -0,0 +1,220 @@
+import asyncio
+
+import numpy as np
+
+from uno import (
+    ALL_COLORS, COLORS, COLOR_INDEX, FACES, FIRST_BLACK, TYPES, TYPE_INDEX
+)
+
+
+# Observations: counts of each face in the player's hand, the current card's
+# effective color (or black) and type, and the sizes of the player's hand and
+# the next player's hand
+_COLOR_OFFSET = len(FACES)
+_TYPE_OFFSET = _COLOR_OFFSET + len(ALL_COLORS)
+_SIZE_OFFSET = _TYPE_OFFSET + len(TYPES)
+N_FEATURES = _SIZE_OFFSET + 2
+_COLOR_FEATURES = {
+    color: _COLOR_OFFSET + i for color, i in COLOR_INDEX.items()
+}
+_TYPE_FEATURES = {
+    card_type: _TYPE_OFFSET + i for card_type, i in TYPE_INDEX.items()
+}
+
+# Actions: one for each colored face, one for each black face and new color,
+# and picking up
+PICK_UP = FIRST_BLACK + 2 * len(COLORS)
+N_ACTIONS = PICK_UP + 1
+
+
+def observe(game):
+    """
+    Return the current player's observation of the game as an array of
+    N_FEATURES floats.
+    """
+    x = np.zeros(N_FEATURES, dtype=np.float32)
+    player = game.current_player
+    for card in player.hand:
+        x[card.face] += 1
+    current_card = game.current_card
+    x[_COLOR_FEATURES[current_card._color]] = 1
+    x[_TYPE_FEATURES[current_card.card_type]] = 1
+    players = game.players
+    next_player = players[
+        (players.index(player) + game._player_cycle._delta) % len(players)
+    ]
+    x[_SIZE_OFFSET] = len(player.hand)
+    x[_SIZE_OFFSET + 1] = len(next_player.hand)
+    return x
+
+
+def action_index(card, new_color):
+    """
+    Return the index in N_ACTIONS of playing a card (an UnoCard, or None for
+    picking up) with new_color.
+    """
+    if card is None:
+        return PICK_UP
+    face = card.face
+    if face < FIRST_BLACK:
+        return face
+    return FIRST_BLACK + (face - FIRST_BLACK) * len(COLORS) + \
+        COLOR_INDEX[new_color]
+
+
+def legal_moves(game):
+    """
+    Return a dict of action index to the (card, new_color) action to pass to
+    game.apply, for the current player's legal actions. Picking up is only
+    included when there is no playable card.
+    """
+    hand = game.current_player.hand
+    actions = game.legal_actions()
+    moves = {}
+    for card, new_color, *target in reversed(actions[:-1] or actions):
+        if target:
+            raise ValueError('Invalid game: cards with targets not supported')
+        moves[action_index(
+            hand[card] if card is not None else None, new_color
+        )] = (card, new_color)
+    return moves
+
+
+class LinearPolicy:
+    """
+    Scores actions as a linear function of observations.
+
+    weights: array of shape (N_FEATURES, N_ACTIONS)
+    bias: array of shape (N_ACTIONS,) (default: zeros)
+
+    >>> policy = LinearPolicy(np.random.randn(N_FEATURES, N_ACTIONS))
+    """
+    def __init__(self, weights, bias=None):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        if self.weights.shape != (N_FEATURES, N_ACTIONS):
+            raise ValueError('Invalid weights: must be N_FEATURES x N_ACTIONS')
+        self.bias = (
+            np.zeros(N_ACTIONS, dtype=np.float32) if bias is None
+            else np.asarray(bias, dtype=np.float32)
+        )
+
+    def __call__(self, observations):
+        """
+        Return an array of the score of every action for each row of
+        observations.
+        """
+        return observations @ self.weights + self.bias
+
+
+class MLPPolicy:
+    """
+    Scores actions with a small neural network, with one hidden layer of
+    rectified linear units.
+
+    w1: array of shape (N_FEATURES, hidden)
+    b1: array of shape (hidden,)
+    w2: array of shape (hidden, N_ACTIONS)
+    b2: array of shape (N_ACTIONS,)
+    """
+    def __init__(self, w1, b1, w2, b2):
+        self.w1 = np.asarray(w1, dtype=np.float32)
+        self.b1 = np.asarray(b1, dtype=np.float32)
+        self.w2 = np.asarray(w2, dtype=np.float32)
+        self.b2 = np.asarray(b2, dtype=np.float32)
+        if self.w1.shape[0] != N_FEATURES or self.w2.shape[1] != N_ACTIONS:
+            raise ValueError('Invalid weights: must be N_FEATURES x N_ACTIONS')
+
+    def __call__(self, observations):
+        hidden = np.maximum(observations @ self.w1 + self.b1, 0)
+        return hidden @ self.w2 + self.b2
+
+
+class BatchScheduler:
+    """
+    Collects the decisions of many games running as asyncio tasks and scores
+    them with one call to the policy. A batch is scored as soon as it has
+    batch_size decisions, or max_wait seconds after its first decision
+    arrived, whichever comes first; a larger batch_size and max_wait give
+    higher throughput, and smaller ones lower latency.
+
+    Each decision takes the legal action with the highest score.
+
+    policy: function from an array of observations to an array of scores
+    batch_size: int (default: 256)
+    max_wait: float, seconds (default: 0.001)
+
+    >>> scheduler = BatchScheduler(LinearPolicy(weights))
+    >>> winners = scheduler.run([UnoGame(4, seed=n) for n in range(1000)])
+    """
+    def __init__(self, policy, batch_size=256, max_wait=0.001):
+        if batch_size < 1:
+            raise ValueError('Invalid batch_size: must be at least 1')
+        self.policy = policy
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.decisions = 0
+        self._pending = []
+        self._timer = None
+
+    async def choose(self, observation, moves):
+        """
+        Wait for the observation to be scored in a batch, and return the
+        highest scoring of the moves (a dict from legal_moves).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((observation, moves, future))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_wait, self.flush
+            )
+        return await future
+
+    def flush(self):
+        """
+        Score the pending decisions and resume their games.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        scores = self.policy(np.stack([obs for obs, _, _ in pending]))
+        mask = np.full(scores.shape, -np.inf, dtype=np.float32)
+        for row, (_, moves, _) in enumerate(pending):
+            mask[row, list(moves)] = 0
+        choices = np.argmax(scores + mask, axis=1)
+        for choice, (_, moves, future) in zip(choices.tolist(), pending):
+            future.set_result(moves[choice])
+        self.batches += 1
+        self.decisions += len(pending)
+
+    async def play(self, game, max_turns=10000):
+        """
+        Play the game to the end, and return the index of the winner (or None
+        if the deck runs out, there aren't enough cards left for the penalty
+        of the move chosen, or it goes on for more than max_turns turns).
+        """
+        for turn in range(max_turns):
+            if not game.is_active or len(game.deck) <= 1:
+                break
+            move = await self.choose(observe(game), legal_moves(game))
+            if not game.enough_cards(move[0]):
+                break
+            game.apply(*move)
+        if game.winner is None:
+            return None
+        return game.players.index(game.winner)
+
+    def run(self, games, max_turns=10000):
+        """
+        Play all the games concurrently, and return a list of their winners.
+        """
+        async def play_all():
+            return await asyncio.gather(
+                *(self.play(game, max_turns) for game in games)
+            )
+        return asyncio.run(play_all())
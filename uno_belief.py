@@ -0,0 +1,305 @@
+import random
+from collections import deque
+
+from uno import UnoGame, FACES, FACE_COUNTS
+
+
+def playable_mask(color, card_type):
+    """
+    Return a bitmask of the faces (indexes into FACES) which can be played on
+    a card of the effective color and card type given.
+    """
+    key = (color, card_type)
+    mask = _PLAYABLE_MASKS.get(key)
+    if mask is None:
+        mask = 0
+        for i, (face_color, face_type) in enumerate(FACES):
+            if (
+                face_color == color or
+                face_type == card_type or
+                face_color == 'black'
+            ):
+                mask |= 1 << i
+        _PLAYABLE_MASKS[key] = mask
+    return mask
+
+
+_PLAYABLE_MASKS = {}
+# The faces which can be played on a stacked penalty with the stacking rule
+_STACK_MASK = sum(
+    1 << i for i, (color, card_type) in enumerate(FACES)
+    if card_type in ('+2', '+4')
+)
+
+
+class CardTracker:
+    """
+    Tracks what one player (the observer) can tell about the cards held by
+    the other players, from the cards played and picked up so far.
+
+    For every face it keeps the number of cards the observer has not seen,
+    which are either in the draw pile or in another player's hand. For every
+    other player it keeps the cards the observer knows they hold (picked up
+    from the recycled discards), how many unknown cards they hold, and
+    constraints on those: when a player picks up instead of playing, none of
+    the cards they held can be played on the current card. That assumes
+    players only pick up when they cannot play, as the AI players do.
+
+    The constraints on a player are a list of [count, mask] groups, oldest
+    first: count of their unknown cards are none of the faces in the bitmask.
+    Each pass adds its mask to every group, and starts a new group for the
+    cards picked up since the last one, so each mask includes those of the
+    groups after it.
+
+    Playing and passing take time proportional to the number of groups, and
+    picking up to the number of cards picked up. The tracker must be created
+    at the start of the game, and is kept up to date by TrackedUnoGame.
+
+    game: UnoGame
+    observer: int representing player index number
+
+    >>> game = TrackedUnoGame(5)
+    >>> tracker = game.track(0)
+    """
+    def __init__(self, game, observer):
+        players = len(game.players)
+        self.observer = observer
+        self.unseen = [count * game.decks for count in FACE_COUNTS]
+        for card in game.players[observer].hand:
+            self.unseen[card.face] -= 1
+        self.unseen[game.current_card.face] -= 1
+        self.pile = len(game.deck) - 1
+        self.discards = deque([game.current_card.face])
+        self.known = [[0] * len(FACES) for i in range(players)]
+        self.hidden = [len(player.hand) for player in game.players]
+        self.hidden[observer] = 0
+        self.constraints = [[] for i in range(players)]
+
+    def played(self, player, card):
+        """
+        Record the player at index player playing the card.
+        """
+        face = card.face
+        self.discards.append(face)
+        if player == self.observer:
+            return
+        known = self.known[player]
+        if known[face]:
+            known[face] -= 1
+            return
+        self.unseen[face] -= 1
+        hidden = self.hidden[player] = self.hidden[player] - 1
+        # The card came from a group which allows it; taking it from the
+        # oldest of those only loosens the constraints on the cards left
+        groups = self.constraints[player]
+        for i, group in enumerate(groups):
+            if not group[1] >> face & 1:
+                group[0] -= 1
+                if not group[0]:
+                    del groups[i]
+                break
+        excess = sum(count for count, mask in groups) - hidden
+        while excess > 0:
+            dropped = min(excess, groups[-1][0])
+            groups[-1][0] -= dropped
+            excess -= dropped
+            if not groups[-1][0]:
+                groups.pop()
+
+    def passed(self, player, current_card, stacked=False):
+        """
+        Record the player at index player picking up instead of playing on
+        the current card. If stacked is True, the player was picking up a
+        stacked penalty, so only the +2 and +4 cards they could have stacked
+        are ruled out.
+        """
+        if player == self.observer:
+            return
+        mask = playable_mask(current_card._color, current_card.card_type)
+        if stacked:
+            mask &= _STACK_MASK
+        groups = self.constraints[player]
+        free = self.hidden[player]
+        merged = []
+        for count, excluded in groups:
+            free -= count
+            excluded |= mask
+            if merged and merged[-1][1] == excluded:
+                merged[-1][0] += count
+            else:
+                merged.append([count, excluded])
+        if free:
+            if merged and merged[-1][1] == mask:
+                merged[-1][0] += free
+            else:
+                merged.append([free, mask])
+        self.constraints[player] = merged
+
+    def picked_up(self, player, cards):
+        """
+        Record the player at index player picking up the cards given.
+        """
+        for card in cards:
+            if self.pile:
+                self.pile -= 1
+                if player == self.observer:
+                    self.unseen[card.face] -= 1
+                else:
+                    self.hidden[player] += 1
+            else:
+                face = self.discards.popleft()
+                if player != self.observer:
+                    self.known[player][face] += 1
+
+    def hand_size(self, player):
+        """
+        Return the number of cards held by the player at index player.
+        """
+        return self.hidden[player] + sum(self.known[player])
+
+    def sample_hands(self, rng=random, tries=100):
+        """
+        Return a list of hands, each a list of face indexes, dealing the unseen
+        cards to the other players consistently with what has been observed.
+        The observer's own entry is an empty list.
+
+        The unseen cards are shuffled and dealt until every player's
+        constraints are met, so each consistent deal is equally likely. If
+        none of tries deals does, each player's constrained cards are dealt
+        first from the faces they allow, which is only an approximation: it
+        favours the players dealt first.
+
+        rng: random.Random (default: the random module)
+        tries: int (default: 100)
+        """
+        hands = []
+        for player, known in enumerate(self.known):
+            hands.append([
+                face for face, count in enumerate(known) for i in range(count)
+            ])
+        faces = [
+            face for face, count in enumerate(self.unseen)
+            for i in range(count)
+        ]
+        for i in range(tries):
+            rng.shuffle(faces)
+            start = 0
+            for player, n in enumerate(self.hidden):
+                dealt = faces[start:start + n]
+                start += n
+                if not _allows(self.constraints[player], dealt):
+                    break
+            else:
+                start = 0
+                for player, n in enumerate(self.hidden):
+                    hands[player] += faces[start:start + n]
+                    start += n
+                return hands
+        pool = list(self.unseen)
+        total = sum(pool)
+        unknown = list(self.hidden)
+        for player, groups in enumerate(self.constraints):
+            for count, excluded in groups:
+                dealt = _deal(hands[player], pool, count, ~excluded, rng)
+                unknown[player] -= dealt
+                total -= dealt
+        for player, n in enumerate(unknown):
+            if n:
+                total -= _deal(hands[player], pool, n, -1, rng, total)
+        return hands
+
+
+def _allows(groups, faces):
+    """
+    Return True if the faces can be split among the constraint groups given.
+    Each group allows every face the groups before it allow, so it's enough
+    that each group allows as many faces as it and those before it need.
+    """
+    needed = 0
+    for count, excluded in groups:
+        needed += count
+        if sum(1 for face in faces if not excluded >> face & 1) < needed:
+            return False
+    return True
+
+
+def _deal(hand, pool, n, allowed, rng, total=None):
+    """
+    Move n faces from the pool of face counts to the hand, chosen at random
+    from the faces in the allowed bitmask. Return the number of faces dealt,
+    which is less than n if the pool runs out.
+    """
+    if total is None:
+        total = sum(
+            count for face, count in enumerate(pool) if allowed >> face & 1
+        )
+    dealt = 0
+    while dealt < n and total > 0:
+        pick = rng.randrange(total)
+        for face, count in enumerate(pool):
+            if allowed >> face & 1:
+                if pick < count:
+                    break
+                pick -= count
+        pool[face] -= 1
+        total -= 1
+        hand.append(face)
+        dealt += 1
+    return dealt
+
+
+class TrackedUnoGame(UnoGame):
+    """
+    An UnoGame which keeps CardTrackers up to date as the game is played.
+
+    players: int
+    random: bool (default: True)
+    seed: int/str (default: None)
+    rules: RuleSet (default: STANDARD_RULES)
+    decks: int (default: 1)
+
+    The trackers assume hands only change by playing and picking up, so the
+    seven_o rule is not supported.
+
+    >>> game = TrackedUnoGame(5)
+    >>> trackers = [game.track(n) for n in range(1, 5)]
+    """
+    def _init_state(self):
+        if self.rules.seven_o:
+            raise ValueError('Invalid rules: seven_o is not supported')
+        self.trackers = []
+
+    def track(self, observer):
+        """
+        Return a new CardTracker for the player at index observer.
+        """
+        tracker = CardTracker(self, observer)
+        self.trackers.append(tracker)
+        return tracker
+
+    def reset(self, seed=None, random=True):
+        """
+        Start a new game as with UnoGame.reset. The trackers of the old game
+        are dropped.
+        """
+        self.trackers.clear()
+        super().reset(seed, random)
+
+    def _draw(self, player):
+        for tracker in self.trackers:
+            tracker.passed(
+                player.player_id, self.current_card, self._penalty > 0
+            )
+        super()._draw(player)
+
+    def _discard(self, player, card):
+        played_card = super()._discard(player, card)
+        for tracker in self.trackers:
+            tracker.played(player.player_id, played_card)
+        return played_card
+
+    def _pick_up(self, player, n):
+        super()._pick_up(player, n)
+        cards = player.hand[-n:]
+        for tracker in self.trackers:
+            tracker.picked_up(player.player_id, cards)
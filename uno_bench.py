@@ -0,0 +1,162 @@
+import gc
+import pickle
+from time import perf_counter
+
+from uno import UnoGame, derive_seed
+from uno_sim import play_game, GamePool
+from uno_trace import Tracer
+
+
+def _time(f, items):
+    start = perf_counter()
+    for item in items:
+        f(item)
+    return (perf_counter() - start) / len(items)
+
+
+def serialization(players=4, games=1000, seed=0):
+    """
+    Compare UnoGame.to_bytes and from_bytes with pickle on seeded games.
+    Return a dict of the mean size in bytes and the mean seconds to dump and
+    load a game for each.
+    """
+    sample = [
+        UnoGame(players, seed=derive_seed(seed, n)) for n in range(games)
+    ]
+    pickled = [
+        pickle.dumps(game, pickle.HIGHEST_PROTOCOL) for game in sample
+    ]
+    packed = [game.to_bytes() for game in sample]
+    return {
+        'pickle': {
+            'bytes': sum(map(len, pickled)) / games,
+            'dump': _time(
+                lambda game: pickle.dumps(game, pickle.HIGHEST_PROTOCOL),
+                sample
+            ),
+            'load': _time(pickle.loads, pickled),
+        },
+        'to_bytes': {
+            'bytes': sum(map(len, packed)) / games,
+            'dump': _time(UnoGame.to_bytes, sample),
+            'load': _time(UnoGame.from_bytes, packed),
+        },
+    }
+
+
+def pooling(players=4, games=10000, seed=0):
+    """
+    Play the same seeded games with uno_sim.play_game, creating a new game
+    for each and reusing games from a GamePool. Return a dict of the
+    garbage collections of each generation per million games and the mean
+    seconds per game for each.
+    """
+    results = {}
+    for name, pool in (('new', None), ('pooled', GamePool())):
+        gc.collect()
+        before = [stats['collections'] for stats in gc.get_stats()]
+        start = perf_counter()
+        for n in range(games):
+            play_game(players, derive_seed(seed, n), pool=pool)
+        seconds = perf_counter() - start
+        after = [stats['collections'] for stats in gc.get_stats()]
+        results[name] = {
+            'collections': [
+                (b - a) * 1000000 / games for a, b in zip(before, after)
+            ],
+            'seconds': seconds / games,
+        }
+    return results
+
+
+def tracing(players=4, games=10000, seed=0, sample_every=20, block=500):
+    """
+    Play the same seeded games with uno_sim.play_game with and without a
+    Tracer, in alternating blocks of block games so both see the same load.
+    Return a dict of the mean seconds per game for each, the overhead of
+    tracing as a fraction, and the number of spans recorded.
+    """
+    tracer = Tracer(capacity=games * 1000, sample_every=sample_every)
+    seconds = {'plain': 0.0, 'traced': 0.0}
+    pools = {'plain': GamePool(), 'traced': GamePool()}
+    for first in range(0, games, block):
+        for name in seconds:
+            start = perf_counter()
+            for n in range(first, min(first + block, games)):
+                play_game(
+                    players, derive_seed(seed, n), pool=pools[name],
+                    tracer=tracer if name == 'traced' else None
+                )
+            seconds[name] += perf_counter() - start
+    return {
+        'plain': seconds['plain'] / games,
+        'traced': seconds['traced'] / games,
+        'overhead': seconds['traced'] / seconds['plain'] - 1,
+        'spans': len(tracer.events()),
+    }
+
+
+def _hesitant(p):
+    """
+    Return a policy which picks up with probability p instead of playing a
+    random playable card, for a field of policies of known order of skill.
+    """
+    def policy(game):
+        actions = game.legal_actions()
+        if game.rng.random() < p:
+            return actions[-1]
+        return game.rng.choice(actions[:-1] or actions)
+    return policy
+
+
+def league(games=400, every=50, runs=10, reference_games=5000, sizes=(2,),
+           seed=0):
+    """
+    Compare how quickly a League and a RoundRobinLeague settle on the
+    ratings of a field of policies: the shipped ones, and four which pick up
+    instead of playing with probability 0.1, 0.3, 0.5 and 0.7. Each league is
+    run runs times for games games, and every every games its ratings are
+    compared with those from a round robin of reference_games games. Return
+    a dict of the number of games at each comparison, and for each league the
+    mean absolute difference of its ratings' mu from the reference (after
+    taking away the mean mu, as only differences in skill matter).
+    """
+    from uno_league import League, RoundRobinLeague
+    from uno_sim import POLICIES
+
+    hesitant = {
+        'hesitant_{}'.format(n): _hesitant(n / 10) for n in (1, 3, 5, 7)
+    }
+    POLICIES.update(hesitant)
+    try:
+        policies = [p for p in POLICIES if p not in hesitant] + \
+            list(hesitant)
+        reference = RoundRobinLeague(policies, sizes, seed=(seed, 'ref'))
+        reference.run(reference_games)
+        expected = _centred(reference)
+        results = {'games': list(range(every, games + 1, every))}
+        for name, league_class in (('league', League),
+                                   ('round_robin', RoundRobinLeague)):
+            errors = [0.0] * len(results['games'])
+            for run in range(runs):
+                rated = league_class(policies, sizes, seed=(seed, run))
+                for n in range(len(errors)):
+                    rated.run(every)
+                    mu = _centred(rated)
+                    errors[n] += sum(
+                        abs(mu[p] - expected[p]) for p in policies
+                    ) / len(policies) / runs
+            results[name] = errors
+    finally:
+        for name in hesitant:
+            del POLICIES[name]
+    return results
+
+
+def _centred(rated):
+    """
+    Return a dict of each policy's mu less the mean mu in a league.
+    """
+    ratings = rated.ratings
+    mean = sum(rating.mu for rating in ratings.values()) / len(ratings)
+    return {policy: rating.mu - mean for policy, rating in ratings.items()}
@@ -0,0 +1,319 @@
+from uno import UnoGame, COLOR_INDEX, FACE_COLORS
+
+
+# Events, each a tuple starting with one of these codes:
+# (PLAY, seat, index, face): the card at index in the seat's hand is played
+# (DRAW, seat, faces): the seat picks up cards
+# (DRAW_HIDDEN, seat, n): the seat picks up n cards, as seen by others
+# (REVERSE,): the direction of play is reversed
+# (COLOR, color): a color is chosen for the black card just played
+# (TURN, seat): it is now the seat's turn
+# (WIN, seat): the seat has won
+# (HAND, seat, faces): the seat has a new hand, e.g. after swapping hands
+# (HAND_HIDDEN, seat, n): the seat has a new hand of n cards, as seen by
+#     others
+# (RESET, sizes, face, color, reversed, seat, winner): the whole public state
+#     of the game, e.g. for a viewer joining part way through
+# Colors are indexes into ALL_COLORS, with BLACK for a black first card with
+# no color chosen, and faces are indexes into FACES.
+(PLAY, DRAW, DRAW_HIDDEN, REVERSE, COLOR, TURN, WIN, HAND, HAND_HIDDEN,
+ RESET) = range(1, 11)
+NO_WINNER = 255
+
+
+class DeltaUnoGame(UnoGame):
+    """
+    An UnoGame which describes each move as a list of small events, rather
+    than needing the whole game to be looked at again. After every move the
+    events are passed to each function in listeners, e.g.
+    DeltaBroadcaster.publish.
+
+    players: int
+    random: bool (default: True)
+    seed: int/str (default: None)
+    rules: RuleSet (default: STANDARD_RULES)
+    decks: int (default: 1)
+
+    Events are encoded with a byte for each seat and count of cards, so
+    encode raises ValueError for tables of more than 255 players or moves
+    of more than 255 cards.
+
+    >>> game = DeltaUnoGame(5)
+    >>> game.listeners.append(print)
+    """
+    def _init_state(self):
+        self.listeners = []
+        self._events = []
+
+    def snapshot(self, seat=None):
+        """
+        Return a list of events giving the whole state of the game as seen
+        from the seat given (or by a spectator).
+        """
+        players = self.players
+        events = [(
+            RESET, [len(player.hand) for player in players],
+            self.current_card.face, COLOR_INDEX[self.current_card._color],
+            self._player_cycle._reverse, players.index(self.current_player),
+            NO_WINNER if self.winner is None else players.index(self.winner),
+        )]
+        if seat is not None:
+            events.append(
+                (HAND, seat, [card.face for card in players[seat].hand])
+            )
+        return events
+
+    def reset(self, seed=None, random=True):
+        """
+        Start a new game as with UnoGame.reset, and pass the listeners a
+        snapshot of it with every seat's new hand.
+        """
+        super().reset(seed, random)
+        self._events = self.snapshot() + [
+            (HAND, seat, [card.face for card in player.hand])
+            for seat, player in enumerate(self.players)
+        ]
+        self._end_move()
+
+    def play(self, player, card=None, new_color=None, target=None):
+        try:
+            super().play(player, card, new_color, target)
+        finally:
+            self._end_move()
+
+    def apply(self, card=None, new_color=None, target=None):
+        try:
+            super().apply(card, new_color, target)
+        finally:
+            self._end_move()
+
+    def _draw(self, player):
+        current = self.current_player
+        super()._draw(player)
+        if self.current_player is not current:
+            seat = self.players.index(self.current_player)
+            self._events.append((TURN, seat))
+
+    def _play_card(self, player, card, new_color, target=None):
+        current = self.current_player
+        super()._play_card(player, card, new_color, target)
+        players = self.players
+        if self.current_player is not current:
+            self._events.append((TURN, players.index(self.current_player)))
+        if self.winner is not None:
+            self._events.append((WIN, players.index(self.winner)))
+
+    def _discard(self, player, card):
+        self._events.append(
+            (PLAY, self.players.index(player), card, player.hand[card].face)
+        )
+        return super()._discard(player, card)
+
+    def _card_effect(self, player, played_card, new_color, target=None):
+        reverse = self._player_cycle._reverse
+        hands = [p.hand for p in self.players]
+        super()._card_effect(player, played_card, new_color, target)
+        events = self._events
+        if self._player_cycle._reverse != reverse:
+            events.append((REVERSE,))
+        if played_card.temp_color is not None:
+            events.append((COLOR, COLOR_INDEX[played_card.temp_color]))
+        for seat, p in enumerate(self.players):
+            if p.hand is not hands[seat]:
+                events.append((HAND, seat, [card.face for card in p.hand]))
+
+    def _pick_up(self, player, n):
+        start = len(player.hand)
+        super()._pick_up(player, n)
+        self._events.append((
+            DRAW, self.players.index(player),
+            [card.face for card in player.hand[start:]]
+        ))
+
+    def _end_move(self):
+        """
+        Pass the events of the move just made to the listeners.
+        """
+        events, self._events = self._events, []
+        if events:
+            for listener in self.listeners:
+                listener(events)
+
+
+def redact(events, seat=None):
+    """
+    Return the events as seen from the seat given (or by a spectator),
+    without the faces of cards in other seats' hands.
+    """
+    redacted = []
+    for event in events:
+        if event[0] == DRAW and event[1] != seat:
+            event = (DRAW_HIDDEN, event[1], len(event[2]))
+        elif event[0] == HAND and event[1] != seat:
+            event = (HAND_HIDDEN, event[1], len(event[2]))
+        redacted.append(event)
+    return redacted
+
+
+def _private(events, seat):
+    """
+    Return True if any of the events shows a seat's cards to it alone.
+    """
+    return any(
+        event[0] in (DRAW, HAND) and event[1] == seat for event in events
+    )
+
+
+def encode(events):
+    """
+    Return the events as bytes, to be decoded with decode.
+    """
+    data = bytearray()
+    for code, *fields in events:
+        data.append(code)
+        if code in (DRAW, HAND):
+            seat, faces = fields
+            data.append(seat)
+            data.append(len(faces))
+            data.extend(faces)
+        elif code == RESET:
+            sizes, face, color, reverse, seat, winner = fields
+            data.append(len(sizes))
+            data.extend(sizes)
+            data.extend((face, color, reverse, seat, winner))
+        else:
+            data.extend(fields)
+    return bytes(data)
+
+
+_FIELDS = {
+    PLAY: 3, DRAW_HIDDEN: 2, REVERSE: 0, COLOR: 1, TURN: 1, WIN: 1,
+    HAND_HIDDEN: 2,
+}
+
+
+def decode(data):
+    """
+    Return the list of events encoded in data by encode.
+    """
+    events = []
+    i = 0
+    while i < len(data):
+        code = data[i]
+        i += 1
+        if code in (DRAW, HAND):
+            seat, n = data[i], data[i + 1]
+            events.append((code, seat, list(data[i + 2:i + 2 + n])))
+            i += 2 + n
+        elif code == RESET:
+            n = data[i]
+            sizes = list(data[i + 1:i + 1 + n])
+            face, color, reverse, seat, winner = data[i + 1 + n:i + 6 + n]
+            events.append(
+                (code, sizes, face, color, bool(reverse), seat, winner)
+            )
+            i += 6 + n
+        elif code in _FIELDS:
+            n = _FIELDS[code]
+            events.append((code, *data[i:i + n]))
+            i += n
+        else:
+            raise ValueError('Invalid data: unknown event')
+    return events
+
+
+class DeltaBroadcaster:
+    """
+    Sends the moves of a DeltaUnoGame to the players and spectators
+    watching it, as bytes from encode. Each move is encoded once for all the
+    spectators and for every player it shows no hidden cards to, and the
+    same bytes object is sent to each of them.
+
+    game: DeltaUnoGame
+
+    >>> broadcaster = DeltaBroadcaster(game)
+    >>> broadcaster.subscribe(websocket.send, seat=2)
+    """
+    def __init__(self, game):
+        self.game = game
+        self._viewers = {}
+        game.listeners.append(self.publish)
+
+    def subscribe(self, send, seat=None):
+        """
+        Start sending moves to the function send, as seen from the seat given
+        (or None for a spectator). A snapshot of the game is sent first.
+        """
+        send(encode(self.game.snapshot(seat)))
+        self._viewers[send] = seat
+
+    def unsubscribe(self, send):
+        del self._viewers[send]
+
+    def publish(self, events):
+        """
+        Send the events of a move to every viewer.
+        """
+        encoded = {}
+        for send, seat in self._viewers.items():
+            key = seat if _private(events, seat) else None
+            data = encoded.get(key)
+            if data is None:
+                data = encoded[key] = encode(redact(events, key))
+            send(data)
+
+
+class DeltaView:
+    """
+    Keeps the state of a game as seen from a seat (or by a spectator), from
+    the bytes sent by a DeltaBroadcaster.
+
+    seat: int (default: None, for a spectator)
+    """
+    def __init__(self, seat=None):
+        self.seat = seat
+        self.sizes = []
+        self.hand = []
+        self.face = None
+        self.color = None
+        self.reverse = False
+        self.current = None
+        self.winner = None
+
+    def update(self, data):
+        """
+        Apply the events encoded in data.
+        """
+        for event in decode(data):
+            code = event[0]
+            if code == PLAY:
+                _, seat, index, face = event
+                self.sizes[seat] -= 1
+                if seat == self.seat:
+                    del self.hand[index]
+                self.face = face
+                self.color = FACE_COLORS[face]
+            elif code in (DRAW, DRAW_HIDDEN):
+                _, seat, cards = event
+                if code == DRAW:
+                    self.hand.extend(cards)
+                    cards = len(cards)
+                self.sizes[seat] += cards
+            elif code in (HAND, HAND_HIDDEN):
+                _, seat, cards = event
+                if code == HAND:
+                    self.hand = list(cards)
+                    cards = len(cards)
+                self.sizes[seat] = cards
+            elif code == REVERSE:
+                self.reverse = not self.reverse
+            elif code == COLOR:
+                self.color = event[1]
+            elif code == TURN:
+                self.current = event[1]
+            elif code == WIN:
+                self.winner = event[1]
+            elif code == RESET:
+                (_, self.sizes, self.face, self.color, self.reverse,
+                 self.current, winner) = event
+                self.winner = None if winner == NO_WINNER else winner
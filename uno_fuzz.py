@@ -0,0 +1,379 @@
+from multiprocessing import Pool
+from random import Random
+
+from uno import COLORS, FACE_COUNTS, RULE_NAMES, RuleSet, derive_seed
+from uno_sim import QuietUnoGame
+
+
+class InvariantError(AssertionError):
+    """
+    Raised when a game breaks one of the rules checked by InvariantChecker.
+    The name of the invariant is kept in invariant.
+    """
+    def __init__(self, invariant, message):
+        super().__init__('{}: {}'.format(invariant, message))
+        self.invariant = invariant
+
+
+class InvariantChecker:
+    """
+    Checks an UnoGame's state after every move, cheaply enough to leave on in
+    long fuzzing runs. After each move it checks the number of cards, the
+    color of the card played and the new turn and direction, which only
+    depend on the move; every full_every moves it also counts every card.
+
+    The game must keep all of its cards in its deck and hands, as UnoGame
+    does.
+
+    game: UnoGame
+    full_every: int, moves (default: 64)
+
+    >>> checker = InvariantChecker(game)
+    >>> checker.play(0, 3)
+    """
+    def __init__(self, game, full_every=64):
+        self.game = game
+        self.full_every = full_every
+        self.moves = 0
+        self.expected = [count * game.decks for count in FACE_COUNTS]
+        self.total = sum(self.expected)
+        self.check_all()
+
+    def check_all(self):
+        """
+        Count every card in the game, and check no card is in two places and
+        only black cards have a temp_color.
+        """
+        game = self.game
+        counts = [0] * len(FACE_COUNTS)
+        seen = set()
+        for cards in [game.deck] + [player.hand for player in game.players]:
+            for card in cards:
+                counts[card.face] += 1
+                if card.color == 'black':
+                    if id(card) in seen:
+                        raise InvariantError(
+                            'cards', '{} is in two places'.format(card)
+                        )
+                    seen.add(id(card))
+                elif card.temp_color is not None:
+                    raise InvariantError(
+                        'temp_color', '{} has temp_color {}'.format(
+                            card, card.temp_color
+                        )
+                    )
+        if counts != self.expected:
+            raise InvariantError('cards', 'wrong number of some faces')
+
+    def play(self, player, card=None, new_color=None, target=None):
+        """
+        Make a move with game.play and check the game afterwards. If the move
+        is refused, check the ValueError left the game unchanged and raise
+        it. Any other exception from the game is an InvariantError.
+        """
+        game = self.game
+        cycle = game._player_cycle
+        pos, reverse, penalty = cycle.pos, cycle._reverse, game._penalty
+        before = _fingerprint(game)
+        played = None
+        if card is not None and 0 <= player < len(game.players):
+            hand = game.players[player].hand
+            if 0 <= card < len(hand):
+                played = hand[card]
+        try:
+            game.play(player, card, new_color, target)
+        except ValueError:
+            if _fingerprint(game) != before:
+                raise InvariantError('refused move', 'game was changed')
+            raise
+        except Exception as e:
+            raise InvariantError('exception', repr(e)) from e
+        self._check_move(player, played, new_color, pos, reverse, penalty)
+        self.moves += 1
+        if self.moves % self.full_every == 0 or game.winner is not None:
+            self.check_all()
+
+    def _check_move(self, player, played, new_color, pos, reverse, penalty):
+        game = self.game
+        players = game.players
+        cycle = game._player_cycle
+        rules = game.rules
+        held = 0
+        for p in players:
+            held += len(p.hand)
+        if held + len(game.deck) != self.total:
+            raise InvariantError('cards', '{} cards in the game'.format(
+                held + len(game.deck)
+            ))
+        if game.current_player is not players[cycle.pos]:
+            raise InvariantError('turn', 'current player is not at pos')
+        if game._penalty < 0 or (game._penalty and not rules.stacking):
+            raise InvariantError('penalty', 'penalty of {}'.format(
+                game._penalty
+            ))
+        if played is not None:
+            if played is not game.current_card:
+                raise InvariantError('deck', 'card played is not on top')
+            expected = new_color if played.color == 'black' else None
+            if played.temp_color != expected:
+                raise InvariantError(
+                    'temp_color',
+                    '{} has temp_color {}'.format(played, played.temp_color)
+                )
+        if game.winner is not None:
+            if game.winner is not players[player] or game.winner.hand:
+                raise InvariantError('winner', 'winner has cards left')
+            return
+        if any(not p.hand for p in players):
+            raise InvariantError('winner', 'a player has no cards left')
+
+        if played is None:
+            if cycle._reverse != reverse:
+                raise InvariantError('reverse', 'direction changed on a draw')
+            start = pos
+            steps = {1}
+            if rules.draw_until_playable and not penalty:
+                steps.add(0)
+        else:
+            card_type = played.card_type
+            if cycle._reverse != (reverse ^ (card_type == 'reverse')):
+                raise InvariantError('reverse', 'direction after {}'.format(
+                    played
+                ))
+            start = player
+            if card_type == 'skip' or (
+                card_type in ('+2', '+4') and not rules.stacking
+            ):
+                steps = {2}
+            else:
+                steps = {1}
+        delta = -1 if cycle._reverse else 1
+        n = len(players)
+        if cycle.pos not in {(start + delta * s) % n for s in steps}:
+            raise InvariantError('turn', 'player {} after player {}'.format(
+                cycle.pos, start
+            ))
+
+
+def _fingerprint(game):
+    """
+    Return a summary of the game's state which changes with any move.
+    """
+    cycle = game._player_cycle
+    top = game.deck[-1]
+    return (
+        cycle.pos, cycle._reverse, game._penalty, game.winner,
+        len(game.deck), top, top.temp_color,
+        [len(player.hand) for player in game.players],
+    )
+
+
+def _playing(game, moves, max_moves=None):
+    """
+    Return True if the game should carry on: it isn't over, has run for
+    fewer than max_moves moves, and has cards left for any penalty.
+    """
+    return (
+        game.is_active and len(game.deck) > game._penalty + 5 and
+        (max_moves is None or moves < max_moves)
+    )
+
+
+def _random_move(game, rng):
+    """
+    Return a random move for the game as (player, card, new_color, target):
+    usually a legal move for the current player, sometimes a jump in, and
+    sometimes a move which should be refused.
+    """
+    players = game.players
+    current = players.index(game.current_player)
+    roll = rng.random()
+    if roll < 0.1:
+        player = rng.randrange(len(players))
+        hand = players[player].hand
+        card = None
+        if hand and rng.random() < 0.9:
+            card = rng.randrange(len(hand))
+        new_color = rng.choice(COLORS + [None, 'black'])
+        target = rng.choice([None, current, rng.randrange(len(players))])
+        return (player, card, new_color, target)
+    if roll < 0.15 and game.rules.jump_in:
+        top = game.current_card
+        for player, p in enumerate(players):
+            for card, c in enumerate(p.hand):
+                if c == top and player != current:
+                    return (player, card, rng.choice(COLORS), None)
+    card, new_color, *target = rng.choice(game.legal_actions())
+    return (current, card, new_color, target[0] if target else None)
+
+
+def run_case(case, game_class=QuietUnoGame, full_every=64):
+    """
+    Replay a case from fuzz, checking the game after every move. Raise
+    InvariantError if it breaks an invariant; moves which are refused are
+    skipped.
+
+    case: dict of players, rules (dict of RuleSet arguments), seed and moves
+    """
+    game = game_class(
+        case['players'], seed=case['seed'], rules=RuleSet(**case['rules'])
+    )
+    checker = InvariantChecker(game, full_every)
+    for move in case['moves']:
+        if not _playing(game, checker.moves):
+            break
+        try:
+            checker.play(*move)
+        except ValueError:
+            pass
+
+
+def _fails(case, error, game_class):
+    """
+    Return True if replaying the case raises the InvariantError with the
+    message error.
+    """
+    try:
+        run_case(case, game_class, full_every=1)
+    except InvariantError as e:
+        return str(e) == error
+    except Exception:
+        return False
+    return False
+
+
+def _random_case(players, rules, seed, rng, game_class=QuietUnoGame,
+                 max_moves=2000, full_every=64):
+    """
+    Play a game with random moves from rng, and return the case for it and
+    the InvariantError it raised (or None).
+    """
+    case = {'players': players, 'rules': rules, 'seed': seed, 'moves': []}
+    game = game_class(players, seed=seed, rules=RuleSet(**rules))
+    try:
+        checker = InvariantChecker(game, full_every)
+        while _playing(game, len(case['moves']), max_moves):
+            move = _random_move(game, rng)
+            case['moves'].append(move)
+            try:
+                checker.play(*move)
+            except ValueError:
+                pass
+    except InvariantError as e:
+        return case, e
+    return case, None
+
+
+def fuzz(games, seed=0, game_class=QuietUnoGame, max_moves=2000,
+         full_every=64, shrink_failures=True, processes=1, chunk_size=1000):
+    """
+    Play random games through InvariantChecker, with random numbers of
+    players and house rules. Return None if every game passes, or the case
+    (a dict for run_case, with the error added) of the first game which
+    breaks an invariant, shrunk with shrink if shrink_failures is True.
+    Game n is played from derive_seed(seed, n), so the same games are played
+    however they are split between a pool of processes, if processes is more
+    than 1, in chunks of chunk_size games.
+
+    games: int, or range of game numbers
+    seed: int/str (default: 0)
+    game_class: UnoGame subclass (default: QuietUnoGame)
+    max_moves: int (default: 2000)
+    full_every: int, moves between full checks (default: 64)
+    shrink_failures: bool (default: True)
+    processes: int (default: 1)
+    chunk_size: int (default: 1000)
+
+    >>> fuzz(100000, processes=8) is None
+    True
+    """
+    if isinstance(games, int):
+        games = range(games)
+    if processes > 1 and len(games) > chunk_size:
+        chunks = [
+            (games[i:i + chunk_size], seed, game_class, max_moves,
+             full_every, shrink_failures)
+            for i in range(0, len(games), chunk_size)
+        ]
+        with Pool(processes) as pool:
+            for case in pool.imap(_fuzz_chunk, chunks):
+                if case is not None:
+                    pool.terminate()
+                    return case
+        return None
+    for n in games:
+        game_seed = derive_seed(seed, n)
+        rng = Random(game_seed)
+        players = rng.randint(2, 15)
+        rules = {name: rng.random() < 0.5 for name in RULE_NAMES}
+        case, error = _random_case(
+            players, rules, game_seed, rng, game_class, max_moves, full_every
+        )
+        if error is not None:
+            if shrink_failures:
+                case = shrink(case, str(error), game_class)
+            case['error'] = str(error)
+            return case
+    return None
+
+
+def _fuzz_chunk(args):
+    return fuzz(*args)
+
+
+def shrink(case, error, game_class=QuietUnoGame, players=True, rules=True):
+    """
+    Return a smaller version of a failing case which still raises the same
+    error: an InvariantError with the message error, e.g. str(e) for the
+    error raised by run_case. The case's own moves are delta debugged,
+    removing runs of moves and then single moves for as long as the error is
+    still raised. If players is True, fewer players are also tried, and if
+    rules is True, each house rule is turned off in turn, keeping any change
+    which still raises the error; this is repeated until nothing more can be
+    taken away.
+
+    >>> case = fuzz(1000, shrink_failures=False)
+    >>> shrink(case, case['error'])['moves']
+    """
+    if not _fails(case, error, game_class):
+        raise ValueError('Invalid case: does not raise {}'.format(error))
+    case = dict(case, moves=list(case['moves']))
+    case.pop('error', None)
+    while True:
+        before = (case['players'], case['rules'], len(case['moves']))
+        case['moves'] = _shrink_moves(case, error, game_class)
+        if players:
+            for n in range(2, case['players']):
+                candidate = dict(case, players=n)
+                if _fails(candidate, error, game_class):
+                    case = candidate
+                    break
+        if rules:
+            for name, enabled in case['rules'].items():
+                if enabled:
+                    candidate = dict(
+                        case, rules=dict(case['rules'], **{name: False})
+                    )
+                    if _fails(candidate, error, game_class):
+                        case = candidate
+        if (case['players'], case['rules'], len(case['moves'])) == before:
+            return case
+
+
+def _shrink_moves(case, error, game_class):
+    """
+    Return the case's moves with as many removed as possible while it still
+    raises the error, by removing runs of moves of halving sizes.
+    """
+    moves = case['moves']
+    size = len(moves) // 2
+    while size >= 1:
+        start = 0
+        while start < len(moves):
+            candidate = moves[:start] + moves[start + size:]
+            if _fails(dict(case, moves=candidate), error, game_class):
+                moves = candidate
+            else:
+                start += size
+        size //= 2
+    return moves
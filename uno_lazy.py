@@ -0,0 +1,137 @@
+from uno import UnoGame, UnoCard, FACES, FACE_COUNTS, _FACE_CARDS
+
+
+class LazyDeckUnoGame(UnoGame):
+    """
+    An UnoGame which doesn't shuffle the deck up front. The draw pile is kept
+    as a count of the cards of each face left in it, and each card picked up
+    is chosen at random from those with the game's rng, which is the same as
+    drawing from a shuffled pile. The deck only holds the cards which have
+    been played, with the current card on top.
+
+    When the draw pile runs out, the played cards apart from the current card
+    go back into it, which is the same as shuffling them back in.
+
+    players: int
+    seed: int/str (default: None)
+    rules: RuleSet (default: STANDARD_RULES)
+    decks: int (default: 1)
+
+    >>> game = LazyDeckUnoGame(5, seed=1)
+    >>> game.pile_size
+    72
+    """
+    def __init__(self, players, seed=None, rules=None, decks=1):
+        super().__init__(players, True, seed, rules, decks)
+        self.deck.append(self._sample())
+
+    def _create_deck(self, random):
+        """
+        Fill the draw pile with the complete set of Uno Cards for each of the
+        game's decks, and return an empty list for the cards played.
+        """
+        self.set_pile([count * self.decks for count in FACE_COUNTS])
+        return []
+
+    def _redeal(self, random):
+        """
+        Fill the draw pile again and deal new hands from it into the players'
+        hand lists.
+        """
+        self.set_pile([count * self.decks for count in FACE_COUNTS])
+        self.deck.clear()
+        for player in self.players:
+            player.hand[:] = self._deal_hand()
+        self.deck.append(self._sample())
+
+    def set_pile(self, counts):
+        """
+        Replace the draw pile with the number of cards of each face given, e.g.
+        to try out different guesses at the cards which haven't been seen.
+        """
+        self.pile = list(counts)
+        self.pile_size = sum(self.pile)
+
+    def _sample(self):
+        """
+        Remove a random card from the draw pile and return it.
+        """
+        pick = self.rng.randrange(self.pile_size)
+        for face, count in enumerate(self.pile):
+            if pick < count:
+                break
+            pick -= count
+        self.pile[face] -= 1
+        self.pile_size -= 1
+        card = _FACE_CARDS.get(face)
+        if card is None:
+            card = UnoCard(*FACES[face])
+        return card
+
+    def _deal_hand(self):
+        """
+        Return a list of 7 cards drawn from the draw pile.
+        """
+        return [self._sample() for i in range(7)]
+
+    def _reshuffle(self):
+        """
+        Put the cards played, apart from the current card, back into the draw
+        pile.
+        """
+        for card in self.deck[:-1]:
+            self.pile[card.face] += 1
+        self.pile_size += len(self.deck) - 1
+        del self.deck[:-1]
+
+    def _can_draw(self):
+        return self.pile_size > 0 or len(self.deck) > 1
+
+    def _cards_left(self):
+        return self.pile_size + len(self.deck) - 1
+
+    def _pick_up(self, player, n):
+        """
+        Draw n cards from the draw pile and add them to the player's hand,
+        putting the cards played back into the draw pile if it runs out.
+
+        player: UnoPlayer
+        n: int
+        """
+        for i in range(n):
+            if not self.pile_size:
+                self._reshuffle()
+                if not self.pile_size:
+                    return
+            player.hand.append(self._sample())
+
+    def to_bytes(self):
+        """
+        Return the game's state as with UnoGame.to_bytes, with the draw pile
+        written out as cards under the cards played.
+        """
+        deck = self.deck
+        pile = []
+        for face, count in enumerate(self.pile):
+            card = _FACE_CARDS.get(face)
+            for i in range(count):
+                pile.append(card or UnoCard(*FACES[face]))
+        self.deck = pile + deck
+        try:
+            return super().to_bytes()
+        finally:
+            self.deck = deck
+
+    @classmethod
+    def from_bytes(cls, data, seed=None):
+        """
+        Return a game restored as with UnoGame.from_bytes, with every card
+        under the current card in the draw pile.
+        """
+        game = super().from_bytes(data, seed)
+        counts = [0] * len(FACES)
+        for card in game.deck[:-1]:
+            counts[card.face] += 1
+        game.set_pile(counts)
+        del game.deck[:-1]
+        return game
@@ -0,0 +1,284 @@
+from itertools import combinations, combinations_with_replacement
+from math import erf, exp, pi, sqrt
+from multiprocessing import Pool
+from queue import Queue
+from random import Random
+
+from uno import derive_seed, PLAYERS_PER_DECK
+from uno_sim import play_game, GamePool, POLICIES
+
+
+MU = 25.0
+SIGMA = MU / 3
+# Spread of performance in a single game, and the uncertainty added to each
+# rating before every game so ratings can follow a policy which changes
+BETA = SIGMA / 2
+TAU = SIGMA / 100
+# Games are reused between the matches played by each process
+_GAMES = GamePool()
+
+
+class Rating:
+    """
+    A policy's skill, as a normal distribution with mean mu and standard
+    deviation sigma, as in TrueSkill.
+
+    mu: float (default: 25)
+    sigma: float (default: 25 / 3)
+
+    >>> Rating().conservative
+    0.0
+    """
+    def __init__(self, mu=MU, sigma=SIGMA):
+        self.mu = mu
+        self.sigma = sigma
+
+    def __repr__(self):
+        return '<Rating object: {:.2f} +/- {:.2f}>'.format(self.mu, self.sigma)
+
+    @property
+    def conservative(self):
+        """
+        A skill the policy is very likely to have at least, mu - 3 sigma.
+        """
+        return self.mu - 3 * self.sigma
+
+
+def _pdf(x):
+    return exp(-x * x / 2) / sqrt(2 * pi)
+
+
+def _cdf(x):
+    return (1 + erf(x / sqrt(2))) / 2
+
+
+def update(winner, losers, beta=BETA, tau=TAU):
+    """
+    Update the ratings after a game, in place. The winner is treated as
+    having beaten each loser, with the two player TrueSkill update for each
+    pair worked out from the ratings before the game; the winner's share of
+    each is divided by the number of losers, so a win at a big table isn't
+    worth more than one head to head.
+
+    winner: Rating
+    losers: list of Ratings
+    """
+    for rating in [winner] + losers:
+        rating.sigma = sqrt(rating.sigma ** 2 + tau ** 2)
+    w_mu, w_var = winner.mu, winner.sigma ** 2
+    mu_delta = 0.0
+    var_factor = 0.0
+    for loser in losers:
+        l_var = loser.sigma ** 2
+        c2 = 2 * beta ** 2 + w_var + l_var
+        c = sqrt(c2)
+        t = (w_mu - loser.mu) / c
+        # Guard against the tail of the normal running out of precision
+        v = _pdf(t) / max(_cdf(t), 1e-300)
+        w = v * (v + t)
+        mu_delta += w_var / c * v
+        var_factor += 1 - w_var / c2 * w
+        loser.mu -= l_var / c * v
+        loser.sigma = sqrt(l_var * max(1 - l_var / c2 * w, 1e-6))
+    winner.mu += mu_delta / len(losers)
+    winner.sigma = sqrt(w_var * max(var_factor / len(losers), 1e-6))
+
+
+def play_match(match):
+    """
+    Play a match and return it with the winning seat added (None if the
+    game was abandoned). Matches are dicts of the policy name in each seat,
+    the rules and the seed, as made by League.schedule.
+    """
+    result = play_game(
+        len(match['seats']), match['seed'], match['rules'], match['seats'],
+        pool=_GAMES
+    )
+    return dict(match, winner=result['winner'])
+
+
+class League:
+    """
+    Rates policies from uno_sim.POLICIES against each other by playing
+    matches between them, updating the ratings as each result comes in.
+
+    Rather than playing every pairing equally, as in a round robin, each
+    match is built around a policy chosen in proportion to its uncertainty
+    (sigma), against opponents close to it in skill, so games are spent where
+    they tell us the most. Seat order is shuffled for every match, and the
+    number of players is taken from sizes in turn.
+
+    Tables can be bigger than the number of policies, in which case a policy
+    takes more than one seat. A win then counts as the winning policy
+    beating each of the other policies at the table once; its other seats
+    don't count as losses.
+
+    policies: list of policy names, at least 2
+    sizes: list of numbers of players, up to 15 (default: [2])
+    rules: dict of RuleSet arguments (default: None, for standard rules)
+    seed: int/str, master seed (default: 0)
+
+    >>> league = League(['random', 'first'], sizes=[2, 4])
+    >>> league.run(1000, processes=8)
+    >>> league.standings()
+    """
+    def __init__(self, policies, sizes=(2,), rules=None, seed=0):
+        self.policies = list(policies)
+        if len(set(self.policies)) != len(self.policies):
+            raise ValueError('Invalid policies: names must be unique')
+        for policy in self.policies:
+            if policy not in POLICIES:
+                raise ValueError('Invalid policy: {}'.format(policy))
+        if len(self.policies) < 2:
+            raise ValueError('Invalid policies: must be at least 2')
+        self.sizes = list(sizes)
+        if not all(2 <= size <= PLAYERS_PER_DECK for size in self.sizes):
+            raise ValueError(
+                'Invalid sizes: must be between 2 and {}'.format(
+                    PLAYERS_PER_DECK
+                )
+            )
+        self.rules = rules
+        self.seed = seed
+        self.ratings = {policy: Rating() for policy in self.policies}
+        self.games = dict.fromkeys(self.policies, 0)
+        self.scheduled = 0
+        self.played = 0
+        self._rng = Random(derive_seed(seed, 'schedule'))
+
+    def schedule(self):
+        """
+        Return the next match to play, chosen from the current ratings.
+        """
+        rng = self._rng
+        ratings = self.ratings
+        size = self.sizes[self.scheduled % len(self.sizes)]
+        focus = rng.choices(
+            self.policies, [ratings[p].sigma for p in self.policies]
+        )[0]
+        seats = [focus]
+        # Prefer opponents who are uncertain and close to the focus, i.e.
+        # whose results against it are hardest to predict
+        f = ratings[focus]
+        opponents = {}
+        for p in self.policies:
+            if p != focus:
+                r = ratings[p]
+                spread = 2 * BETA ** 2 + f.sigma ** 2 + r.sigma ** 2
+                opponents[p] = (
+                    r.sigma * exp(-(r.mu - f.mu) ** 2 / (2 * spread))
+                )
+        others = list(opponents)
+        while len(seats) < size:
+            # Once every policy has a seat, opponents take more seats
+            if not others:
+                others = list(opponents)
+            opponent = rng.choices(
+                others, [opponents[p] for p in others]
+            )[0]
+            others.remove(opponent)
+            seats.append(opponent)
+        rng.shuffle(seats)
+        return self._match(seats)
+
+    def _match(self, seats):
+        """
+        Return the next match, with the seats given.
+        """
+        match = {
+            'seats': seats,
+            'rules': self.rules,
+            'seed': derive_seed(self.seed, self.scheduled),
+        }
+        self.scheduled += 1
+        return match
+
+    def record(self, result):
+        """
+        Update the ratings with the result of a match from play_match.
+        """
+        self.played += 1
+        policies = list(dict.fromkeys(result['seats']))
+        for policy in policies:
+            self.games[policy] += 1
+        if result['winner'] is None:
+            return
+        winner = result['seats'][result['winner']]
+        update(self.ratings[winner], [
+            self.ratings[policy] for policy in policies if policy != winner
+        ])
+
+    def run(self, games, processes=1, in_flight=None):
+        """
+        Play games more matches, using a pool of processes if processes is
+        more than 1. Each match is scheduled from the ratings as they are when
+        a worker becomes free, with in_flight matches (default: 4 per process)
+        being played at once.
+        """
+        if processes <= 1:
+            for n in range(games):
+                self.record(play_match(self.schedule()))
+            return
+        if in_flight is None:
+            in_flight = 4 * processes
+        results = Queue()
+        with Pool(processes) as pool:
+            submitted = pending = 0
+            while submitted < games or pending:
+                while pending < in_flight and submitted < games:
+                    pool.apply_async(
+                        play_match, (self.schedule(),),
+                        callback=results.put, error_callback=results.put
+                    )
+                    submitted += 1
+                    pending += 1
+                result = results.get()
+                pending -= 1
+                if isinstance(result, BaseException):
+                    raise result
+                self.record(result)
+
+    def standings(self):
+        """
+        Return a list of (policy, Rating) tuples, best first by the
+        conservative rating.
+        """
+        return sorted(
+            self.ratings.items(), key=lambda item: -item[1].conservative
+        )
+
+
+class RoundRobinLeague(League):
+    """
+    A League which plays every table of policies in turn, as in a round
+    robin, instead of choosing matches from the ratings, for comparison
+    with League. Tables bigger than the number of policies give every policy
+    a seat and share out the rest in every possible way.
+
+    >>> league = RoundRobinLeague(['random', 'first'])
+    >>> league.run(1000)
+    """
+    def __init__(self, policies, sizes=(2,), rules=None, seed=0):
+        super().__init__(policies, sizes, rules, seed)
+        self._tables = {}
+        for size in self.sizes:
+            if size <= len(self.policies):
+                tables = combinations(self.policies, size)
+            else:
+                tables = (
+                    table for table in combinations_with_replacement(
+                        self.policies, size
+                    )
+                    if len(set(table)) == len(self.policies)
+                )
+            self._tables[size] = list(tables)
+
+    def schedule(self):
+        """
+        Return the next match to play, the next table in turn for its size.
+        """
+        rounds, n = divmod(self.scheduled, len(self.sizes))
+        tables = self._tables[self.sizes[n]]
+        seats = list(tables[rounds % len(tables)])
+        self._rng.shuffle(seats)
+        return self._match(seats)
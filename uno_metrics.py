@@ -0,0 +1,162 @@
+from time import perf_counter
+
+from uno import UnoGame
+
+
+PHASES = ['validation', 'playability', 'pile', 'turn']
+COUNTERS = [
+    'moves', 'draws', 'skips', 'reverses', 'draw_twos', 'draw_fours',
+    'wild_selections',
+]
+
+
+class GameMetrics:
+    """
+    Collects per-phase timings and event counters from one or more
+    InstrumentedUnoGame instances.
+
+    >>> metrics = GameMetrics()
+    >>> game = InstrumentedUnoGame(5, metrics=metrics)
+    >>> metrics.snapshot()['counters']['draws']
+    0
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Set all timings and counters back to zero.
+        """
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.phase_calls = dict.fromkeys(PHASES, 0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def snapshot(self):
+        """
+        Return a dict copy of the current timings and counters.
+        """
+        return {
+            'phase_seconds': dict(self.phase_seconds),
+            'phase_calls': dict(self.phase_calls),
+            'counters': dict(self.counters),
+        }
+
+    def to_prometheus(self, prefix='uno'):
+        """
+        Return the current timings and counters in the Prometheus text
+        exposition format.
+        """
+        lines = [
+            '# TYPE {}_phase_seconds_total counter'.format(prefix),
+        ]
+        for phase in PHASES:
+            lines.append('{}_phase_seconds_total{{phase="{}"}} {!r}'.format(
+                prefix, phase, self.phase_seconds[phase]
+            ))
+        lines.append('# TYPE {}_phase_calls_total counter'.format(prefix))
+        for phase in PHASES:
+            lines.append('{}_phase_calls_total{{phase="{}"}} {}'.format(
+                prefix, phase, self.phase_calls[phase]
+            ))
+        for name in COUNTERS:
+            lines.append('# TYPE {}_{}_total counter'.format(prefix, name))
+            lines.append('{}_{}_total {}'.format(
+                prefix, name, self.counters[name]
+            ))
+        return '\n'.join(lines) + '\n'
+
+
+class InstrumentedUnoGame(UnoGame):
+    """
+    An UnoGame which records timings and counters into a GameMetrics object.
+    The plain UnoGame is left untouched, so games which are not instrumented
+    pay nothing for it.
+
+    players: int
+    random: bool (default: True)
+    seed: int/str (default: None)
+    rules: RuleSet (default: STANDARD_RULES)
+    decks: int (default: 1)
+    metrics: GameMetrics (default: a new GameMetrics)
+
+    >>> game = InstrumentedUnoGame(5)
+    >>> game.metrics.to_prometheus()
+    """
+    def __init__(
+        self, players, random=True, seed=None, rules=None, decks=1,
+        metrics=None
+    ):
+        self.metrics = metrics
+        super().__init__(players, random, seed, rules, decks)
+
+    def _init_state(self):
+        # Games restored by from_bytes get metrics of their own
+        if getattr(self, 'metrics', None) is None:
+            self.metrics = GameMetrics()
+
+    def _time(self, phase, start):
+        self.metrics.phase_seconds[phase] += perf_counter() - start
+        self.metrics.phase_calls[phase] += 1
+
+    def __next__(self):
+        start = perf_counter()
+        super().__next__()
+        self._time('turn', start)
+
+    # Moves are counted where play and apply both make them
+    def _draw(self, player):
+        super()._draw(player)
+        self.metrics.counters['moves'] += 1
+
+    def _play_card(self, player, card, new_color, target=None):
+        super()._play_card(player, card, new_color, target)
+        self.metrics.counters['moves'] += 1
+
+    def _check_player(self, player, card=None):
+        start = perf_counter()
+        try:
+            return super()._check_player(player, card)
+        finally:
+            self._time('validation', start)
+
+    def _check_playable(self, card):
+        start = perf_counter()
+        try:
+            super()._check_playable(card)
+        finally:
+            self._time('playability', start)
+
+    def _check_card(self, player, card, new_color, target=None):
+        start = perf_counter()
+        try:
+            super()._check_card(player, card, new_color, target)
+        finally:
+            self._time('validation', start)
+
+    def _discard(self, player, card):
+        start = perf_counter()
+        played_card = super()._discard(player, card)
+        self._time('pile', start)
+        return played_card
+
+    def _pick_up(self, player, n):
+        start = perf_counter()
+        super()._pick_up(player, n)
+        self._time('pile', start)
+        self.metrics.counters['draws'] += n
+
+    def _card_effect(self, player, played_card, new_color, target=None):
+        super()._card_effect(player, played_card, new_color, target)
+        counter = _EFFECT_COUNTERS.get(played_card.card_type)
+        if counter is not None:
+            self.metrics.counters[counter] += 1
+        if played_card.color == 'black':
+            self.metrics.counters['wild_selections'] += 1
+
+
+_EFFECT_COUNTERS = {
+    'skip': 'skips',
+    'reverse': 'reverses',
+    '+2': 'draw_twos',
+    '+4': 'draw_fours',
+}
@@ -0,0 +1,146 @@
+from array import array
+
+from uno import (
+    BLACK, BLACK_CARD_TYPES, COLORS, COLOR_INDEX, FACES, FACE_COLORS,
+    FACE_COUNTS, FACE_TYPES, TYPES, TYPE_INDEX
+)
+
+
+DECK_SIZE = sum(FACE_COUNTS)
+MAX_HAND = 30
+
+# The distinct colored card types, which come first in TYPES, so a colored
+# face's FACE_TYPES entry indexes into them
+COLOR_TYPES = TYPES[:TYPE_INDEX['wildcard']]
+_FACE_GRID = {
+    (color, card_type): face
+    for face, (color, card_type) in enumerate(FACES)
+    if color != 'black'
+}
+
+
+def miss_probability(total, playable, hand_size):
+    """
+    Return the probability that a hand of hand_size cards dealt from a pool
+    of total cards, playable of which are playable, holds no playable card.
+
+    The probabilities are looked up in a table built the first time each pool
+    size is used, for hands of up to MAX_HAND cards from pools of up to one
+    deck; larger hands and pools, from games with several decks, are worked
+    out each time.
+    """
+    if hand_size > MAX_HAND or total > DECK_SIZE:
+        return _miss(total, playable, hand_size)
+    row = _MISS_TABLES[total]
+    if row is None:
+        row = _MISS_TABLES[total] = _build_row(total)
+    return row[playable * (MAX_HAND + 1) + hand_size]
+
+
+def _miss(total, playable, hand_size):
+    """
+    Return the hypergeometric probability of no playable cards, as the product
+    of the chances of each card in turn not being playable.
+    """
+    p = 1.0
+    for i in range(hand_size):
+        if total - i <= 0:
+            break
+        p *= (total - playable - i) / (total - i)
+        if p <= 0:
+            return 0.0
+    return p
+
+
+def _build_row(total):
+    """
+    Return an array of the miss probabilities for a pool of total cards, for
+    every number of playable cards and every hand size up to MAX_HAND.
+    """
+    row = array('d')
+    for playable in range(total + 1):
+        p = 1.0
+        row.append(p)
+        for i in range(MAX_HAND):
+            if total - i > 0 and p > 0:
+                p *= max(total - playable - i, 0) / (total - i)
+            row.append(p)
+    return row
+
+
+_MISS_TABLES = [None] * (DECK_SIZE + 1)
+
+
+class ResponseOdds:
+    """
+    Keeps counts of the cards a player hasn't seen, and gives the probability
+    that a hidden hand dealt from them can respond to the current card.
+
+    The counts are grouped by color, by card type and in total as cards are
+    seen, so each update and each probability takes constant time.
+
+    unseen: list of counts for each face in FACES, e.g. CardTracker.unseen
+        (default: the whole of decks decks)
+    decks: int (default: 1)
+
+    >>> odds = ResponseOdds()
+    >>> odds.see(UnoCard('red', 5))
+    >>> odds.can_respond(7, UnoCard('red', 3))
+    """
+    def __init__(self, unseen=None, decks=1):
+        if unseen is None:
+            unseen = [count * decks for count in FACE_COUNTS]
+        self.unseen = list(unseen)
+        self.total = 0
+        self.black = 0
+        self.colors = [0] * len(COLORS)
+        self.types = [0] * len(COLOR_TYPES)
+        for face, count in enumerate(self.unseen):
+            self._update(face, count)
+
+    def _update(self, face, n):
+        self.total += n
+        color = FACE_COLORS[face]
+        if color == BLACK:
+            self.black += n
+        else:
+            self.colors[color] += n
+            self.types[FACE_TYPES[face]] += n
+
+    def see(self, card):
+        """
+        Remove a card which has become visible from the unseen cards.
+        """
+        self.unseen[card.face] -= 1
+        self._update(card.face, -1)
+
+    def unsee(self, card):
+        """
+        Return a card to the unseen cards, undoing see.
+        """
+        self.unseen[card.face] += 1
+        self._update(card.face, 1)
+
+    def playable(self, color, card_type):
+        """
+        Return the number of unseen cards which can be played on a card of the
+        effective color and card type given.
+        """
+        if card_type in BLACK_CARD_TYPES:
+            if color == 'black':
+                return self.black
+            return self.colors[COLOR_INDEX[color]] + self.black
+        c = COLOR_INDEX[color]
+        t = TYPE_INDEX[card_type]
+        return (
+            self.colors[c] + self.types[t] + self.black -
+            self.unseen[_FACE_GRID[(color, card_type)]]
+        )
+
+    def can_respond(self, hand_size, current_card):
+        """
+        Return the probability that a hand of hand_size cards dealt from the
+        unseen cards holds a card playable on the current card.
+        """
+        playable = self.playable(current_card._color, current_card.card_type)
+        return 1 - miss_probability(self.total, playable, hand_size)
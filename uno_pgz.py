@@ -3,6 +3,8 @@ from itertools import product, repeat, chain
 from threading import Thread
 from time import sleep
 
+from uno_atlas import CardAtlas
+
 
 COLORS = ['red', 'yellow', 'green', 'blue']
 ALL_COLORS = COLORS + ['black']
@@ -12,6 +14,37 @@ COLOR_CARD_TYPES = NUMBERS + SPECIAL_CARD_TYPES * 2
 BLACK_CARD_TYPES = ['wildcard', '+4']
 CARD_TYPES = NUMBERS + SPECIAL_CARD_TYPES + BLACK_CARD_TYPES
 
+# Every image is decoded once, from the atlas made by uno_atlas.py
+atlas = CardAtlas.load('images')
+
+
+class Sprite:
+    """
+    An image from the atlas drawn centred on pos, like a pgzero Actor, but
+    sharing the atlas's pixels instead of loading its own image.
+
+    surface: pygame Surface
+
+    >>> sprite = Sprite(atlas.surface('back'))
+    >>> sprite.pos = (130, 70)
+    >>> sprite.draw()
+    """
+    def __init__(self, surface):
+        self.surface = surface
+        self.pos = (0, 0)
+
+    @property
+    def _rect(self):
+        rect = self.surface.get_rect()
+        rect.center = self.pos
+        return rect
+
+    def draw(self):
+        screen.blit(self.surface, self._rect.topleft)
+
+    def collidepoint(self, pos):
+        return self._rect.collidepoint(pos)
+
 
 class UnoCard:
     """
@@ -27,7 +60,7 @@ class UnoCard:
         self.color = color
         self.card_type = card_type
         self.temp_color = None
-        self.sprite = Actor('{}_{}'.format(color, card_type))
+        self.sprite = Sprite(atlas.surface('{}_{}'.format(color, card_type)))
 
     def __repr__(self):
         return '<UnoCard object: {} {}>'.format(self.color, self.card_type)
@@ -439,8 +472,9 @@ game = AIUnoGame(num_players)
 WIDTH = 1200
 HEIGHT = 800
 
-deck_img = Actor('back')
-color_imgs = {color: Actor(color) for color in COLORS}
+deck_img = Sprite(atlas.surface('back'))
+back_img = Sprite(atlas.surface('back'))
+color_imgs = {color: Sprite(atlas.surface(color)) for color in COLORS}
 
 def game_loop():
     while game.game.is_active:
@@ -474,7 +508,7 @@ def draw_players_hands():
             if player == game.player:
                 sprite = card.sprite
             else:
-                sprite = Actor('back')
+                sprite = back_img
             sprite.pos = (130+c*80, 330+p*130)
             sprite.draw()
 
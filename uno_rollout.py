@@ -0,0 +1,194 @@
+from collections import deque
+from random import Random
+from time import perf_counter
+
+from uno import (
+    BLACK, COLOR_INDEX, FACES, FACE_COLORS, FACE_TYPES, FIRST_BLACK,
+    RULE_NAMES, TYPES, TYPE_INDEX
+)
+
+
+# Card types and colors are indexes into uno.TYPES and uno.ALL_COLORS
+SKIP, REVERSE, DRAW_TWO, WILDCARD, WILD_DRAW_FOUR = range(10, 15)
+# Bitmask of the faces playable on each effective color and card type,
+# indexed by color * len(TYPES) + card type
+_PLAYABLE = [
+    sum(
+        1 << face
+        for face, (face_color, face_type) in enumerate(
+            zip(FACE_COLORS, FACE_TYPES)
+        )
+        if face_color == color or face_type == top or face_color == BLACK
+    )
+    for color in range(BLACK + 1)
+    for top in range(len(TYPES))
+]
+_COLOR_FACES = [
+    [face for face, face_color in enumerate(FACE_COLORS) if face_color == c]
+    for c in range(BLACK)
+]
+
+
+def export_state(game):
+    """
+    Return the state of an active standard rules UnoGame as plain ints and
+    lists, to be played out with rollout: (hands, deck, player, delta, color,
+    top), where hands is a list of counts of each face in FACES for each
+    player, deck is a list of the faces in the deck from the bottom up,
+    player is the current player's index, delta is 1 or -1 for the direction
+    of play, and color and top are the current card's effective color and
+    card type as indexes into ALL_COLORS and TYPES.
+    """
+    if any(getattr(game.rules, name) for name in RULE_NAMES):
+        raise ValueError('Invalid game: must use the standard rules')
+    if not game.is_active:
+        raise ValueError('Game is over')
+    hands = []
+    for player in game.players:
+        hand = [0] * len(FACES)
+        for card in player.hand:
+            hand[card.face] += 1
+        hands.append(hand)
+    current_card = game.current_card
+    color = current_card._color
+    return (
+        hands,
+        [card.face for card in game.deck],
+        game.players.index(game.current_player),
+        game._player_cycle._delta,
+        COLOR_INDEX[color],
+        TYPE_INDEX[current_card.card_type],
+    )
+
+
+def first_policy(hand, playable, rng):
+    """
+    Play the lowest playable face, choosing the color held most for black
+    cards. Return a (face, new_color) tuple.
+    """
+    face = (playable & -playable).bit_length() - 1
+    if face < FIRST_BLACK:
+        return face, None
+    counts = [sum(hand[f] for f in faces) for faces in _COLOR_FACES]
+    return face, counts.index(max(counts))
+
+
+def random_policy(hand, playable, rng):
+    """
+    Play a random playable face with a random new color for black cards.
+    Return a (face, new_color) tuple.
+    """
+    faces = []
+    while playable:
+        low = playable & -playable
+        faces.append(low.bit_length() - 1)
+        playable ^= low
+    face = faces[rng.randrange(len(faces))] if len(faces) > 1 else faces[0]
+    if face < FIRST_BLACK:
+        return face, None
+    return face, rng.randrange(BLACK)
+
+
+POLICIES = {
+    'first': first_policy,
+    'random': random_policy,
+}
+
+
+def rollout(state, policy='random', rng=None, max_steps=10000):
+    """
+    Play out a state from export_state to the end, following the same rules
+    as UnoGame, and return (winner, steps): the index of the winning player
+    (or None if the game is abandoned) and the number of moves made.
+
+    Players pick up only when they have no playable card, and otherwise play
+    the card chosen by the policy, a function (hand, playable, rng) returning
+    (face, new_color), where playable is a bitmask of the playable faces in
+    hand. The game is abandoned after max_steps moves, or if a player has to
+    pick up more cards than are left under the current card.
+
+    state: tuple from export_state (not changed)
+    policy: name from POLICIES or function (default: 'random')
+    rng: random.Random (default: a new unseeded Random)
+    max_steps: int (default: 10000)
+    """
+    hands, deck, player, delta, color, top = state
+    if isinstance(policy, str):
+        policy = POLICIES[policy]
+    if rng is None:
+        rng = Random()
+    hands = [list(hand) for hand in hands]
+    masks = [
+        sum(1 << face for face, count in enumerate(hand) if count)
+        for hand in hands
+    ]
+    sizes = [sum(hand) for hand in hands]
+    deck = deque(deck)
+    n = len(hands)
+    types = len(TYPES)
+    playable_masks = _PLAYABLE
+    face_types = FACE_TYPES
+    face_colors = FACE_COLORS
+
+    for steps in range(1, max_steps + 1):
+        hand = hands[player]
+        playable = masks[player] & playable_masks[color * types + top]
+        if not playable:
+            if len(deck) < 2:
+                return None, steps - 1
+            face = deck.popleft()
+            hand[face] += 1
+            masks[player] |= 1 << face
+            sizes[player] += 1
+            player = (player + delta) % n
+            continue
+
+        face, new_color = policy(hand, playable, rng)
+        hand[face] -= 1
+        if not hand[face]:
+            masks[player] ^= 1 << face
+        sizes[player] -= 1
+        deck.append(face)
+        top = face_types[face]
+        color = face_colors[face] if new_color is None else new_color
+        mover = player
+
+        if top >= SKIP:
+            if top == REVERSE:
+                delta = -delta
+            elif top != WILDCARD:
+                player = (player + delta) % n
+                penalty = 2 if top == DRAW_TWO else 4 if top > WILDCARD else 0
+                if penalty:
+                    if len(deck) <= penalty:
+                        return None, steps
+                    victim = hands[player]
+                    for i in range(penalty):
+                        drawn = deck.popleft()
+                        victim[drawn] += 1
+                        masks[player] |= 1 << drawn
+                    sizes[player] += penalty
+        if not sizes[mover]:
+            return mover, steps
+        player = (player + delta) % n
+    return None, max_steps
+
+
+def benchmark(game, playouts=1000, policy='random', seed=0):
+    """
+    Play out the game's position playouts times and return a dict of the
+    number of moves made, the time taken and the moves per second.
+    """
+    state = export_state(game)
+    rng = Random(seed)
+    steps = 0
+    start = perf_counter()
+    for i in range(playouts):
+        steps += rollout(state, policy, rng)[1]
+    seconds = perf_counter() - start
+    return {
+        'playouts': playouts,
+        'steps': steps,
+        'seconds': seconds,
+        'steps_per_second': steps / seconds if seconds else 0,
+    }
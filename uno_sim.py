@@ -0,0 +1,180 @@
+from time import perf_counter_ns
+
+from uno import UnoGame, RuleSet, COLORS, STANDARD_RULES
+from uno_trace import traced_class
+
+
+class QuietUnoGame(UnoGame):
+    """
+    An UnoGame for simulations, which doesn't print the winner and counts the
+    cards picked up.
+
+    >>> game = QuietUnoGame(5, seed=1)
+    """
+    def _init_state(self):
+        self.cards_drawn = 0
+
+    def reset(self, seed=None, random=True):
+        self.cards_drawn = 0
+        super().reset(seed, random)
+
+    def _print_winner(self):
+        pass
+
+    def _pick_up(self, player, n):
+        super()._pick_up(player, n)
+        self.cards_drawn += n
+
+
+class GamePool:
+    """
+    Keeps finished games to be reset and played again, instead of creating a
+    new game with new cards, hands and players for every game in a long
+    simulation. Games are kept for each number of players, set of house
+    rules and number of decks.
+
+    game_class: UnoGame subclass (default: QuietUnoGame)
+    size: int, most games kept for each number of players and rules
+        (default: 16)
+
+    >>> pool = GamePool()
+    >>> game = pool.acquire(4, seed=1)
+    >>> pool.release(game)
+    """
+    def __init__(self, game_class=QuietUnoGame, size=16):
+        self.game_class = game_class
+        self.size = size
+        self._free = {}
+
+    def acquire(self, players, seed=None, rules=None, decks=1):
+        """
+        Return a new game, reset from one given back with release if there is
+        one, which is the same as
+        game_class(players, seed=seed, rules=rules, decks=decks).
+        """
+        if rules is None:
+            rules = STANDARD_RULES
+        free = self._free.get((players, rules._flags, decks))
+        if not free:
+            return self.game_class(
+                players, seed=seed, rules=rules, decks=decks
+            )
+        game = free.pop()
+        game.rules = rules
+        game.reset(seed)
+        return game
+
+    def release(self, game):
+        """
+        Give back a game which is no longer needed, to be reused.
+        """
+        key = (len(game.players), game.rules._flags, game.decks)
+        free = self._free.setdefault(key, [])
+        if len(free) < self.size:
+            free.append(game)
+
+
+def random_policy(game):
+    """
+    Play a random playable card, only picking up when there is none.
+    """
+    actions = game.legal_actions()
+    return game.rng.choice(actions[:-1] or actions)
+
+
+def first_playable_policy(game):
+    """
+    Play the first playable card in the hand with a random new color, like the
+    AI players in AIUnoGame.
+    """
+    card, new_color, *target = game.legal_actions()[0]
+    if new_color is not None:
+        new_color = game.rng.choice(COLORS)
+    if target:
+        target = [game.rng.choice([
+            n for n, player in enumerate(game.players)
+            if player != game.current_player
+        ])]
+    return (card, new_color, *target)
+
+
+POLICIES = {
+    'random': random_policy,
+    'first': first_playable_policy,
+}
+
+
+def play_game(players, seed=None, rules=None, policies='random',
+              max_turns=10000, pool=None, tracer=None, decks=1):
+    """
+    Play a game to the end and return a dict describing the result. The game
+    is abandoned (winner is None) if the deck runs out, there aren't enough
+    cards left for the penalty of the next move (see UnoGame.enough_cards),
+    or it goes on for more than max_turns turns.
+
+    players: int
+    seed: int/str (default: None)
+    rules: RuleSet or dict of RuleSet arguments (default: standard rules)
+    policies: policy name, or list of policy names, one for each player
+    max_turns: int (default: 10000)
+    pool: GamePool to take the game from and give it back to (default: None)
+    tracer: uno_trace.Tracer to record the game in, if it is one of the games
+        the tracer samples; traced games are made new rather than taken from
+        the pool (default: None)
+    decks: int (default: 1)
+
+    >>> play_game(4, seed=1)['winner']
+    """
+    if isinstance(rules, dict):
+        rules = RuleSet(**rules)
+    if isinstance(policies, str):
+        policies = [policies] * players
+    if tracer is not None and tracer.sample():
+        start = perf_counter_ns()
+        policies = [
+            tracer.wrap(POLICIES[policy], policy, 'policy')
+            for policy in policies
+        ]
+        game_class = QuietUnoGame if pool is None else pool.game_class
+        game = traced_class(game_class, tracer)(
+            players, seed=seed, rules=rules, decks=decks
+        )
+        result = _play(game, policies, max_turns)
+        tracer.add('play_game', 'sim', start)
+        return result
+    policies = [POLICIES[policy] for policy in policies]
+    if pool is not None:
+        game = pool.acquire(players, seed, rules, decks)
+    else:
+        game = QuietUnoGame(players, seed=seed, rules=rules, decks=decks)
+    result = _play(game, policies, max_turns)
+    if pool is not None:
+        pool.release(game)
+    return result
+
+
+def _play(game, policies, max_turns):
+    """
+    Play the game to the end with a policy function for each player, and
+    return the result for play_game.
+    """
+    turns = 0
+    max_hand = 7
+    while game.is_active and len(game.deck) > 1 and turns < max_turns:
+        player = game.current_player
+        action = policies[player.player_id](game)
+        if not game.enough_cards(action[0]):
+            # Not enough cards left for the move's penalty
+            break
+        game.apply(*action)
+        turns += 1
+        hand = max(len(player.hand) for player in game.players)
+        if hand > max_hand:
+            max_hand = hand
+    result = {
+        'winner': game.winner.player_id if game.winner else None,
+        'turns': turns,
+        'max_hand': max_hand,
+        'cards_drawn': game.cards_drawn,
+    }
+    return result
@@ -0,0 +1,306 @@
+from time import perf_counter
+
+from uno import (
+    BLACK, COLORS, COLOR_INDEX, FACES, FACE_COLORS, FACE_TYPES, RULE_NAMES,
+    TYPES, TYPE_INDEX
+)
+
+
+# Playability only depends on the current card's type, so positions are
+# keyed on indexes into TYPES rather than the face of the current card, and
+# on the effective color as an index into ALL_COLORS
+# Cards picked up by the other player when each face is played
+_PENALTIES = [
+    {'+2': 2, '+4': 4}.get(card_type, 0) for color, card_type in FACES
+]
+# Faces after which the same player has another turn (in a 2 player game)
+_AGAIN = [
+    card_type in ('skip', '+2', '+4') for color, card_type in FACES
+]
+_PLAYABLE = [
+    [
+        [
+            face_color == color or face_type == top or face_color == BLACK
+            for face_color, face_type in zip(FACE_COLORS, FACE_TYPES)
+        ]
+        for color in range(BLACK + 1)
+    ]
+    for top in range(len(TYPES))
+]
+WIN = 1
+LOSS = -1
+UNKNOWN = 0
+
+# Proof and disproof numbers of positions which are solved
+_INFINITY = 10 ** 9
+_PROVEN = (0, _INFINITY)
+_DISPROVEN = (_INFINITY, 0)
+# Child thresholds are raised by this factor over the second best child, so
+# the search doesn't keep switching between two children (the 1 + epsilon
+# trick)
+_EPSILON = 1.5
+
+
+class EndgameSolver:
+    """
+    Solves 2 player Uno positions where both hands and the order of the draw
+    pile are known, e.g. games created with random=False.
+
+    Values are from the point of view of the player whose turn it is: WIN,
+    LOSS, or UNKNOWN if the result depends on picking up more cards than are
+    left in the draw pile (when the engine would start drawing from the cards
+    played during the search). The value is found by proving two questions in
+    turn, whether the player can win and whether they can avoid losing, each
+    with depth-first proof-number search (df-pn). This follows the lines
+    closest to an answer first, which suits Uno, where a few lines end
+    quickly and the rest go on until the pile runs out, far better than
+    alpha-beta. Proof and disproof numbers are kept in a bounded cache keyed
+    on both hands (as sorted face indexes), the current card's type, its
+    effective color, how far into the draw pile the game is, which player is
+    to move and the question being proved.
+
+    Hands of up to 8 cards with a draw pile of up to 20 cards solve in under
+    a second. The time grows quickly with the length of the pile, since a
+    longer pile allows much longer games: some positions with a pile of 30
+    take minutes.
+
+    By default players only pick up when they have no playable card, as in
+    the official rules. The engine also lets players pick up when they could
+    play; set forced_draws to False to search those moves too, which makes
+    the search much larger.
+
+    cache_size: int, maximum number of positions to cache (default: 1000000)
+    forced_draws: bool (default: True)
+
+    >>> solver = EndgameSolver()
+    >>> value, action = solver.solve(UnoGame(2, random=False))
+    >>> solver.stats()
+    """
+    def __init__(self, cache_size=1000000, forced_draws=True):
+        self.cache_size = cache_size
+        self.forced_draws = forced_draws
+        self._cache = {}
+        self._pile = None
+        self.nodes = 0
+        self.lookups = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def solve(self, game):
+        """
+        Return the value of the game's position for the current player, and
+        the best action as a (card, new_color) tuple to be passed to
+        game.apply (or None if the game is over).
+        """
+        if len(game.players) != 2:
+            raise ValueError('Invalid game: must be 2 players')
+        if any(getattr(game.rules, name) for name in RULE_NAMES):
+            raise ValueError('Invalid game: must use the standard rules')
+        if not game.is_active:
+            return LOSS, None
+        player = game.current_player
+        other = [p for p in game.players if p != player][0]
+        pile = tuple(card.face for card in game.deck[:-1])
+        if pile != self._pile:
+            # Cached positions are only keyed on how far into the pile they
+            # are, so they don't carry over to a different pile
+            self._cache.clear()
+            self._pile = pile
+        position = (
+            tuple(sorted(card.face for card in player.hand)),
+            tuple(sorted(card.face for card in other.hand)),
+            TYPE_INDEX[game.current_card.card_type],
+            COLOR_INDEX[game.current_card._color],
+            0, True,
+        )
+
+        start = perf_counter()
+        for value in (WIN, UNKNOWN):
+            key = position + (value,)
+            if self._prove(key):
+                best_move = self._proving_move(key)
+                break
+        else:
+            value = LOSS
+            best_move = self._children(key)[0][2]
+        self.seconds += perf_counter() - start
+
+        face, new_color = best_move
+        if face is None:
+            return value, (None, None)
+        card = [card.face for card in player.hand].index(face)
+        if FACE_COLORS[face] == BLACK:
+            new_color = COLORS[new_color]
+        else:
+            new_color = None
+        return value, (card, new_color)
+
+    def stats(self):
+        """
+        Return a dict of the number of positions searched, the search speed
+        and the cache hit rate.
+        """
+        return {
+            'nodes': self.nodes,
+            'seconds': self.seconds,
+            'nodes_per_second':
+                self.nodes / self.seconds if self.seconds else 0,
+            'cache_hit_rate': self.hits / self.lookups if self.lookups else 0,
+            'cache_size': len(self._cache),
+        }
+
+    def _prove(self, key):
+        """
+        Return True if the position's question is proved, and False if it is
+        disproved.
+        """
+        phi, delta = self._search(key, _INFINITY, _INFINITY)
+        return phi == 0
+
+    def _proving_move(self, key):
+        """
+        Return the move which proves a proved position's question, searching
+        the children again if they have been dropped from the cache.
+        """
+        children = self._children(key)
+        for child, same, move in children:
+            if self._numbers(child, same)[0] == 0:
+                return move
+        for child, same, move in children:
+            if same is None:
+                continue
+            if same:
+                phi, delta = self._search(child, _INFINITY, _INFINITY)
+            else:
+                delta, phi = self._search(child, _INFINITY, _INFINITY)
+            if phi == 0:
+                return move
+
+    def _numbers(self, child, same):
+        """
+        Return the proof and disproof numbers of a child position for the
+        question of its parent.
+        """
+        if same is None:
+            return child
+        self.lookups += 1
+        numbers = self._cache.get(child)
+        if numbers is None:
+            # Positions where the player to move has fewer cards are
+            # guessed to be easier to prove
+            numbers = (1 + len(child[0]) // 2, 1 + len(child[1]) // 2)
+        else:
+            self.hits += 1
+        return numbers if same else (numbers[1], numbers[0])
+
+    def _search(self, key, max_phi, max_delta):
+        """
+        Search the position until its proof number reaches max_phi or its
+        disproof number reaches max_delta, and return both.
+
+        A position's question is whether the player to move can make the
+        player who was to move at the start score at least the value being
+        proved (the last item of the key) or, for the other player, stop
+        them. Its proof number is the least number of positions which would
+        still have to be proved to prove it, and its disproof number the
+        same for disproving it.
+        """
+        self.nodes += 1
+        children = self._children(key)
+        numbers = self._numbers
+        while True:
+            phi = second = _INFINITY
+            delta = 0
+            for child in children:
+                child_phi, child_delta = numbers(child[0], child[1])
+                delta += child_delta
+                if child_phi < phi:
+                    second = phi
+                    phi = child_phi
+                    best = child
+                elif child_phi < second:
+                    second = child_phi
+            delta = min(delta, _INFINITY)
+            if phi >= max_phi or delta >= max_delta:
+                self._store(key, phi, delta)
+                return phi, delta
+            child, same, move = best
+            child_phi, child_delta = numbers(child, same)
+            max_child_phi = min(max_phi, int(second * _EPSILON) + 1)
+            max_child_delta = max_delta - delta + child_delta
+            if same:
+                self._search(child, max_child_phi, max_child_delta)
+            else:
+                self._search(child, max_child_delta, max_child_phi)
+
+    def _store(self, key, phi, delta):
+        cache = self._cache
+        if key not in cache and len(cache) >= self.cache_size:
+            del cache[next(iter(cache))]
+        cache[key] = (phi, delta)
+
+    def _children(self, key):
+        """
+        Return a list of (child, same, move) for each move the player to
+        move can make, where move is (face, color) with face None for picking
+        up, and child is the key of the position after it, with same True if
+        the same player moves again. For a move which ends the search, child
+        is the proof and disproof numbers and same is None.
+        """
+        mover, other, top, color, pos, first, value = key
+        pile = self._pile
+        playable = _PLAYABLE[top][color]
+        children = []
+        for face in dict.fromkeys(mover):
+            if not playable[face]:
+                continue
+            face_color = FACE_COLORS[face]
+            if len(mover) == 1:
+                # Winning always answers the mover's question
+                move = (face, 0 if face_color == BLACK else face_color)
+                return [(_PROVEN, None, move)]
+            i = mover.index(face)
+            hand = mover[:i] + mover[i+1:]
+            top_type = FACE_TYPES[face]
+            new_colors = range(BLACK) if face_color == BLACK else [face_color]
+            for new_color in new_colors:
+                move = (face, new_color)
+                if not _AGAIN[face]:
+                    children.append((
+                        (other, hand, top_type, new_color, pos, not first,
+                         value),
+                        False, move
+                    ))
+                    continue
+                penalty = _PENALTIES[face]
+                if pos + penalty > len(pile):
+                    children.append((_horizon(first, value), None, move))
+                else:
+                    children.append((
+                        (hand, tuple(sorted(other + pile[pos:pos+penalty])),
+                         top_type, new_color, pos + penalty, first, value),
+                        True, move
+                    ))
+        if children and self.forced_draws:
+            return children
+        move = (None, color)
+        if pos < len(pile):
+            hand = tuple(sorted(mover + (pile[pos],)))
+            children.append((
+                (other, hand, top, color, pos + 1, not first, value),
+                False, move
+            ))
+        else:
+            children.append((_horizon(first, value), None, move))
+        return children
+
+
+def _horizon(first, value):
+    """
+    Return the proof and disproof numbers for a position whose value is
+    UNKNOWN, for the player who was to move at the start if first is True,
+    and otherwise for the other player, when proving value.
+    """
+    if first:
+        return _PROVEN if value <= UNKNOWN else _DISPROVEN
+    return _PROVEN if value > UNKNOWN else _DISPROVEN
@@ -0,0 +1,296 @@
+from math import ceil, log, sqrt
+
+
+class Moments:
+    """
+    Keeps the count, mean, variance, minimum and maximum of a stream of
+    numbers in constant memory. Two Moments can be merged, e.g. from different
+    worker processes.
+
+    >>> turns = Moments()
+    >>> turns.add(12)
+    >>> turns.mean
+    12.0
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, x):
+        """
+        Add the number x to the stream.
+        """
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        """
+        Add the numbers in other to this stream, in place.
+        """
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean = other.count, other.mean
+            self._m2 = other._m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += (
+            other._m2 + delta * delta * self.count * other.count / count
+        )
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return sqrt(self.variance)
+
+    def to_dict(self):
+        return {
+            'count': self.count, 'mean': self.mean, 'm2': self._m2,
+            'min': self.min, 'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        moments.count, moments.mean, moments._m2 = (
+            data['count'], data['mean'], data['m2']
+        )
+        moments.min, moments.max = data['min'], data['max']
+        return moments
+
+
+class Histogram:
+    """
+    Counts a stream of non-negative numbers in fixed width bins, with a final
+    bin for everything from bins * width upwards.
+
+    bins: int
+    width: int/float (default: 1)
+
+    >>> hand_sizes = Histogram(30)
+    >>> hand_sizes.add(7)
+    """
+    def __init__(self, bins, width=1):
+        self.width = width
+        self.counts = [0] * (bins + 1)
+
+    def add(self, x):
+        """
+        Add the number x to the histogram.
+        """
+        self.counts[min(int(x // self.width), len(self.counts) - 1)] += 1
+
+    def merge(self, other):
+        """
+        Add the counts in other to this histogram, in place.
+        """
+        if other.width != self.width or len(other.counts) != len(self.counts):
+            raise ValueError('Invalid histogram: bins must be the same')
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def to_dict(self):
+        return {'width': self.width, 'counts': list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(len(data['counts']) - 1, data['width'])
+        histogram.counts = list(data['counts'])
+        return histogram
+
+
+class QuantileSketch:
+    """
+    Estimates quantiles of a stream of non-negative numbers, with a relative
+    error of at most relative_accuracy. Numbers are counted in buckets whose
+    bounds grow geometrically, so memory depends only on the range of the
+    numbers, not how many there are, and sketches can be merged exactly.
+
+    relative_accuracy: float (default: 0.01)
+
+    >>> lengths = QuantileSketch()
+    >>> lengths.add(40)
+    >>> lengths.quantile(0.5)
+    """
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = log(self._gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, x):
+        """
+        Add the number x to the sketch.
+        """
+        self.count += 1
+        if x <= 0:
+            self.zeros += 1
+            return
+        key = ceil(log(x) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other):
+        """
+        Add the numbers in other to this sketch, in place.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Invalid sketch: accuracy must be the same')
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        """
+        Return an estimate of the q quantile (0 <= q <= 1), or None if the
+        sketch is empty.
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self._gamma ** key / (1 + self._gamma)
+        return 2 * self._gamma ** max(self.buckets) / (1 + self._gamma)
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'buckets': {
+                str(key): count for key, count in self.buckets.items()
+            },
+            'zeros': self.zeros,
+            'count': self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.buckets = {
+            int(key): count for key, count in data['buckets'].items()
+        }
+        sketch.zeros = data['zeros']
+        sketch.count = data['count']
+        return sketch
+
+
+class GameStats:
+    """
+    Aggregates the results of simulated games (as returned by
+    uno_sim.play_game) in constant memory: wins for each seat, and the
+    distribution of game length, largest hand and cards drawn.
+
+    players: int
+
+    >>> stats = GameStats(4)
+    >>> stats.add(play_game(4, seed=1))
+    >>> stats.turns_sketch.quantile(0.99)
+    """
+    def __init__(self, players):
+        self.games = 0
+        self.unfinished = 0
+        self.wins = [0] * players
+        self.turns = Moments()
+        self.turns_sketch = QuantileSketch()
+        self.max_hand = Moments()
+        self.max_hand_histogram = Histogram(50)
+        self.cards_drawn = Moments()
+
+    def add(self, result):
+        """
+        Add the result of one game.
+        """
+        self.games += 1
+        if result['winner'] is None:
+            self.unfinished += 1
+        else:
+            self.wins[result['winner']] += 1
+        self.turns.add(result['turns'])
+        self.turns_sketch.add(result['turns'])
+        self.max_hand.add(result['max_hand'])
+        self.max_hand_histogram.add(result['max_hand'])
+        self.cards_drawn.add(result['cards_drawn'])
+
+    def merge(self, other):
+        """
+        Add the games in other to these stats, in place.
+        """
+        if len(other.wins) != len(self.wins):
+            raise ValueError('Invalid stats: number of players must match')
+        self.games += other.games
+        self.unfinished += other.unfinished
+        self.wins = [a + b for a, b in zip(self.wins, other.wins)]
+        for name in _GAME_STATS_PARTS:
+            getattr(self, name).merge(getattr(other, name))
+
+    def to_dict(self):
+        data = {
+            'games': self.games,
+            'unfinished': self.unfinished,
+            'wins': list(self.wins),
+        }
+        for name in _GAME_STATS_PARTS:
+            data[name] = getattr(self, name).to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(len(data['wins']))
+        stats.games = data['games']
+        stats.unfinished = data['unfinished']
+        stats.wins = list(data['wins'])
+        for name, part in _GAME_STATS_PARTS.items():
+            setattr(stats, name, part.from_dict(data[name]))
+        return stats
+
+
+_GAME_STATS_PARTS = {
+    'turns': Moments,
+    'turns_sketch': QuantileSketch,
+    'max_hand': Moments,
+    'max_hand_histogram': Histogram,
+    'cards_drawn': Moments,
+}
+
+
+def merge_all(parts):
+    """
+    Merge a list of Moments, Histograms, QuantileSketches or GameStats in a
+    tree, merging pairs of neighbours until one is left, and return it. The
+    parts are merged in place.
+    """
+    parts = list(parts)
+    if not parts:
+        raise ValueError('Nothing to merge')
+    while len(parts) > 1:
+        merged = []
+        for i in range(0, len(parts) - 1, 2):
+            parts[i].merge(parts[i + 1])
+            merged.append(parts[i])
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
+    return parts[0]
@@ -0,0 +1,154 @@
+import json
+import os
+from hashlib import sha256
+from itertools import product
+from multiprocessing import Pool
+
+from uno import ENGINE_VERSION, RuleSet, derive_seed
+from uno_sim import play_game, GamePool
+from uno_stats import GameStats
+
+
+class Sweep:
+    """
+    Represents a parameter sweep over numbers of players, rule variants and
+    policies. The games for each combination are split into shards, and the
+    result of each shard is cached on disk under a hash of everything which
+    affects it, including ENGINE_VERSION. Only shards which aren't cached are
+    played, so an interrupted sweep can be resumed, and adding to the grid
+    only plays the new combinations.
+
+    cache_dir: string, directory to cache results in
+    players: list of ints
+    rules: dict of rule variant name to dict of RuleSet arguments
+    policies: list of policy names from uno_sim.POLICIES
+    games: int, number of games for each combination
+    shard_size: int (default: 1000)
+    seed: int/str, master seed (default: 0)
+
+    >>> rules = {'standard': {}}
+    >>> sweep = Sweep('sweep_cache', [2, 4], rules, ['random'], 10000)
+    >>> sweep.run()
+    >>> sweep.results()[(2, 'standard', 'random')].wins
+    """
+    def __init__(self, cache_dir, players, rules, policies, games,
+                 shard_size=1000, seed=0):
+        self.cache_dir = cache_dir
+        self.players = list(players)
+        self.rules = dict(rules)
+        self.policies = list(policies)
+        self.games = games
+        self.shard_size = shard_size
+        self.seed = seed
+
+    def shards(self):
+        """
+        Return a list of the shards in the sweep, each a dict describing the
+        games in it.
+        """
+        shards = []
+        grid = product(self.players, self.rules.items(), self.policies)
+        for players, (rules_name, rules), policy in grid:
+            for start in range(0, self.games, self.shard_size):
+                shards.append({
+                    'engine': ENGINE_VERSION,
+                    'players': players,
+                    'rules': rules,
+                    'policy': policy,
+                    'seed': self.seed,
+                    'start': start,
+                    'games': min(self.shard_size, self.games - start),
+                    'name': rules_name,
+                })
+        return shards
+
+    def path(self, shard):
+        """
+        Return the path of the cache file for a shard. The rule variant's name
+        isn't part of the key, only the rules themselves.
+        """
+        key = {k: v for k, v in shard.items() if k != 'name'}
+        digest = sha256(
+            json.dumps(key, sort_keys=True).encode()
+        ).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + '.json')
+
+    def missing(self):
+        """
+        Return a list of the shards which haven't been cached yet.
+        """
+        return [
+            shard for shard in self.shards()
+            if not os.path.exists(self.path(shard))
+        ]
+
+    def run(self, processes=1):
+        """
+        Play and cache the missing shards, using a pool of processes if
+        processes is more than 1. Return the number of shards played.
+        """
+        jobs = [(shard, self.path(shard)) for shard in self.missing()]
+        if processes > 1 and len(jobs) > 1:
+            with Pool(processes) as pool:
+                for _ in pool.imap_unordered(_run_shard, jobs):
+                    pass
+        else:
+            for job in jobs:
+                _run_shard(job)
+        return len(jobs)
+
+    def results(self):
+        """
+        Return a dict of (players, rule variant name, policy) to the GameStats
+        of its cached shards. Shards which haven't been played yet are left
+        out.
+        """
+        results = {}
+        for shard in self.shards():
+            path = self.path(shard)
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                stats = GameStats.from_dict(json.load(f))
+            key = (shard['players'], shard['name'], shard['policy'])
+            if key in results:
+                results[key].merge(stats)
+            else:
+                results[key] = stats
+        return results
+
+
+def play_shard(shard):
+    """
+    Play the games in a shard and return their GameStats. Game n of a shard
+    is seeded with derive_seed(seed, players, rules, policy, n), so the
+    results don't depend on the shard size.
+    """
+    players = shard['players']
+    rules_key = json.dumps(shard['rules'], sort_keys=True)
+    # The rules are compiled once for the whole shard
+    rules = RuleSet(**shard['rules'])
+    stats = GameStats(players)
+    pool = GamePool()
+    for n in range(shard['start'], shard['start'] + shard['games']):
+        seed = derive_seed(
+            shard['seed'], players, rules_key, shard['policy'], n
+        )
+        stats.add(play_game(
+            players, seed, rules, shard['policy'], pool=pool
+        ))
+    return stats
+
+
+def _run_shard(job):
+    """
+    Play a shard and write its result to path, replacing the file atomically
+    so an interrupted run never leaves a partial result behind.
+    """
+    shard, path = job
+    stats = play_shard(shard)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(stats.to_dict(), f)
+    os.replace(tmp_path, path)
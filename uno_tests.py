@@ -336,3 +336,1896 @@ print()
 for i, player in enumerate(game.players):
     print("player", i, player.hand, end="\n\n")
 """
+
+# Test instrumented game
+
+from uno_metrics import GameMetrics, InstrumentedUnoGame
+
+metrics = GameMetrics()
+game = InstrumentedUnoGame(5, random=False, metrics=metrics)
+game.play(player=0, card=1)  # red 1
+game.play(player=1, card=0)  # red 7
+game.play(player=2, card=0)  # red 5
+game.play(player=3, card=0)  # red +2
+game.play(player=0, card=0)  # red 0
+game.play(player=1, card=0)  # red 8
+game.play(player=2, card=0)  # red 6
+game.play(player=3, card=0)  # red skip
+game.play(player=0, card=0)  # red 2
+game.play(player=1, card=0)  # red 9
+game.play(player=2, card=0)  # red 7
+game.play(player=3, card=0)  # red reverse
+game.play(player=2, card=0)  # red 8
+
+with pytest.raises(ValueError):
+    game.play(player=2, card=0)  # not their turn
+
+snapshot = metrics.snapshot()
+assert snapshot['counters']['moves'] == 13
+assert snapshot['counters']['draws'] == 2
+assert snapshot['counters']['draw_twos'] == 1
+assert snapshot['counters']['skips'] == 1
+assert snapshot['counters']['reverses'] == 1
+assert snapshot['counters']['wild_selections'] == 0
+assert snapshot['phase_calls']['validation'] == 2*13 + 1
+assert snapshot['phase_calls']['playability'] == 13
+assert snapshot['phase_calls']['pile'] == 13 + 1
+assert snapshot['phase_calls']['turn'] == 13 + 2
+assert all(seconds >= 0 for seconds in snapshot['phase_seconds'].values())
+
+text = metrics.to_prometheus()
+assert 'uno_draws_total 2\n' in text
+assert 'uno_phase_calls_total{phase="playability"} 13\n' in text
+
+metrics.reset()
+assert metrics.snapshot()['counters']['moves'] == 0
+
+# moves made with apply are counted too
+game.apply(None)
+game.apply(*game.legal_actions()[0])
+assert metrics.snapshot()['counters']['moves'] == 2
+
+# Test legal actions
+
+game = UnoGame(5, random=False)
+assert game.legal_actions() == [(1, None), (None, None)]
+game.play(player=0, card=1)  # red 1
+actions = game.legal_actions()
+assert actions[0] == (0, None)  # red 7
+assert actions[-1] == (None, None)
+assert all(game.current_card.playable(game.players[1].hand[card])
+           for card, new_color in actions[:-1])
+
+# Test trusted apply matches play move for move
+
+import io
+import json
+import os
+import random
+from contextlib import redirect_stdout
+
+# Set UNO_DIFFERENTIAL_GAMES to check more games, e.g. 1000000 for a long run
+DIFFERENTIAL_GAMES = int(os.environ.get('UNO_DIFFERENTIAL_GAMES', 200))
+
+
+def game_state(game):
+    return (
+        [[repr(card) for card in player.hand] for player in game.players],
+        [repr(card) for card in game.deck],
+        game.current_card._color,
+        game.players.index(game.current_player),
+        game.winner and game.winner.player_id,
+    )
+
+
+with redirect_stdout(io.StringIO()):
+    for seed in range(DIFFERENTIAL_GAMES):
+        players = 2 + seed % 9
+        checked_game = UnoGame(players, seed=seed)
+        trusted_game = UnoGame(players, seed=seed)
+        moves = random.Random(seed)
+        while checked_game.is_active:
+            actions = checked_game.legal_actions()
+            action = moves.choice(actions[:-1] or actions)
+            assert action in trusted_game.legal_actions()
+            player_id = checked_game.current_player.player_id
+            checked_game.play(player_id, *action)
+            trusted_game.apply(*action)
+            assert game_state(checked_game) == game_state(trusted_game)
+        assert trusted_game.legal_actions() == []
+
+# Test games share colored cards but not black cards
+
+game_1 = UnoGame(2, random=False)
+game_2 = UnoGame(2, random=False)
+assert [repr(card) for card in game_1.deck] == \
+    [repr(card) for card in game_2.deck]
+for card_1, card_2 in zip(game_1.deck, game_2.deck):
+    if card_1.color == 'black':
+        assert card_1 is not card_2
+    else:
+        assert card_1 is card_2
+assert len(UNSHUFFLED_DECK) == 108
+assert all(card.temp_color is None for card in UNSHUFFLED_DECK)
+
+# Test card faces
+
+assert len(FACES) == 54
+assert sum(FACE_COUNTS) == 108
+assert FACES[UnoCard('red', 0).face] == ('red', 0)
+assert FACE_COUNTS[UnoCard('red', 0).face] == 1
+assert FACE_COUNTS[UnoCard('blue', 'skip').face] == 2
+assert FACE_COUNTS[UnoCard('black', '+4').face] == 4
+
+# Test card tracker
+
+from uno_belief import TrackedUnoGame, playable_mask
+
+
+def check_tracker(game, tracker):
+    """
+    Check the tracker is consistent with the real state of the game.
+    """
+    observer = tracker.observer
+    unseen = [0] * len(FACES)
+    for card in game.deck[:tracker.pile]:
+        unseen[card.face] += 1
+    assert [FACES[face] for face in tracker.discards] == \
+        [(card.color, card.card_type) for card in game.deck[tracker.pile:]]
+    for n, player in enumerate(game.players):
+        if n == observer:
+            continue
+        held = [0] * len(FACES)
+        for card in player.hand:
+            held[card.face] += 1
+        known = tracker.known[n]
+        assert all(h >= k for h, k in zip(held, known))
+        assert tracker.hand_size(n) == len(player.hand)
+        for face, (h, k) in enumerate(zip(held, known)):
+            unseen[face] += h - k
+        assert check_constraints(tracker, n, [
+            face for face, (h, k) in enumerate(zip(held, known))
+            for i in range(h - k)
+        ])
+    assert unseen == tracker.unseen
+
+
+def check_constraints(tracker, player, faces):
+    """
+    Check the unknown faces given can be split among the player's constraint
+    groups, whose masks each include those of the groups after them.
+    """
+    groups = tracker.constraints[player]
+    masks = [mask for count, mask in groups]
+    assert all(a & b == b for a, b in zip(masks, masks[1:]))
+    assert sum(count for count, mask in groups) <= tracker.hidden[player]
+    needed = 0
+    for count, mask in groups:
+        needed += count
+        if sum(1 for face in faces if not mask >> face & 1) < needed:
+            return False
+    return True
+
+
+game = TrackedUnoGame(5, random=False)
+tracker = game.track(0)
+check_tracker(game, tracker)
+game.play(player=0, card=1)  # red 1
+game.play(player=1, card=0)  # red 7
+game.play(player=2, card=0)  # red 5
+game.play(player=3, card=0)  # red +2
+check_tracker(game, tracker)
+assert tracker.hidden[4] == 9
+game.play(player=0, card=0)  # red 0
+game.play(player=1, card=0)  # red 8
+game.play(player=2, card=0)  # red 6
+game.play(player=3, card=0)  # red skip
+game.play(player=0, card=0)  # red 2
+game.play(player=1, card=0)  # red 9
+game.play(player=2, card=0)  # red 7
+game.play(player=3, card=0)  # red reverse
+game.play(player=2, card=0)  # red 8
+game.play(player=1, card=0)  # red 1
+game.play(player=0, card=0)  # red 3
+game.play(player=4, card=0)  # yellow 3
+game.play(player=3, card=1)  # yellow 0
+game.play(player=2, card=None)  # can't go, pick up
+assert tracker.hidden[2] == 4
+assert game.current_card == UnoCard('yellow', 0)
+assert tracker.constraints[2] == [[3, playable_mask('yellow', 0)]]
+excluded = tracker.constraints[2][0][1]
+assert not excluded >> UnoCard('green', 4).face & 1
+assert excluded >> UnoCard('green', 0).face & 1
+assert excluded >> UnoCard('black', '+4').face & 1
+game.play(player=1, card=None)  # can't go, pick up
+game.play(player=0, card=None)  # can't go, pick up
+assert tracker.constraints[0] == []
+check_tracker(game, tracker)
+for tries in (100, 0):
+    hands = tracker.sample_hands(random.Random(0), tries)
+    assert hands[0] == []
+    assert [len(hand) for hand in hands[1:]] == \
+        [len(player.hand) for player in game.players[1:]]
+    assert check_constraints(tracker, 2, hands[2])
+# a second pass keeps the first one's mask on the cards held then, and
+# constrains the card picked up since with its own
+tracker.passed(2, UnoCard('green', 4))
+green = playable_mask('green', 4)
+assert tracker.constraints[2] == [[3, excluded | green], [1, green]]
+# playing a card takes it from the oldest group which allows it, and the
+# groups are cut back to the cards left
+tracker.played(2, UnoCard('blue', 9))
+assert tracker.constraints[2] == [[2, excluded | green], [1, green]]
+tracker.played(2, UnoCard('green', 9))
+assert tracker.constraints[2] == [[2, excluded | green]]
+assert tracker.hidden[2] == 2
+
+with redirect_stdout(io.StringIO()):
+    for seed in range(20):
+        players = 2 + seed % 5
+        game = TrackedUnoGame(players, seed=seed)
+        trackers = [game.track(n) for n in range(players)]
+        moves = random.Random(seed)
+        while game.is_active:
+            actions = game.legal_actions()
+            game.apply(*moves.choice(actions[:-1] or actions))
+            for tracker in trackers:
+                check_tracker(game, tracker)
+            hands = trackers[0].sample_hands(moves)
+            assert [len(hand) for hand in hands[1:]] == \
+                [len(player.hand) for player in game.players[1:]]
+            for n in range(1, players):
+                known = sum(trackers[0].known[n])
+                assert check_constraints(trackers[0], n, hands[n][known:])
+
+# each supported house rule, alone and together
+with redirect_stdout(io.StringIO()):
+    for rules in [
+        RuleSet(stacking=True), RuleSet(jump_in=True),
+        RuleSet(draw_until_playable=True),
+        RuleSet(stacking=True, jump_in=True, draw_until_playable=True),
+    ]:
+        for seed in range(20):
+            players = 2 + seed % 5
+            game = TrackedUnoGame(players, seed=seed, rules=rules)
+            trackers = [game.track(n) for n in range(players)]
+            moves = random.Random(seed)
+            while game.is_active and len(game.deck) > game._penalty + 12:
+                actions = game.legal_actions()
+                game.apply(*moves.choice(actions[:-1] or actions))
+                for tracker in trackers:
+                    check_tracker(game, tracker)
+with pytest.raises(ValueError):
+    TrackedUnoGame(3, rules=RuleSet(seven_o=True))
+
+# Test seeded games
+
+from concurrent.futures import ThreadPoolExecutor
+
+assert derive_seed(1234, 0) == derive_seed(1234, 0)
+assert derive_seed(1234, 0) != derive_seed(1234, 1)
+assert derive_seed(1234, 0) != derive_seed(1235, 0)
+assert derive_seed(1234, 0, 1) != derive_seed(1234, 1, 0)
+
+game_1 = UnoGame(5, seed=derive_seed(1234, 0))
+game_2 = UnoGame(5, seed=derive_seed(1234, 0))
+game_3 = UnoGame(5, seed=derive_seed(1234, 1))
+assert game_state(game_1) == game_state(game_2)
+assert game_state(game_1) != game_state(game_3)
+
+
+def seeded_game(n):
+    """
+    Play game n of a run with the master seed 1234, and return its moves.
+    """
+    game = UnoGame(4, seed=derive_seed(1234, n))
+    moves = []
+    while game.is_active:
+        actions = game.legal_actions()
+        action = game.rng.choice(actions[:-1] or actions)
+        game.apply(*action)
+        moves.append(action)
+    return moves
+
+
+with redirect_stdout(io.StringIO()):
+    serial = [seeded_game(n) for n in range(16)]
+    with ThreadPoolExecutor(4) as executor:
+        threaded = list(executor.map(seeded_game, range(16)))
+assert serial == threaded
+
+# Test house rules
+
+assert repr(STANDARD_RULES) == '<RuleSet object: standard>'
+assert repr(RuleSet(stacking=True, jump_in=True)) == \
+    '<RuleSet object: stacking jump_in>'
+
+# stacking
+
+game = UnoGame(3, random=False, rules=RuleSet(stacking=True))
+player_0, player_1, player_2 = game.players
+game.deck.append(UnoCard('red', 5))
+player_0.hand[0] = UnoCard('red', '+2')
+player_1.hand[0] = UnoCard('blue', '+2')
+player_2.hand[0] = UnoCard('black', '+4')
+game.play(player=0, card=0)  # red +2
+assert game.current_player == player_1
+assert len(player_1.hand) == 7
+assert game.legal_actions() == [(0, None), (None, None)]
+with pytest.raises(ValueError):
+    game.play(player=1, card=1)  # must stack or pick up
+game.play(player=1, card=0)  # blue +2
+game.play(player=2, card=0, new_color='green')  # black +4
+assert game.current_player == player_0
+game.play(player=0, card=None)  # picks up the whole stack
+assert len(player_0.hand) == 6 + 8
+assert game.current_player == player_1
+assert game.legal_actions()[-1] == (None, None)
+game.play(player=1, card=None)
+assert len(player_1.hand) == 6 + 1
+
+# seven-o
+
+game = UnoGame(3, random=False, rules=RuleSet(seven_o=True))
+player_0, player_1, player_2 = game.players
+game.deck.append(UnoCard('red', 5))
+player_0.hand[0] = UnoCard('red', 7)
+player_1.hand[0] = UnoCard('red', 0)
+assert (0, None, 1) in game.legal_actions()
+assert (0, None, 2) in game.legal_actions()
+assert (0, None, 0) not in game.legal_actions()
+with pytest.raises(ValueError):
+    game.play(player=0, card=0)  # no target
+with pytest.raises(ValueError):
+    game.play(player=0, card=0, target=0)  # can't swap with yourself
+hand_0, hand_2 = player_0.hand, player_2.hand
+game.play(player=0, card=0, target=2)  # red 7
+assert player_0.hand is hand_2
+assert player_2.hand is hand_0
+assert len(player_0.hand) == 7
+assert len(player_2.hand) == 6
+hands = [player.hand for player in game.players]
+game.play(player=1, card=0)  # red 0
+assert player_0.hand is hands[2]
+assert player_1.hand is hands[0]
+assert player_2.hand is hands[1]
+assert game.current_player == player_2
+
+# jump-in
+
+game = UnoGame(3, random=False)
+game.deck.append(UnoCard('red', 5))
+game.players[2].hand[0] = UnoCard('red', 5)
+with pytest.raises(ValueError):
+    game.play(player=2, card=0)
+
+game = UnoGame(3, random=False, rules=RuleSet(jump_in=True))
+player_0, player_1, player_2 = game.players
+game.deck.append(UnoCard('red', 5))
+player_2.hand[0] = UnoCard('red', 5)
+with pytest.raises(ValueError):
+    game.play(player=1, card=0)  # not identical
+with pytest.raises(ValueError):
+    game.play(player=1, card=None)
+game.play(player=2, card=0)  # red 5, out of turn
+assert len(player_2.hand) == 6
+assert game.current_player == player_0
+
+# jumping in with a 7 swaps with anyone but the player jumping in
+
+game = UnoGame(3, random=False, rules=RuleSet(seven_o=True, jump_in=True))
+player_0, player_1, player_2 = game.players
+game.deck.append(UnoCard('red', 7))
+player_2.hand[0] = UnoCard('red', 7)
+with pytest.raises(ValueError):
+    game.play(player=2, card=0, target=2)  # can't swap with yourself
+hand_0, hand_2 = player_0.hand, player_2.hand
+game.play(player=2, card=0, target=0)  # red 7, out of turn
+assert player_0.hand is hand_2
+assert player_2.hand is hand_0
+assert game.current_player == player_0
+
+# draw until playable
+
+game = UnoGame(2, random=False, rules=RuleSet(draw_until_playable=True))
+player_0 = game.players[0]
+game.deck.append(UnoCard('red', 5))
+game.deck[:0] = [UnoCard('green', 1), UnoCard('green', 2), UnoCard('blue', 5)]
+game.play(player=0, card=None)
+assert len(player_0.hand) == 7 + 3
+assert player_0.hand[-1] == UnoCard('blue', 5)
+assert game.current_player == player_0
+
+# random games with every house rule
+
+all_rules = RuleSet(
+    stacking=True, seven_o=True, jump_in=True, draw_until_playable=True
+)
+with redirect_stdout(io.StringIO()):
+    for seed in range(50):
+        game = UnoGame(2 + seed % 5, seed=seed, rules=all_rules)
+        while game.is_active and len(game.deck) > 1:
+            actions = game.legal_actions()
+            game.apply(*game.rng.choice(actions[:-1] or actions))
+            cards = len(game.deck) + sum(
+                len(player.hand) for player in game.players
+            )
+            assert cards == 108
+
+# Test simulated games
+
+from uno_sim import play_game, GamePool, POLICIES
+
+result = play_game(4, seed=1)
+assert result == play_game(4, seed=1)
+assert result['winner'] in range(4)
+assert result['turns'] > 0
+assert result['max_hand'] >= 7
+for policy in POLICIES:
+    result = play_game(3, seed=2, policies=policy, rules={'seven_o': True})
+    assert result['winner'] in range(3)
+
+# a game is abandoned before a move whose penalty the deck can't cover,
+# and left whole to go back into the pool
+POLICIES['pick_up'] = lambda game: game.legal_actions()[-1]
+pool = GamePool()
+result = play_game(2, seed=173, policies=['pick_up', 'random'], pool=pool)
+assert result['winner'] is None
+game, = pool._free[(2, STANDARD_RULES._flags, 1)]
+assert len(game.deck) + sum(len(p.hand) for p in game.players) == 108
+assert not game.enough_cards(game.legal_actions()[0][0])
+# but a bad move from a policy isn't hidden
+POLICIES['bad'] = lambda game: (99, None)
+with pytest.raises(IndexError):
+    play_game(2, seed=1, policies=['bad', 'random'])
+del POLICIES['pick_up'], POLICIES['bad']
+
+game = UnoGame(2, seed=1)
+del game.deck[:-4]
+game.players[0].hand[0] = UnoCard('red', '+2')
+game.players[0].hand[1] = UnoCard('black', '+4')
+assert game.enough_cards(0) and not game.enough_cards(1)
+assert game.enough_cards(None)
+game._penalty = 4
+assert not game.enough_cards(None)
+game = UnoGame(2, seed=1, rules=RuleSet(stacking=True))
+del game.deck[:-2]
+game.players[0].hand[0] = UnoCard('black', '+4')
+assert game.enough_cards(0)
+
+# Test parameter sweep
+
+import tempfile
+
+from uno_sweep import Sweep
+
+with tempfile.TemporaryDirectory() as cache_dir:
+    rules = {'standard': {}, 'stacking': {'stacking': True}}
+    sweep = Sweep(cache_dir, [2, 3], rules, ['random'], 25, shard_size=10)
+    assert len(sweep.shards()) == 2 * 2 * 3
+    assert sweep.run() == 12
+    assert sweep.missing() == []
+    assert sweep.run() == 0
+    results = sweep.results()
+    assert set(results) == {
+        (2, 'standard', 'random'), (2, 'stacking', 'random'),
+        (3, 'standard', 'random'), (3, 'stacking', 'random'),
+    }
+    stats = results[(3, 'standard', 'random')]
+    assert stats.games == 25
+    assert sum(stats.wins) + stats.unfinished == 25
+    assert stats.turns.count == 25
+
+    # interrupted sweeps resume, and adding to the grid only plays new shards
+    os.remove(sweep.path(sweep.shards()[0]))
+    policies = ['random', 'first']
+    sweep = Sweep(cache_dir, [2, 3], rules, policies, 25, shard_size=10)
+    assert sweep.run(processes=2) == 1 + 12
+    assert sweep.results()[(3, 'standard', 'random')].to_dict() == \
+        stats.to_dict()
+
+    # results don't depend on the shard size
+    sweep = Sweep(cache_dir, [3], rules, ['random'], 25, shard_size=25)
+    sweep.run()
+    resharded = sweep.results()[(3, 'standard', 'random')]
+    assert resharded.wins == stats.wins
+    assert resharded.turns_sketch.to_dict() == stats.turns_sketch.to_dict()
+    assert abs(resharded.turns.mean - stats.turns.mean) < 1e-9
+
+# Test streaming statistics
+
+from statistics import mean, variance
+
+from uno_stats import GameStats, Histogram, Moments, QuantileSketch, merge_all
+
+numbers = [random.Random(n).randint(0, 500) for n in range(1000)]
+moments = Moments()
+for x in numbers:
+    moments.add(x)
+assert moments.count == 1000
+assert abs(moments.mean - mean(numbers)) < 1e-9
+assert abs(moments.variance - variance(numbers)) < 1e-6
+assert (moments.min, moments.max) == (min(numbers), max(numbers))
+
+parts = []
+for i in range(0, 1000, 70):
+    part = Moments()
+    for x in numbers[i:i+70]:
+        part.add(x)
+    parts.append(Moments.from_dict(json.loads(json.dumps(part.to_dict()))))
+merged = merge_all(parts)
+assert merged.count == 1000
+assert abs(merged.mean - moments.mean) < 1e-9
+assert abs(merged.variance - moments.variance) < 1e-6
+assert (merged.min, merged.max) == (moments.min, moments.max)
+
+histogram = Histogram(10, width=50)
+for x in numbers:
+    histogram.add(x)
+assert sum(histogram.counts) == 1000
+assert histogram.counts[-1] == sum(1 for x in numbers if x >= 500)
+with pytest.raises(ValueError):
+    histogram.merge(Histogram(5))
+
+sketch = QuantileSketch()
+for x in numbers:
+    sketch.add(x)
+ordered = sorted(numbers)
+for q in (0.1, 0.5, 0.9, 0.99):
+    exact = ordered[int(q * 999)]
+    assert abs(sketch.quantile(q) - exact) <= 0.01 * exact + 1e-9
+halves = [QuantileSketch(), QuantileSketch()]
+for i, x in enumerate(numbers):
+    halves[i % 2].add(x)
+merged = QuantileSketch.from_dict(
+    json.loads(json.dumps(merge_all(halves).to_dict()))
+)
+assert merged.to_dict() == sketch.to_dict()
+assert QuantileSketch().quantile(0.5) is None
+
+stats = GameStats(3)
+for seed in range(20):
+    stats.add(play_game(3, seed=seed))
+copy = GameStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+copy.merge(stats)
+assert copy.games == 40
+assert copy.wins == [2 * wins for wins in stats.wins]
+with pytest.raises(ValueError):
+    copy.merge(GameStats(4))
+
+# Test endgame solver
+
+import copy
+
+from uno_solver import EndgameSolver, WIN, LOSS, UNKNOWN
+
+
+def small_game(seed, cards, pile):
+    """
+    Return a 2 player game cut down to hands of the given number of cards, and
+    a draw pile of the given length.
+    """
+    game = UnoGame(2, seed=seed)
+    for player in game.players:
+        del player.hand[cards:]
+    game.deck = game.deck[-(pile + 1):]
+    return game
+
+
+def brute_force(game, pile, forced_draws, drawn=0):
+    """
+    Return the value of the game for the current player by trying every line
+    of play with the engine.
+    """
+    mover = game.current_player
+    actions = game.legal_actions()
+    if forced_draws and len(actions) > 1:
+        actions = actions[:-1]
+    best = LOSS
+    for card, new_color in actions:
+        if card is not None and len(mover.hand) == 1:
+            return WIN
+        if card is None:
+            penalty = 1
+        else:
+            penalty = {'+2': 2, '+4': 4}.get(mover.hand[card].card_type, 0)
+        if drawn + penalty > pile:
+            value = UNKNOWN
+        else:
+            child = copy.deepcopy(game)
+            child.apply(card, new_color)
+            value = brute_force(child, pile, forced_draws, drawn + penalty)
+            if child.current_player.player_id != mover.player_id:
+                value = -value
+        best = max(best, value)
+    return best
+
+
+with redirect_stdout(io.StringIO()):
+    for seed in range(15):
+        for forced_draws in (True, False):
+            game = small_game(seed, 3, 3)
+            solver = EndgameSolver(forced_draws=forced_draws)
+            value, action = solver.solve(game)
+            assert value == brute_force(game, 3, forced_draws)
+            assert action in game.legal_actions()
+
+# the best action keeps the value (the child position can see further into
+# the deck, as the cards played are drawn once the rest of the pile runs out)
+
+with redirect_stdout(io.StringIO()):
+    for seed in range(20):
+        game = small_game(seed, 5, 12)
+        value, action = EndgameSolver().solve(game)
+        mover = game.current_player
+        game.apply(*action)
+        if game.is_active:
+            child_value, child_action = EndgameSolver().solve(game)
+            if game.current_player != mover:
+                child_value = -child_value
+            assert value == UNKNOWN or child_value == value
+        else:
+            assert value == WIN
+
+# a solver can be reused for other games
+solver = EndgameSolver()
+with redirect_stdout(io.StringIO()):
+    for seed in range(10):
+        game = small_game(seed, 4, 8)
+        assert solver.solve(game) == EndgameSolver().solve(game)
+
+solver = EndgameSolver(cache_size=100)
+solver.solve(small_game(0, 6, 20))
+stats = solver.stats()
+assert stats['nodes'] > 0
+assert stats['cache_size'] <= 100
+assert 0 <= stats['cache_hit_rate'] <= 1
+
+with pytest.raises(ValueError):
+    EndgameSolver().solve(UnoGame(3))
+with pytest.raises(ValueError):
+    EndgameSolver().solve(UnoGame(2, rules=RuleSet(stacking=True)))
+
+# Test response odds
+
+from math import comb
+
+from uno_odds import ResponseOdds, miss_probability, MAX_HAND
+
+for total, playable, hand_size in [(100, 30, 7), (20, 0, 5), (20, 20, 1),
+                                   (10, 3, 10), (50, 12, MAX_HAND + 5)]:
+    exact = comb(total - playable, hand_size) / comb(total, hand_size)
+    assert abs(miss_probability(total, playable, hand_size) - exact) < 1e-12
+
+odds = ResponseOdds()
+assert odds.total == 108
+# reds, 5s and black cards, less the red 5s counted twice
+assert odds.playable('red', 5) == 25 + 8 - 2 + 8
+assert odds.playable('red', 'wildcard') == 25 + 8
+assert odds.playable('black', '+4') == 8
+
+game = UnoGame(4, seed=3)
+odds = ResponseOdds()
+for card in game.players[0].hand + [game.current_card]:
+    odds.see(card)
+unseen = game.deck[:-1] + game.players[1].hand + game.players[2].hand + \
+    game.players[3].hand
+assert odds.total == len(unseen) == 108 - 8
+for top in [UnoCard('red', 5), UnoCard('blue', 'skip'), game.current_card]:
+    top.temp_color = 'green' if top.color == 'black' else None
+    playable = sum(1 for card in unseen if top.playable(card))
+    assert odds.playable(top._color, top.card_type) == playable
+    exact = 1 - comb(len(unseen) - playable, 7) / comb(len(unseen), 7)
+    assert abs(odds.can_respond(7, top) - exact) < 1e-12
+assert odds.unseen == ResponseOdds(odds.unseen).unseen
+odds.unsee(game.current_card)
+assert odds.total == 108 - 7
+
+# Test lazy draw pile
+
+from uno_lazy import LazyDeckUnoGame
+
+game = LazyDeckUnoGame(5, seed=1)
+assert game.pile_size == sum(game.pile) == 108 - 5 * 7 - 1
+assert len(game.deck) == 1
+assert all(len(player.hand) == 7 for player in game.players)
+for seed in range(10):
+    game = LazyDeckUnoGame(5, seed=seed)
+    for player in game.players:
+        for card in player.hand:
+            if card.color == 'black':
+                assert all(card is not other for other in UNSHUFFLED_DECK)
+
+
+def lazy_counts(game):
+    counts = list(game.pile)
+    for card in game.deck + [c for p in game.players for c in p.hand]:
+        counts[card.face] += 1
+    return counts
+
+
+# the same seed gives the same game, and no cards are lost or made up as the
+# played cards go back into the draw pile
+reshuffles = 0
+with redirect_stdout(io.StringIO()):
+    for seed in range(20):
+        game = LazyDeckUnoGame(4, seed=seed)
+        other = LazyDeckUnoGame(4, seed=seed)
+        rng = random.Random(seed)
+        while game.is_active:
+            assert game_state(game) == game_state(other)
+            actions = game.legal_actions()
+            card, new_color = rng.choice(actions[:-1] or actions)
+            if card is None and not game.pile_size:
+                reshuffles += 1
+            game.apply(card, new_color)
+            other.apply(card, new_color)
+            assert lazy_counts(game) == FACE_COUNTS
+assert reshuffles
+assert any(
+    LazyDeckUnoGame(2, seed=seed).current_card.face !=
+    LazyDeckUnoGame(2, seed=seed + 1).current_card.face for seed in range(5)
+)
+
+game = LazyDeckUnoGame(2, seed=2)
+game.deck[:0] = [UnoCard('red', n) for n in range(5)]
+game.set_pile([0] * len(FACES))
+game._pick_up(game.players[0], 2)
+assert len(game.players[0].hand) == 9
+assert game.pile_size == 3 and len(game.deck) == 1
+assert lazy_counts(game)[FACE_INDEX[('red', 0)]] == 1
+
+# cards are dealt with the same distribution as from a shuffled deck
+games = 3000
+shuffled = [0] * len(FACES)
+lazy = [0] * len(FACES)
+for seed in range(games):
+    for card in UnoGame(2, seed=seed).players[0].hand:
+        shuffled[card.face] += 1
+    for card in LazyDeckUnoGame(2, seed=seed).players[0].hand:
+        lazy[card.face] += 1
+for face, count in enumerate(FACE_COUNTS):
+    expected = games * 7 * count / 108
+    sd = (expected * (1 - count / 108)) ** 0.5
+    assert abs(lazy[face] - expected) < 5 * sd
+    assert abs(shuffled[face] - expected) < 5 * sd
+
+# Test rollouts
+
+from uno_rollout import export_state, rollout, benchmark, BLACK, WILDCARD
+from uno_sim import QuietUnoGame
+
+
+def first_face(game):
+    """
+    The move first_policy makes, as an action for the engine.
+    """
+    hand = game.current_player.hand
+    playable = [
+        i for i, card in enumerate(hand) if game.current_card.playable(card)
+    ]
+    if not playable:
+        return None, None
+    i = min(playable, key=lambda i: hand[i].face)
+    if hand[i].color != 'black':
+        return i, None
+    counts = [
+        sum(1 for card in hand if card.color == color) for color in COLORS
+    ]
+    return i, COLORS[counts.index(max(counts))]
+
+
+wins = 0
+for seed in range(300):
+    game = QuietUnoGame(2 + seed % 6, seed=seed)
+    moves = random.Random(seed)
+    for i in range(seed % 20):
+        if not game.is_active or len(game.deck) < 6:
+            break
+        actions = game.legal_actions()
+        game.apply(*moves.choice(actions[:-1] or actions))
+    if not game.is_active:
+        continue
+    state = export_state(game)
+    copied = copy.deepcopy(state)
+    winner, steps = rollout(state, 'first')
+    assert state == copied
+    for i in range(steps):
+        assert game.is_active
+        game.apply(*first_face(game))
+    if winner is None:
+        assert game.is_active
+    else:
+        wins += 1
+        assert game.winner is game.players[winner]
+assert wins > 250
+
+game = UnoGame(4, seed=5)
+state = export_state(game)
+assert rollout(state, rng=random.Random(1)) == \
+    rollout(state, rng=random.Random(1))
+results = [rollout(state, rng=random.Random(n))[0] for n in range(200)]
+assert set(results) <= {0, 1, 2, 3, None} and len(set(results)) > 2
+assert rollout(state, max_steps=3) == (None, 3)
+assert benchmark(game, 10)['playouts'] == 10
+
+game = UnoGame(2, seed=1)
+game.deck.append(UnoCard('black', 'wildcard'))
+assert export_state(game)[4:] == (BLACK, WILDCARD)
+with pytest.raises(ValueError):
+    export_state(UnoGame(2, rules=RuleSet(stacking=True)))
+
+# Test batched policy inference
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    from uno_batch import (
+        BatchScheduler, LinearPolicy, MLPPolicy, legal_moves, observe,
+        N_ACTIONS, N_FEATURES, PICK_UP
+    )
+
+    weights = np.random.default_rng(0).standard_normal((N_FEATURES, N_ACTIONS))
+    policy = LinearPolicy(weights)
+    game = UnoGame(4, seed=1)
+    assert observe(game).shape == (N_FEATURES,)
+    assert observe(game)[:len(FACES)].sum() == 7
+    moves = legal_moves(game)
+    assert PICK_UP not in moves or len(moves) == 1
+    for move in moves.values():
+        assert move in game.legal_actions()
+
+    # the same decisions are made however they are batched, and a batch which
+    # never fills up is scored after max_wait
+    winners = []
+    for batch_size in [1, 16, 1000]:
+        scheduler = BatchScheduler(policy, batch_size, max_wait=0.0001)
+        games = [QuietUnoGame(2 + n % 4, seed=n) for n in range(40)]
+        winners.append(scheduler.run(games))
+        if batch_size == 1:
+            assert scheduler.batches == scheduler.decisions
+        else:
+            assert scheduler.batches < scheduler.decisions
+    assert winners[0] == winners[1] == winners[2]
+    assert any(winner is not None for winner in winners[0])
+
+    # a game whose only move is a +4 with too few cards left to pick up ends
+    # unfinished, without stopping the rest of the batch
+    short = QuietUnoGame(2, seed=3)
+    short.current_player.hand[:] = [UnoCard('black', '+4')]
+    del short.deck[:-3]
+    results = BatchScheduler(policy, 4).run([short, QuietUnoGame(2, seed=3)])
+    assert results[0] is None and results[1] is not None
+    assert short.is_active and len(short.deck) == 3
+
+    mlp = MLPPolicy(
+        np.ones((N_FEATURES, 8)), np.zeros(8),
+        np.ones((8, N_ACTIONS)), np.arange(N_ACTIONS)
+    )
+    game = QuietUnoGame(3, seed=2)
+    BatchScheduler(mlp, 4).run([game])
+    assert not game.is_active or len(game.deck) <= 1
+
+    with pytest.raises(ValueError):
+        LinearPolicy(np.zeros((3, 3)))
+    game = UnoGame(3, rules=RuleSet(seven_o=True))
+    game.deck.append(UnoCard('red', 7))
+    game.current_player.hand.append(UnoCard('red', 7))
+    with pytest.raises(ValueError):
+        legal_moves(game)
+
+# Test binary serialization
+
+from uno_bench import serialization
+
+
+def full_state(game):
+    return (
+        [(c.color, c.card_type, c.temp_color) for c in game.deck],
+        [[(c.color, c.card_type, c.temp_color) for c in player.hand]
+         for player in game.players],
+        game._player_cycle.pos, game._player_cycle._reverse,
+        game.players.index(game.current_player),
+        game.winner and game.players.index(game.winner),
+        game.rules._flags, game._penalty,
+    )
+
+
+with redirect_stdout(io.StringIO()):
+    for seed in range(60):
+        rules = RuleSet(
+            stacking=seed % 2 == 0, jump_in=seed % 3 == 0,
+            draw_until_playable=seed % 5 == 0, seven_o=seed % 7 == 0
+        )
+        game = UnoGame(2 + seed % 14, seed=seed, rules=rules)
+        moves = random.Random(seed)
+        while True:
+            data = game.to_bytes()
+            restored = UnoGame.from_bytes(data)
+            assert full_state(restored) == full_state(game)
+            assert restored.to_bytes() == data
+            assert restored.rules is UnoGame.from_bytes(data).rules
+            if not game.is_active or len(game.deck) < 6:
+                break
+            actions = game.legal_actions()
+            action = moves.choice(actions[:-1] or actions)
+            game.apply(*action)
+            restored.apply(*action)
+            assert full_state(restored) == full_state(game)
+
+game = UnoGame(4, seed=1)
+data = game.to_bytes()
+assert len(data) == 12 + 2 * 4 + 108
+restored = UnoGame.from_bytes(data)
+# black cards hold a color, so every game has its own
+for card in restored.deck:
+    if card.color == 'black':
+        assert all(card is not other for other in game.deck + UNSHUFFLED_DECK)
+restored = UnoGame.from_bytes(data, seed=3)
+assert restored.rng.random() == random.Random(3).random()
+for bad in [data[:5], data[:-1], data + b'\x00', b'\x09' + data[1:],
+            data[:-1] + b'\xff']:
+    with pytest.raises(ValueError):
+        UnoGame.from_bytes(bad)
+# every header field is checked: players, current player, rules, winner,
+# penalty and deck size
+for offset, value in [(1, 1), (3, 4), (5, 1 << 5), (6, 4), (8, 2), (10, 0)]:
+    bad = bytearray(data)
+    bad[offset] = value
+    with pytest.raises(ValueError):
+        UnoGame.from_bytes(bad)
+
+# subclasses are restored with their own state
+with redirect_stdout(io.StringIO()):
+    for game_class in [QuietUnoGame, TrackedUnoGame, InstrumentedUnoGame,
+                       LazyDeckUnoGame]:
+        game = game_class(4, seed=1)
+        restored = game_class.from_bytes(game.to_bytes(), seed=1)
+        assert type(restored) is game_class
+        for i in range(40):
+            if not restored.is_active:
+                break
+            restored.apply(*restored.legal_actions()[-1])
+assert QuietUnoGame.from_bytes(data).cards_drawn == 0
+assert InstrumentedUnoGame.from_bytes(data).metrics.counters['moves'] == 0
+seven_o = UnoGame(4, rules=RuleSet(seven_o=True)).to_bytes()
+with pytest.raises(ValueError):
+    TrackedUnoGame.from_bytes(seven_o)
+
+results = serialization(games=20)
+assert results['to_bytes']['bytes'] * 10 < results['pickle']['bytes']
+
+# Test shared memory arena
+
+import subprocess
+import sys
+import threading
+
+from uno_arena import GameArena
+
+with GameArena(20, slot_size=200) as arena:
+    assert arena.read(0) is None
+    games = [UnoGame(2 + n % 10, seed=n) for n in range(20)]
+    for slot, game in enumerate(games):
+        assert arena.publish(slot, game) == 2
+    assert arena.publish(3, games[3]) == 4
+    for slot, game in enumerate(games):
+        assert arena.read(slot).to_bytes() == game.to_bytes()
+    seq, view = arena.view(5)
+    assert bytes(view) == games[5].to_bytes() and view.readonly
+    view.release()
+    with pytest.raises(ValueError):
+        arena.publish(20, games[0])
+    with GameArena(1, slot_size=100) as small:
+        with pytest.raises(ValueError):
+            small.publish(0, UnoGame(2, seed=1))
+
+    # another process reads the games from the same memory
+    script = (
+        'from uno_arena import GameArena\n'
+        'arena = GameArena.attach({!r})\n'
+        'print(arena.read(7).to_bytes().hex())\n'
+        'arena.close()\n'
+    ).format(arena.name)
+    output = subprocess.run(
+        [sys.executable, '-c', script], capture_output=True, text=True,
+        check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    ).stdout
+    assert bytes.fromhex(output.strip()) == games[7].to_bytes()
+
+    # readers never see a game half written
+    versions = [game.to_bytes() for game in games[:2]]
+    stop = threading.Event()
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            arena.publish(0, games[n % 2])
+            n += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for i in range(2000):
+            assert arena.read(0).to_bytes() in versions
+    finally:
+        stop.set()
+        thread.join()
+
+# Test turn timers
+
+from uno_timers import TimedTable, TimingWheel
+
+now = [0.0]
+wheel = TimingWheel(tick=1, wheel_size=8, levels=2, clock=lambda: now[0])
+fired = []
+timers = [
+    wheel.schedule(delay, lambda delay: fired.append((delay, now[0])), delay)
+    for delay in range(1, 200)
+]
+for timer in timers[::2]:
+    wheel.cancel(timer)
+assert wheel.pending == 99
+for now[0] in range(0, 205, 3):
+    wheel.advance()
+assert [delay for delay, _ in fired] == list(range(2, 200, 2))
+assert all(0 <= time - delay < 3 for delay, time in fired)
+assert wheel.pending == 0 and not timers[1].active
+
+# players who don't move in time pick up
+now[0] = 0.0
+wheel = TimingWheel(tick=0.5, clock=lambda: now[0])
+tables = [TimedTable(QuietUnoGame(3, seed=n), wheel, 10) for n in range(50)]
+moves = random.Random(0)
+for second in range(1, 31):
+    now[0] = second
+    for n, table in enumerate(tables):
+        game = table.game
+        # the players at even tables never move
+        if game.is_active and len(game.deck) > 1 and n % 2:
+            actions = game.legal_actions()
+            card, new_color = moves.choice(actions[:-1] or actions)
+            seat = game.players.index(game.current_player)
+            table.play(seat, card, new_color)
+    wheel.advance()
+assert all(table.timeouts == 0 for table in tables[1::2])
+assert all(table.timeouts == 3 for table in tables[::2])
+game = tables[0].game
+hands = [len(player.hand) for player in game.players]
+player = game.current_player
+if game.is_active:
+    now[0] += 10
+    wheel.advance()
+    assert len(player.hand) == hands[game.players.index(player)] + 1
+    assert game.current_player is not player
+
+# a callback which raises doesn't stop the others, and a callback can cancel
+# a timer due in the same tick
+now[0] = 0.0
+failures = []
+wheel = TimingWheel(
+    tick=1, clock=lambda: now[0],
+    on_error=lambda timer, e: failures.append((timer.args, str(e)))
+)
+fired = []
+def fail(n):
+    raise IndexError('Not enough cards in the deck')
+later = wheel.schedule(3, fired.append, 'cancelled')
+wheel.schedule(1, fired.append, 0)
+wheel.schedule(2, fail, 1)
+wheel.schedule(2, lambda: wheel.cancel(later))
+wheel.schedule(3, fired.append, 3)
+now[0] = 5
+assert wheel.advance() == 4
+assert fired == [0, 3] and not later.active
+assert wheel.errors == 1
+assert failures == [((1,), 'Not enough cards in the deck')]
+assert wheel.pending == 0
+
+# a table which can't pick up keeps its clock, and the other tables carry on
+class Stuck(QuietUnoGame):
+    def _draw(self, player):
+        raise IndexError('Not enough cards in the deck')
+now[0] = 0.0
+wheel = TimingWheel(tick=1, clock=lambda: now[0])
+stuck = TimedTable(Stuck(3, seed=0), wheel, 2)
+tables = [TimedTable(QuietUnoGame(3, seed=n), wheel, 2) for n in range(5)]
+for now[0] in range(1, 7):
+    wheel.advance()
+assert stuck.timeouts == 3 and isinstance(stuck.error, IndexError)
+assert all(table.timeouts == 3 for table in tables)
+assert wheel.errors == 0 and wheel.pending == 6
+
+# Test deltas
+
+from uno_delta import (
+    DeltaBroadcaster, DeltaUnoGame, DeltaView, decode, encode, DRAW,
+    DRAW_HIDDEN, TURN
+)
+
+
+def check_view(view, game):
+    players = game.players
+    assert view.sizes == [len(player.hand) for player in players]
+    if view.seat is not None:
+        assert view.hand == [card.face for card in players[view.seat].hand]
+    else:
+        assert view.hand == []
+    assert view.face == game.current_card.face
+    color = game.current_card._color
+    assert view.color == (BLACK if color == 'black' else COLORS.index(color))
+    assert view.reverse == game._player_cycle._reverse
+    assert view.current == players.index(game.current_player)
+    assert view.winner == (game.winner and players.index(game.winner))
+
+
+with redirect_stdout(io.StringIO()):
+    for seed in range(40):
+        rules = RuleSet(
+            stacking=seed % 2 == 0, seven_o=seed % 3 == 0,
+            jump_in=seed % 5 == 0, draw_until_playable=seed % 7 == 0
+        )
+        game = DeltaUnoGame(2 + seed % 5, seed=seed, rules=rules)
+        broadcaster = DeltaBroadcaster(game)
+        views = [DeltaView(seat) for seat in range(len(game.players))]
+        views += [DeltaView(), DeltaView()]
+        received = []
+        for view in views:
+            def send(data, view=view):
+                received.append(data)
+                view.update(data)
+            broadcaster.subscribe(send, view.seat)
+        moves = random.Random(seed)
+        while game.is_active and len(game.deck) > 5:
+            for view in views:
+                check_view(view, game)
+            actions = game.legal_actions()
+            game.apply(*moves.choice(actions[:-1] or actions))
+            # the spectators get the same bytes object
+            assert received[-1] is received[-2]
+            del received[:]
+        for view in views:
+            check_view(view, game)
+
+# other players' cards are hidden
+game = DeltaUnoGame(3, seed=1)
+events = []
+game.listeners.append(events.extend)
+game.play(0, None)
+assert events == [(DRAW, 0, [game.players[0].hand[-1].face]), (TURN, 1)]
+assert decode(encode(events)) == events
+for seat in range(3):
+    game = DeltaUnoGame(3, seed=1)
+    sent = []
+    DeltaBroadcaster(game).subscribe(sent.append, seat)
+    game.play(0, None)
+    if seat == 0:
+        assert decode(sent[-1]) == events
+    else:
+        assert decode(sent[-1]) == [(DRAW_HIDDEN, 0, 1), (TURN, 1)]
+with pytest.raises(ValueError):
+    decode(b'\x63')
+
+# Test write-ahead log
+
+from uno_wal import GameLog, read_log, recover
+
+with tempfile.TemporaryDirectory() as cache_dir, \
+        redirect_stdout(io.StringIO()):
+    path = os.path.join(cache_dir, 'tables.wal')
+    games = {}
+    log = GameLog(path, group_size=16, fsync=False, snapshot_every=7)
+    for table in range(30):
+        rules = RuleSet(seven_o=table % 2 == 0, jump_in=table % 3 == 0)
+        games[table] = UnoGame(2 + table % 4, seed=table, rules=rules)
+        log.create(table, games[table])
+    moves = random.Random(0)
+    for step in range(40):
+        for table, game in games.items():
+            if not game.is_active or len(game.deck) < 6:
+                continue
+            actions = game.legal_actions()
+            player = game.players.index(game.current_player)
+            action = moves.choice(actions[:-1] or actions)
+            log.play(table, game, player, *action)
+    with pytest.raises(ValueError):
+        log.play(0, games[0], len(games[0].players))
+    log.drop(29)
+    log.commit()
+    recovered = recover(path)
+    assert sorted(recovered) == list(range(29))
+    for table, game in recovered.items():
+        assert full_state(game) == full_state(games[table])
+    assert recover(path, processes=2, chunk_size=4).keys() == recovered.keys()
+
+    # moves which weren't committed are lost, and a torn record is ignored
+    game = games[30] = UnoGame(3, seed=30)
+    log.create(30, game)
+    log.commit()
+    log.play(30, game, 0, None)
+    assert read_log(path)[30][1] == []
+    log.commit()
+    assert read_log(path)[30][1] == [(0, None, None, None)]
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-3])
+    assert read_log(path)[30][1] == []
+
+    log.checkpoint(games)
+    assert all(moves == [] for _, moves in read_log(path).values())
+    for table, game in recover(path).items():
+        assert full_state(game) == full_state(games[table])
+
+    # tables are restored as game_class, by one process or several
+    for processes in [1, 2]:
+        quiet = recover(path, processes, QuietUnoGame, chunk_size=4)
+        assert all(type(game) is QuietUnoGame for game in quiet.values())
+        assert quiet.keys() == games.keys()
+
+    # a move which can't be logged isn't made
+    game = games[30]
+    state = full_state(game)
+    player = game.players.index(game.current_player)
+    for move in [(player, -1), (player, 0, 'black'), (player, 0, None, 1.5)]:
+        with pytest.raises(ValueError):
+            log.play(30, game, *move)
+    assert full_state(game) == state
+
+    # games which draw from an unsaved rng can't be replayed
+    with pytest.raises(ValueError):
+        log.create(31, LazyDeckUnoGame(3, seed=31))
+    log.close()
+    assert 31 not in read_log(path)
+    with pytest.raises(ValueError):
+        recover(path, game_class=LazyDeckUnoGame)
+
+# card, player and target indexes are logged up to 65534
+from uno_wal import _MOVE, _decode_move, _encode_move
+for move in [(0, 255, None, None), (300, 1000, 'blue', 299)]:
+    assert _decode_move(_MOVE.unpack(_encode_move(*move))) == move
+
+# Test game reset and pooling
+
+from itertools import chain
+
+from uno_sim import GamePool, QuietUnoGame
+from uno_bench import pooling
+
+with redirect_stdout(io.StringIO()):
+    for seed in range(30):
+        rules = RuleSet(
+            stacking=seed % 2 == 0, seven_o=seed % 3 == 0,
+            jump_in=seed % 5 == 0, draw_until_playable=seed % 7 == 0
+        )
+        players = 2 + seed % 6
+        for game_class in (UnoGame, LazyDeckUnoGame, QuietUnoGame):
+            game = game_class(players, seed=seed, rules=rules)
+            cards = set(map(id, chain(game.deck, *(
+                player.hand for player in game.players
+            ))))
+            hands = [player.hand for player in game.players]
+            moves = random.Random(seed)
+            while game.is_active and game._can_draw():
+                actions = game.legal_actions()
+                game.apply(*moves.choice(actions[:-1] or actions))
+            game.reset(seed + 1)
+            fresh = game_class(players, seed=seed + 1, rules=rules)
+            assert full_state(game) == full_state(fresh)
+            assert game.rng.random() == fresh.rng.random()
+            assert {id(player.hand) for player in game.players} == \
+                set(map(id, hands))
+            if game_class is not LazyDeckUnoGame:
+                # the same cards are used again
+                assert set(map(id, chain(game.deck, *(
+                    player.hand for player in game.players
+                )))) == cards
+            else:
+                assert game.pile_size == fresh.pile_size
+
+# a restored game finds its own black cards
+game = UnoGame(4, seed=1)
+restored = UnoGame.from_bytes(game.to_bytes())
+black_cards = [
+    card for card in chain(restored.deck, *(
+        player.hand for player in restored.players
+    ))
+    if card.color == 'black'
+]
+restored.reset(2)
+assert full_state(restored) == full_state(UnoGame(4, seed=2))
+assert all(
+    any(card is black for black in black_cards)
+    for card in restored.deck if card.color == 'black'
+)
+
+# viewers of a delta game are sent the new game
+game = DeltaUnoGame(3, seed=1)
+broadcaster = DeltaBroadcaster(game)
+views = [DeltaView(0), DeltaView()]
+for view in views:
+    broadcaster.subscribe(view.update, view.seat)
+with redirect_stdout(io.StringIO()):
+    while game.is_active and len(game.deck) > 1:
+        actions = game.legal_actions()
+        game.apply(*actions[0])
+game.reset(2)
+for view in views:
+    check_view(view, game)
+
+pool = GamePool(size=1)
+game = pool.acquire(4, seed=1)
+pool.release(game)
+pool.release(QuietUnoGame(4))
+assert pool.acquire(4, seed=2) is game
+assert pool.acquire(4, seed=2) is not game
+assert pool.acquire(3, seed=2) is not game
+stacking = RuleSet(stacking=True)
+pool.release(game)
+assert pool.acquire(4, rules=stacking) is not game
+assert pool.acquire(4, rules=RuleSet()).rules._flags == 0
+with redirect_stdout(io.StringIO()):
+    for seed in range(50):
+        for rules in (None, {'seven_o': True}, {'stacking': True}):
+            assert play_game(3, seed, rules, pool=pool) == \
+                play_game(3, seed, rules)
+
+results = pooling(games=50)
+assert set(results) == {'new', 'pooled'}
+assert len(results['pooled']['collections']) == 3
+
+# Test multiple decks
+
+from collections import Counter
+
+with pytest.raises(ValueError):
+    UnoGame(16)
+with pytest.raises(ValueError):
+    UnoGame(31, decks=2)
+with pytest.raises(ValueError):
+    UnoGame(4, decks=0)
+with pytest.raises(ValueError):
+    UnoGame(4, decks=1.5)
+
+# a single deck deals the same games as before
+assert UnoGame(4, seed=1, decks=1).to_bytes() == UnoGame(4, seed=1).to_bytes()
+
+for players, decks in [(20, 2), (45, 3), (100, 7)]:
+    game = UnoGame(players, seed=players, decks=decks)
+    cards = list(chain(game.deck, *(
+        player.hand for player in game.players
+    )))
+    assert len(cards) == 108 * decks
+    counts = Counter(card.face for card in cards)
+    assert [counts[face] for face in range(len(FACES))] == \
+        [count * decks for count in FACE_COUNTS]
+    black_cards = [card for card in cards if card.color == 'black']
+    assert len(set(map(id, black_cards))) == 8 * decks
+    assert all(len(player.hand) == 7 for player in game.players)
+
+    restored = UnoGame.from_bytes(game.to_bytes())
+    assert full_state(restored) == full_state(game)
+    assert restored.decks == decks
+
+    moves = random.Random(players)
+    with redirect_stdout(io.StringIO()):
+        while game.is_active and len(game.deck) > 5:
+            actions = game.legal_actions()
+            game.apply(*moves.choice(actions[:-1] or actions))
+    assert game.is_active == (game.winner is None)
+    assert game.is_active == all(player.hand for player in game.players)
+    game.reset(players + 1)
+    assert full_state(game) == \
+        full_state(UnoGame(players, seed=players + 1, decks=decks))
+    restored.reset(players + 1)
+    assert full_state(restored) == full_state(game)
+
+game = UnoGame(2, random=False)
+# the current card can't be picked up
+deck = list(game.deck)
+with pytest.raises(IndexError):
+    game._pick_up(game.players[0], len(game.deck))
+assert game.deck == deck and len(game.players[0].hand) == 7
+game._pick_up(game.players[0], len(game.deck) - 1)
+with pytest.raises(IndexError):
+    game._pick_up(game.players[0], 1)
+
+# large tables and hands fit in to_bytes
+with pytest.raises(ValueError):
+    UnoGame(4, decks=MAX_DECKS + 1)
+game = UnoGame(300, seed=1, decks=30)
+game._pick_up(game.players[5], 400)
+restored = UnoGame.from_bytes(game.to_bytes())
+assert full_state(restored) == full_state(game)
+assert len(restored.players) == 300 and len(restored.players[5].hand) == 407
+
+# the game classes, pools and simulations all take decks
+for game_class in [QuietUnoGame, TrackedUnoGame, InstrumentedUnoGame,
+                   LazyDeckUnoGame, DeltaUnoGame]:
+    game = game_class(40, seed=1, decks=3)
+    assert game.decks == 3
+    if game_class is LazyDeckUnoGame:
+        assert game.pile_size == 108 * 3 - 40 * 7 - 1
+    else:
+        assert len(game.deck) == 108 * 3 - 40 * 7
+tracked = TrackedUnoGame(20, seed=2, decks=2)
+tracker = tracked.track(0)
+assert sum(tracker.unseen) == 108 * 2 - 7 - 1
+pool = GamePool(size=4)
+game = pool.acquire(20, seed=1, decks=2)
+pool.release(game)
+assert pool.acquire(20, seed=1, decks=3) is not game
+assert pool.acquire(20, seed=1, decks=2) is game
+assert play_game(40, seed=1, decks=3)['turns'] > 0
+assert play_game(40, seed=1, decks=3, pool=pool) == \
+    play_game(40, seed=1, decks=3)
+
+# response odds for several decks are worked out without tables
+odds = ResponseOdds(decks=3)
+assert odds.total == 108 * 3 and odds.playable('black', '+4') == 8 * 3
+exact = comb(300 - 40, 7) / comb(300, 7)
+assert abs(miss_probability(300, 40, 7) - exact) < 1e-12
+
+# Test texture atlas packing
+
+from uno_atlas import pack, atlas_size
+
+sizes = {
+    name[:-len('.png')]: (73 if '_' not in name else 72, 108)
+    for name in os.listdir('images') if name.endswith('.png')
+}
+sizes['tall'] = (30, 200)
+for max_width, padding in [(1024, 2), (300, 0), (160, 5)]:
+    rects = pack(sizes, max_width, padding)
+    assert set(rects) == set(sizes)
+    width, height = atlas_size(rects, padding)
+    assert width <= max_width
+    boxes = []
+    for name, (x, y, w, h) in rects.items():
+        assert (w, h) == sizes[name]
+        assert x >= padding and y >= padding
+        assert x + w + padding <= width and y + h + padding <= height
+        boxes.append((x - padding, y - padding, x + w, y + h))
+    # images and their padding don't overlap
+    for i, (x0, y0, x1, y1) in enumerate(boxes):
+        for a0, b0, a1, b1 in boxes[i + 1:]:
+            assert x1 <= a0 or a1 <= x0 or y1 <= b0 or b1 <= y0
+assert pack({'back': (72, 108), 'red': (73, 108)}) == \
+    {'back': (2, 2, 72, 108), 'red': (76, 2, 73, 108)}
+with pytest.raises(ValueError):
+    pack({'wide': (1030, 10)})
+
+# the atlas is built again when it's missing or older than an image
+from uno_atlas import ATLAS_IMAGE, ATLAS_INDEX, _atlas_is_stale
+
+with tempfile.TemporaryDirectory() as image_dir:
+    def touch(name, mtime):
+        path = os.path.join(image_dir, name)
+        open(path, 'ab').close()
+        os.utime(path, (mtime, mtime))
+    touch('back.png', 1000)
+    assert _atlas_is_stale(image_dir)
+    touch(ATLAS_IMAGE, 2000)
+    assert _atlas_is_stale(image_dir)
+    touch(ATLAS_INDEX, 2000)
+    assert not _atlas_is_stale(image_dir)
+    touch('red.png', 3000)
+    assert _atlas_is_stale(image_dir)
+
+# Test game archive
+
+from array import array
+from functools import partial
+
+from uno_archive import (
+    ArchiveBuilder, GameArchive, PLAY, PENALTY, DRAW, NONE, TAIL
+)
+
+records = []
+expected = []
+with redirect_stdout(io.StringIO()):
+    for seed in range(80):
+        rules = RuleSet(
+            stacking=seed % 2 == 0, jump_in=seed % 3 == 0,
+            draw_until_playable=seed % 5 == 0
+        )
+        game = UnoGame(2 + seed % 6, seed=seed, rules=rules)
+        start = game.to_bytes()
+        moves = []
+        events = []
+        choices = random.Random(seed)
+        while game.is_active and len(game.deck) > 6 and len(moves) < 150:
+            actions = game.legal_actions()
+            card, new_color, *target = choices.choice(actions)
+            player = game.players.index(game.current_player)
+            move = (player, card, new_color, target[0] if target else None)
+            sizes = [len(p.hand) for p in game.players]
+            penalty = game._penalty
+            played = None if card is None else game.current_player.hand[card]
+            game.play(*move)
+            moves.append(move)
+            if played is not None:
+                events.append((len(moves), PLAY, player, played.face))
+            for seat, p in enumerate(game.players):
+                if len(p.hand) > sizes[seat] - (seat == player and
+                                                played is not None):
+                    if card is None and seat == player and not penalty:
+                        events.append((len(moves), DRAW, seat, NONE))
+                    else:
+                        events.append((
+                            len(moves), PENALTY, seat, game.current_card.face
+                        ))
+        records.append((start, moves))
+        expected.append((game, events, len(moves)))
+
+builder = ArchiveBuilder()
+for n, (start, moves) in enumerate(records):
+    assert builder.add(start, moves) == n
+archive = builder.build()
+assert len(archive) == len(records)
+assert GameArchive.from_bytes(archive.to_bytes()).postings == archive.postings
+restored = GameArchive.from_bytes(archive.to_bytes())
+# rare events are kept as sorted arrays of ids, and common ones as bitmaps
+kinds = {type(posting) for posting in archive.postings.values()}
+assert kinds == {int, array}
+for posting in archive.postings.values():
+    if isinstance(posting, array):
+        assert list(posting) == sorted(set(posting))
+
+
+def matching(predicate):
+    return [n for n, record in enumerate(expected) if predicate(*record)]
+
+
+four = FACE_INDEX[('black', '+4')]
+twos = [FACE_INDEX[(color, '+2')] for color in COLORS]
+for a in (archive, restored):
+    assert a.ids(a.games(players=4)) == \
+        matching(lambda game, events, moves: len(game.players) == 4)
+    assert a.ids(a.games(min_moves=40, max_moves=90)) == \
+        matching(lambda game, events, moves: 40 <= moves <= 90)
+    assert a.ids(a.games(winner=NONE)) == \
+        matching(lambda game, events, moves: game.winner is None)
+    assert a.ids(a.games(rules=RuleSet(stacking=True))) == [
+        n for n in range(len(records))
+        if n % 2 == 0 and n % 3 and n % 5
+    ]
+    for seat in range(3):
+        for last in (None, 1, 2, TAIL):
+            def _matches(game, events, moves, seat=seat, last=last,
+                         kind=PENALTY, faces=[four]):
+                return any(
+                    e == kind and s == seat and f in faces and
+                    (last is None or n > moves - last)
+                    for n, e, s, f in events
+                )
+            assert a.ids(a.events(PENALTY, ('black', '+4'), seat, last)) == \
+                matching(_matches)
+            assert a.ids(a.events(PENALTY, '+2', seat, last)) == matching(
+                partial(_matches, faces=twos)
+            )
+            assert a.ids(a.events(DRAW, seat=seat, last=last)) == matching(
+                partial(_matches, kind=DRAW, faces=[NONE])
+            )
+            assert a.ids(a.events(PLAY, ('red', 5), seat, last)) == matching(
+                partial(_matches, kind=PLAY, faces=[FACE_INDEX[('red', 5)]])
+            )
+hits = archive.events(PENALTY, '+4', last=2)
+assert hits and archive.events(PLAY, '+2', last=1)
+assert archive.ids(hits & archive.games(players=3)) == [
+    n for n in archive.ids(hits) if len(expected[n][0].players) == 3
+]
+assert archive.ids(archive.all & ~hits) == [
+    n for n in range(len(records)) if n not in archive.ids(hits)
+]
+for bad in [dict(card=('black', 5)), dict(card='+3'), dict(last=0),
+            dict(last=TAIL + 1)]:
+    with pytest.raises(ValueError):
+        archive.events(PENALTY, **bad)
+with pytest.raises(ValueError):
+    archive.events(7)
+with pytest.raises(ValueError):
+    GameArchive.from_bytes(archive.to_bytes()[:-1])
+
+# seats past 255 are indexed, and don't clash with NONE
+big = UnoGame(300, seed=4, decks=20)
+big._player_cycle.reverse()
+big.players[299].hand[0] = UnoCard('black', 'wildcard')
+start = big.to_bytes()
+builder = ArchiveBuilder()
+builder.add(start, [(0, None, None, None)])
+builder.add(start, [(0, None, None, None), (299, 0, 'red', None)])
+big_archive = GameArchive.from_bytes(builder.build().to_bytes())
+assert list(big_archive.players) == [300, 300]
+assert list(big_archive.winners) == [NONE, NONE]
+assert big_archive.ids(big_archive.events(PLAY, 'wildcard', 299)) == [1]
+assert big_archive.ids(big_archive.events(PLAY, 'wildcard', 255)) == []
+
+# Test league
+
+from uno_league import League, RoundRobinLeague, Rating, update, play_match
+from uno_sim import POLICIES
+from uno_bench import league as league_bench
+
+winner, loser = Rating(), Rating()
+update(winner, [loser])
+assert winner.mu > 25 > loser.mu
+assert abs((winner.mu - 25) - (25 - loser.mu)) < 1e-9
+assert winner.sigma < Rating().sigma and loser.sigma < Rating().sigma
+# an expected win moves the ratings less than an upset
+favourite, underdog = Rating(30, 2), Rating(20, 2)
+update(favourite, [underdog])
+upset_winner, upset_loser = Rating(20, 2), Rating(30, 2)
+update(upset_winner, [upset_loser])
+assert 0 < favourite.mu - 30 < upset_winner.mu - 20
+# a win at a bigger table is worth no more than one head to head
+big = Rating()
+update(big, [Rating() for n in range(5)])
+assert big.mu - 25 <= winner.mu - 25 + 1e-9
+
+
+def reluctant_policy(game):
+    """
+    Pick up most of the time, even when there is a card to play.
+    """
+    actions = game.legal_actions()
+    if game.rng.random() < 0.7:
+        return actions[-1]
+    return actions[0]
+
+
+POLICIES['reluctant'] = reluctant_policy
+with redirect_stdout(io.StringIO()):
+    league = League(['random', 'first', 'reluctant'], sizes=[2, 3], seed=1)
+    league.run(200)
+    again = League(['random', 'first', 'reluctant'], sizes=[2, 3], seed=1)
+    again.run(200)
+del POLICIES['reluctant']
+assert league.played == league.scheduled == 200
+assert sum(league.games.values()) == 100 * 2 + 100 * 3
+assert league.standings()[-1][0] == 'reluctant'
+assert [(p, r.mu) for p, r in league.standings()] == \
+    [(p, r.mu) for p, r in again.standings()]
+assert all(r.sigma < Rating().sigma for r in league.ratings.values())
+
+match = League(['random', 'first'], seed=2).schedule()
+assert sorted(match['seats']) == ['first', 'random']
+assert play_match(match) == play_match(match)
+
+with redirect_stdout(io.StringIO()):
+    league = League(['random', 'first'], sizes=[2], seed=3)
+    league.run(40, processes=2, in_flight=3)
+assert league.played == league.scheduled == 40
+assert sum(league.games.values()) == 80
+
+for bad in [dict(policies=['random', 'random']), dict(policies=['nope']),
+            dict(policies=['random']),
+            dict(policies=['random', 'first'], sizes=[16]),
+            dict(policies=['random', 'first'], sizes=[1])]:
+    with pytest.raises(ValueError):
+        League(**bad)
+
+# tables can be bigger than the number of policies
+league = League(['random', 'first'], sizes=[2, 4], seed=4)
+assert Counter(league.schedule()['seats']) == {'random': 1, 'first': 1}
+match = league.schedule()
+assert len(match['seats']) == 4 and set(match['seats']) == {'random', 'first'}
+# the winner's other seats don't count as losses
+seats = ['random', 'first', 'random', 'random']
+league.record(dict(match, seats=seats, winner=2))
+assert league.games == {'random': 1, 'first': 1}
+assert league.ratings['random'].mu > 25 > league.ratings['first'].mu
+with redirect_stdout(io.StringIO()):
+    league.run(20)
+assert sum(league.games.values()) == 2 * 21
+
+# a round robin plays every table in turn
+POLICIES['reluctant'] = reluctant_policy
+league = RoundRobinLeague(['random', 'first', 'reluctant'], seed=5)
+tables = [sorted(league.schedule()['seats']) for n in range(6)]
+del POLICIES['reluctant']
+assert tables[:3] == tables[3:]
+assert sorted(map(tuple, tables[:3])) == [
+    ('first', 'random'), ('first', 'reluctant'), ('random', 'reluctant')
+]
+league = RoundRobinLeague(['random', 'first'], sizes=[3])
+assert [Counter(league.schedule()['seats']) for n in range(2)] == [
+    {'random': 2, 'first': 1}, {'random': 1, 'first': 2}
+]
+
+results = league_bench(games=20, every=10, runs=1, reference_games=20)
+assert results['games'] == [10, 20]
+assert len(results['league']) == len(results['round_robin']) == 2
+assert 'hesitant_1' not in POLICIES
+
+# Test fuzzer
+
+from uno_fuzz import InvariantChecker, InvariantError, fuzz, run_case, shrink
+
+assert fuzz(120, seed=1) is None
+
+
+class LosesCards(QuietUnoGame):
+    def _pick_up(self, player, n):
+        super()._pick_up(player, n)
+        if n == 4:
+            self.deck.pop(0)
+
+
+class DoubleReverse(QuietUnoGame):
+    def _card_effect(self, player, played_card, new_color, target=None):
+        super()._card_effect(player, played_card, new_color, target)
+        if played_card.card_type == 'reverse' and len(self.players) > 3:
+            self._player_cycle.reverse()
+
+
+class LosesDraws(QuietUnoGame):
+    def _pick_up(self, player, n):
+        super()._pick_up(player, n)
+        self.deck.pop(0)
+
+
+for game_class, invariant in [(LosesCards, 'cards'),
+                              (DoubleReverse, 'reverse'),
+                              (LosesDraws, 'cards')]:
+    original = fuzz(200, game_class=game_class, shrink_failures=False)
+    case = fuzz(200, game_class=game_class)
+    assert case['error'] == original['error']
+    assert case['error'].startswith(invariant + ':')
+    # shrunk from the failing game's own moves, players and rules
+    assert case['seed'] == original['seed']
+    assert len(case['moves']) < len(original['moves']) or \
+        len(original['moves']) == 1
+    assert set(case['moves']) <= set(original['moves'])
+    assert case['players'] <= original['players']
+    assert all(original['rules'][name] for name, enabled in
+               case['rules'].items() if enabled)
+    # and still raises the same error
+    with pytest.raises(InvariantError) as error:
+        run_case(case, game_class)
+    assert str(error.value) == case['error']
+    run_case(case)
+# a failure which doesn't need the extra players loses them
+assert case['players'] == 2 and len(case['moves']) == 1
+assert shrink(case, case['error'], LosesDraws, players=False) == \
+    {key: value for key, value in case.items() if key != 'error'}
+with pytest.raises(ValueError):
+    shrink(case, 'exception: IndexError()', LosesDraws)
+
+game = UnoGame(20, seed=1, decks=2)
+checker = InvariantChecker(game, full_every=1)
+before = game.to_bytes()
+with pytest.raises(ValueError):
+    checker.play(1, 0)
+assert game.to_bytes() == before
+checker.play(0, None)
+game.players[3].hand[0] = UnoCard('red', 5)
+with pytest.raises(InvariantError):
+    checker.check_all()
+
+game = UnoGame(3, seed=1)
+checker = InvariantChecker(game)
+game.players[1].hand[0].temp_color = 'red'
+with pytest.raises(InvariantError) as error:
+    checker.check_all()
+assert error.value.invariant == 'temp_color'
+game.players[1].hand[0].temp_color = None
+
+
+class ChangesThenRefuses(UnoGame):
+    def _check_playable(self, card):
+        self._player_cycle.reverse()
+        super()._check_playable(card)
+
+
+game = ChangesThenRefuses(3, random=False)
+checker = InvariantChecker(game)
+with pytest.raises(InvariantError) as error:
+    for card in range(7):
+        checker.play(0, card, 'red')
+assert error.value.invariant in ('refused move', 'reverse')
+
+# Test tracing
+
+import asyncio
+
+from uno_bench import tracing
+from uno_trace import Tracer, traced_class
+
+with pytest.raises(ValueError):
+    Tracer(sample_every=0)
+
+tracer = Tracer(capacity=3)
+for name in ['a', 'b', 'c', 'd']:
+    with tracer.span(name, 'test', {'n': 1}):
+        pass
+# the oldest span is overwritten
+assert [event[1] for event in tracer.events()] == ['b', 'c', 'd']
+tracer.clear()
+assert tracer.events() == []
+
+tracer = Tracer()
+thread = threading.Thread(
+    target=tracer.wrap(lambda: None, 'work'), name='worker'
+)
+thread.start()
+thread.join()
+with tracer.span('outer'):
+    with tracer.span('inner'):
+        pass
+trace = json.loads(json.dumps(tracer.to_chrome()))
+spans = {event['name']: event for event in trace['traceEvents']
+         if event['ph'] == 'X'}
+assert set(spans) == {'work', 'outer', 'inner'}
+assert spans['work']['tid'] != spans['outer']['tid']
+outer, inner = spans['outer'], spans['inner']
+assert outer['ts'] <= inner['ts']
+assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+thread_names = {event['tid']: event['args']['name']
+                for event in trace['traceEvents']
+                if event['name'] == 'thread_name'}
+assert thread_names[spans['work']['tid']] == 'worker'
+
+# errors still end the span
+with pytest.raises(ZeroDivisionError):
+    tracer.wrap(lambda: 1 / 0, 'fails')()
+assert tracer.events()[-1][1] == 'fails'
+
+
+async def wait():
+    await asyncio.sleep(0.01)
+    return 1
+
+
+assert asyncio.run(tracer.wrap(wait)()) == 1
+tid, name, cat, start, duration, args = tracer.events()[-1]
+assert name == 'wait' and duration >= 10 ** 7
+
+# traced games play exactly as untraced games
+tracer = Tracer()
+TracedGame = traced_class(QuietUnoGame, tracer)
+assert traced_class(QuietUnoGame, tracer) is TracedGame
+assert isinstance(TracedGame(4), QuietUnoGame)
+tracer.clear()
+for seed in range(5):
+    assert play_game(4, seed, tracer=tracer) == play_game(4, seed)
+names = Counter(event[1] for event in tracer.events())
+assert names['play_game'] == 1
+assert names['random'] == names['apply'] > 0
+assert names['shuffle'] == 1
+assert names['pick_up'] > 0
+
+tracer = Tracer(sample_every=2)
+pool = GamePool(QuietUnoGame)
+for seed in range(6):
+    assert play_game(4, seed, pool=pool, tracer=tracer) == play_game(4, seed)
+assert Counter(event[1] for event in tracer.events())['play_game'] == 3
+
+game = traced_class(LazyDeckUnoGame, tracer)(3, seed=1)
+while game.is_active:
+    game.play(game.players.index(game.current_player), None)
+    if game.pile_size == 0:
+        game.play(game.players.index(game.current_player), None)
+        break
+names = Counter(event[1] for event in tracer.events())
+assert names['reshuffle'] == 1
+assert names['play'] > 0
+
+with tempfile.TemporaryDirectory() as trace_dir:
+    log = GameLog(os.path.join(trace_dir, 'tables.wal'), fsync=False)
+    tracer.trace_methods(log, ['commit'], 'io')
+    log.create(0, UnoGame(3, seed=1))
+    log.commit()
+    log.close()
+    assert tracer.events()[-1][1:3] == ('GameLog.commit', 'io')
+    path = os.path.join(trace_dir, 'uno.trace.json')
+    tracer.save(path)
+    with open(path) as f:
+        assert json.load(f) == tracer.to_chrome()
+
+results = tracing(games=100, block=50)
+assert results['plain'] > 0 and results['traced'] > 0
+assert results['spans'] > 0
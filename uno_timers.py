@@ -0,0 +1,216 @@
+import asyncio
+import traceback
+from time import monotonic
+
+
+class Timer:
+    """
+    A callback scheduled on a TimingWheel, returned by TimingWheel.schedule
+    to be cancelled with TimingWheel.cancel.
+    """
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self._bucket = None
+
+    @property
+    def active(self):
+        return self._bucket is not None
+
+
+class TimingWheel:
+    """
+    Schedules callbacks in ticks of tick seconds, for large numbers of
+    deadlines at once. Each level of the wheel has wheel_size slots, and a
+    slot of each level covers wheel_size times as many ticks as one of the
+    level below. A timer goes into the lowest level which reaches its
+    deadline, and moves down a level each time the level above turns over,
+    so scheduling and cancelling take constant time and each tick only looks
+    at the timers due in it.
+
+    Time moves on when advance is called, which fires the callbacks whose
+    deadlines have passed, in order of deadline; run does this every tick in
+    an asyncio task. A callback which raises doesn't stop the others: the
+    error is counted in errors and passed to on_error(timer, exception),
+    which by default prints the traceback.
+
+    tick: float, seconds (default: 0.1)
+    wheel_size: int (default: 256)
+    levels: int (default: 4)
+    clock: function returning the time in seconds (default: time.monotonic)
+    on_error: function (default: None)
+
+    >>> wheel = TimingWheel()
+    >>> timer = wheel.schedule(30, print, 'time is up')
+    >>> wheel.cancel(timer)
+    """
+    def __init__(
+        self, tick=0.1, wheel_size=256, levels=4, clock=monotonic,
+        on_error=None
+    ):
+        if tick <= 0 or wheel_size < 2 or levels < 1:
+            raise ValueError('Invalid wheel: tick, wheel_size or levels')
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.clock = clock
+        self.on_error = on_error
+        self.start = clock()
+        self.current = 0
+        self.pending = 0
+        self.errors = 0
+        self._spans = [wheel_size ** level for level in range(levels)]
+        self._wheels = [
+            [set() for slot in range(wheel_size)] for level in range(levels)
+        ]
+        self._due = set()
+
+    def schedule(self, delay, callback, *args):
+        """
+        Call callback(*args) once delay seconds have passed, rounded up to a
+        whole number of ticks. Return the Timer.
+        """
+        ticks = -(-delay // self.tick)
+        timer = Timer(self.current + max(int(ticks), 1), callback, args)
+        self._insert(timer)
+        self.pending += 1
+        return timer
+
+    def cancel(self, timer):
+        """
+        Stop the timer from firing, if it hasn't already.
+        """
+        if timer._bucket is not None:
+            timer._bucket.remove(timer)
+            timer._bucket = None
+            self.pending -= 1
+
+    def _insert(self, timer):
+        ticks = timer.deadline - self.current
+        if ticks <= 0:
+            bucket = self._due
+        else:
+            size = self.wheel_size
+            for span, wheel in zip(self._spans, self._wheels):
+                if ticks < span * size:
+                    bucket = wheel[timer.deadline // span % size]
+                    break
+            else:
+                # Beyond the top level; wait in its furthest slot and be
+                # placed again when that slot comes round
+                bucket = wheel[(self.current // span - 1) % size]
+        bucket.add(timer)
+        timer._bucket = bucket
+
+    def advance(self, now=None):
+        """
+        Move time on to now (default: the clock's time), firing every timer
+        whose deadline has passed. Return the number of timers fired.
+
+        Timers which are due wait in a batch of their own until their turn,
+        so a callback can still cancel one which is due after it.
+        """
+        if now is None:
+            now = self.clock()
+        target = int((now - self.start) // self.tick)
+        fired = []
+        size = self.wheel_size
+        while self.current < target:
+            self.current += 1
+            # Move the timers in the slots which have come round down a level
+            for span, wheel in zip(self._spans[:0:-1], self._wheels[:0:-1]):
+                if self.current % span == 0:
+                    bucket = wheel[self.current // span % size]
+                    timers = list(bucket)
+                    bucket.clear()
+                    for timer in timers:
+                        self._insert(timer)
+            for due in (self._due, self._wheels[0][self.current % size]):
+                if due:
+                    fired.extend(sorted(due, key=_deadline))
+                    due.clear()
+        batch = set(fired)
+        for timer in fired:
+            timer._bucket = batch
+        count = 0
+        for timer in fired:
+            if timer._bucket is not batch:
+                # Cancelled by an earlier callback
+                continue
+            batch.remove(timer)
+            timer._bucket = None
+            self.pending -= 1
+            count += 1
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                self.errors += 1
+                if self.on_error is not None:
+                    self.on_error(timer, e)
+                else:
+                    traceback.print_exception(e)
+        return count
+
+    async def run(self):
+        """
+        Advance the wheel every tick, until cancelled.
+        """
+        while True:
+            self.advance()
+            await asyncio.sleep(self.tick)
+
+
+def _deadline(timer):
+    return timer.deadline
+
+
+class TimedTable:
+    """
+    Wraps a game with a time limit on each turn. Moves are made through the
+    table's play method, which starts the clock for the next turn. If the
+    current player hasn't moved when time runs out, they pick up, as if they
+    had called game.play(player, None). If that fails, e.g. there are no
+    cards left to pick up, the error is kept in error and the player is given
+    another turn's time to move.
+
+    game: UnoGame
+    wheel: TimingWheel, shared by any number of tables
+    timeout: float, seconds per turn
+
+    >>> wheel = TimingWheel()
+    >>> tables = [TimedTable(UnoGame(4), wheel, 30) for n in range(1000)]
+    >>> asyncio.create_task(wheel.run())
+    """
+    def __init__(self, game, wheel, timeout):
+        self.game = game
+        self.wheel = wheel
+        self.timeout = timeout
+        self.timeouts = 0
+        self.error = None
+        self._timer = None
+        self._arm()
+
+    def play(self, player, card=None, new_color=None, target=None):
+        """
+        Make a move as with UnoGame.play, and start the clock for the next
+        turn.
+        """
+        self.game.play(player, card, new_color, target)
+        self._arm()
+
+    def _arm(self):
+        if self._timer is not None:
+            self.wheel.cancel(self._timer)
+            self._timer = None
+        if self.game.is_active:
+            self._timer = self.wheel.schedule(self.timeout, self._expire)
+
+    def _expire(self):
+        self._timer = None
+        game = self.game
+        self.timeouts += 1
+        try:
+            game.play(game.players.index(game.current_player), None)
+        except Exception as e:
+            self.error = e
+        self._arm()
@@ -0,0 +1,284 @@
+import os
+from functools import partial
+from multiprocessing import Pool
+from struct import Struct
+from zlib import crc32
+
+from uno import UnoGame, COLORS, COLOR_INDEX
+from uno_lazy import LazyDeckUnoGame
+
+
+# Each record is a header (checksum, table, payload length, kind) followed by
+# the payload. The checksum covers everything after it, so a record torn by
+# a crash is found and everything from it on is ignored.
+_CHECKSUM = Struct('<I')
+_BODY = Struct('<IHB')
+# A move is the player, card, color and target, with _NONE (or _NO_COLOR)
+# for those not given
+_MOVE = Struct('<HHBH')
+SNAPSHOT, MOVE, DROP = range(3)
+_NONE = 0xFFFF
+_NO_COLOR = 255
+
+
+class GameLog:
+    """
+    An append-only write-ahead log of the moves made at many tables, from
+    which they can be recovered with recover after a crash.
+
+    Each table starts with a snapshot of its game (from UnoGame.to_bytes),
+    and gets a new snapshot every snapshot_every moves, so recovering a
+    table only replays the moves since its last snapshot. Records are
+    buffered and written together when group_size have built up or commit
+    is called, with one fsync for the group if fsync is True; moves since
+    the last commit are lost in a crash. checkpoint rewrites the log as a
+    snapshot of each table, so it doesn't grow forever.
+
+    Recovery replays the moves, so a game must play the same way from its
+    snapshot every time. A LazyDeckUnoGame draws each card from its rng,
+    which isn't in the snapshot, so it can't be logged.
+
+    path: string
+    group_size: int, records per write (default: 256)
+    fsync: bool (default: True)
+    snapshot_every: int, moves (default: 50)
+
+    >>> log = GameLog('tables.wal')
+    >>> log.create(1, game)
+    >>> log.play(1, game, 0, 3)
+    >>> log.commit()
+    >>> games = recover('tables.wal')
+    """
+    def __init__(self, path, group_size=256, fsync=True, snapshot_every=50):
+        self.path = path
+        self.group_size = group_size
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self._file = open(path, 'ab')
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._moves = {}
+
+    def _append(self, table, kind, payload):
+        self._buffer += _record(table, kind, payload)
+        self._buffered += 1
+        if self._buffered >= self.group_size:
+            self.commit()
+
+    def create(self, table, game):
+        """
+        Start logging a table, with its game as it is now.
+
+        table: int, id of the table
+        game: UnoGame
+        """
+        _check_class(type(game))
+        self._moves[table] = 0
+        self._append(table, SNAPSHOT, game.to_bytes())
+
+    def play(self, table, game, player, card=None, new_color=None,
+             target=None):
+        """
+        Make a move at a table as with game.play, and log it. Moves which
+        raise an exception aren't logged, and the game is left as it was if
+        the move can't be logged.
+        """
+        payload = _encode_move(player, card, new_color, target)
+        game.play(player, card, new_color, target)
+        self._append(table, MOVE, payload)
+        moves = self._moves[table] + 1
+        if moves >= self.snapshot_every:
+            self._append(table, SNAPSHOT, game.to_bytes())
+            moves = 0
+        self._moves[table] = moves
+
+    def drop(self, table):
+        """
+        Stop logging a table, e.g. when its game is over.
+        """
+        del self._moves[table]
+        self._append(table, DROP, b'')
+
+    def commit(self):
+        """
+        Write the buffered records to the log, and fsync it if fsync is True.
+        """
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._buffer = bytearray()
+            self._buffered = 0
+
+    def checkpoint(self, games):
+        """
+        Replace the log with a snapshot of each table's game.
+
+        games: dict of table id to UnoGame, for every table being logged
+        """
+        self.commit()
+        tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            for table, game in games.items():
+                f.write(_record(table, SNAPSHOT, game.to_bytes()))
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'ab')
+        self._moves = dict.fromkeys(games, 0)
+
+    def close(self):
+        self.commit()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_class(game_class):
+    """
+    Raise ValueError if games of the class can't be replayed from a snapshot.
+    """
+    if issubclass(game_class, LazyDeckUnoGame):
+        raise ValueError(
+            'Invalid game class: {} draws from an rng not in the '
+            'snapshot'.format(game_class.__name__)
+        )
+
+
+def _record(table, kind, payload):
+    body = _BODY.pack(table, len(payload), kind) + payload
+    return _CHECKSUM.pack(crc32(body)) + body
+
+
+def read_log(path):
+    """
+    Return a dict of table id to (snapshot, moves) for each table in the
+    log, where moves is a list of the (player, card, new_color, target)
+    moves since the snapshot. Reading stops at the first torn or corrupt
+    record.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    view = memoryview(data)
+    # Offsets of each table's latest snapshot and the moves after it
+    tables = {}
+    offset = 0
+    start = _CHECKSUM.size
+    size = start + _BODY.size
+    unpack_checksum = _CHECKSUM.unpack_from
+    unpack_body = _BODY.unpack_from
+    while offset + size <= len(data):
+        checksum, = unpack_checksum(data, offset)
+        table, length, kind = unpack_body(data, offset + start)
+        end = offset + size + length
+        if end > len(data) or crc32(view[offset + start:end]) != checksum:
+            break
+        if kind == MOVE:
+            if table in tables:
+                tables[table].append(offset + size)
+        elif kind == SNAPSHOT:
+            tables[table] = [offset + size, end]
+        elif kind == DROP:
+            tables.pop(table, None)
+        offset = end
+    unpack_move = _MOVE.unpack_from
+    return {
+        table: (
+            data[snapshot:end],
+            [_decode_move(unpack_move(data, move)) for move in moves]
+        )
+        for table, (snapshot, end, *moves) in tables.items()
+    }
+
+
+def _encode_move(player, card, new_color, target):
+    """
+    Return a move packed for the log, raising ValueError for one which can't
+    be.
+    """
+    for name, value in [('player', player), ('card', card),
+                        ('target', target)]:
+        if value is not None and (
+            not isinstance(value, int) or not 0 <= value < _NONE
+        ):
+            raise ValueError('Invalid {}: {!r}'.format(name, value))
+    if new_color is not None and new_color not in COLORS:
+        raise ValueError('Invalid color: {!r}'.format(new_color))
+    return _MOVE.pack(
+        player,
+        _NONE if card is None else card,
+        _NO_COLOR if new_color is None else COLOR_INDEX[new_color],
+        _NONE if target is None else target,
+    )
+
+
+def _decode_move(move):
+    player, card, color, target = move
+    return (
+        player,
+        None if card == _NONE else card,
+        None if color == _NO_COLOR else COLORS[color],
+        None if target == _NONE else target,
+    )
+
+
+def _replay(snapshot, moves, game_class=UnoGame):
+    """
+    Return the game from a snapshot with the moves made since replayed.
+    """
+    game = game_class.from_bytes(snapshot)
+    # The winner has already been announced
+    game._print_winner = _no_print
+    for move in moves:
+        game.play(*move)
+    del game._print_winner
+    return game
+
+
+def _no_print():
+    pass
+
+
+def _replay_chunk(chunk, game_class=UnoGame):
+    return [
+        (table, _replay(snapshot, moves, game_class).to_bytes())
+        for table, snapshot, moves in chunk
+    ]
+
+
+def recover(path, processes=1, game_class=UnoGame, chunk_size=500):
+    """
+    Return a dict of table id to game, for every table in the log at path
+    which hasn't been dropped. Tables are rebuilt by a pool of processes if
+    processes is more than 1, in chunks of chunk_size tables. Games are
+    restored as game_class, which must be importable by the processes, and
+    must replay moves the same way every time.
+    """
+    _check_class(game_class)
+    tables = read_log(path)
+    if processes <= 1 or len(tables) <= chunk_size:
+        return {
+            table: _replay(snapshot, moves, game_class)
+            for table, (snapshot, moves) in tables.items()
+        }
+    items = [
+        (table, snapshot, moves)
+        for table, (snapshot, moves) in tables.items()
+    ]
+    chunks = [
+        items[i:i + chunk_size] for i in range(0, len(items), chunk_size)
+    ]
+    games = {}
+    with Pool(processes) as pool:
+        for results in pool.imap_unordered(
+                partial(_replay_chunk, game_class=game_class), chunks
+            ):
+            for table, data in results:
+                games[table] = game_class.from_bytes(data)
+    return games